@@ -0,0 +1,36 @@
+"""Add normalized tag_list columns on event and community
+
+Revision ID: d4e5f6a7b8c9
+Revises: c3d4e5f6a7b8
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = 'd4e5f6a7b8c9'
+down_revision: Union[str, None] = 'c3d4e5f6a7b8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TAG_LIST_EXPRESSION = r"array_remove(regexp_split_to_array(lower(trim(coalesce(tags, ''))), '\s*,\s*'), '')"
+
+
+def upgrade() -> None:
+    # The generated columns are computed for the existing rows when they are added
+    for table in ('event', 'community'):
+        op.add_column(
+            table,
+            sa.Column('tag_list', postgresql.ARRAY(sa.Text()), sa.Computed(TAG_LIST_EXPRESSION, persisted=True)),
+        )
+        op.create_index(f'ix_{table}_tag_list', table, ['tag_list'], postgresql_using='gin')
+
+
+def downgrade() -> None:
+    for table in ('event', 'community'):
+        op.drop_index(f'ix_{table}_tag_list', table_name=table)
+        op.drop_column(table, 'tag_list')
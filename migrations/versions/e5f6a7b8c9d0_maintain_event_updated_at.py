@@ -0,0 +1,52 @@
+"""Maintain event.updated_at in the database for the changes feed
+
+Revision ID: e5f6a7b8c9d0
+Revises: d4e5f6a7b8c9
+Create Date: 2026-10-18 00:00:01.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = 'e5f6a7b8c9d0'
+down_revision: Union[str, None] = 'd4e5f6a7b8c9'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Events never updated since their creation had no updated_at
+    op.execute("UPDATE event SET updated_at = coalesce(created_at, now()) WHERE updated_at IS NULL")
+
+    # Set updated_at on insert and on the updates really changing the row, the collectors rewrite all the events at
+    # each collect. clock_timestamp() is used instead of now() so the rows written by long transactions don't get
+    # a date older than the changes already committed.
+    op.execute("""
+        CREATE FUNCTION event_set_updated_at() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP = 'INSERT'
+                OR (to_jsonb(NEW) - 'updated_at' - 'tag_list') IS DISTINCT FROM (to_jsonb(OLD) - 'updated_at' - 'tag_list')
+            THEN
+                NEW.updated_at = clock_timestamp();
+            ELSE
+                NEW.updated_at = OLD.updated_at;
+            END IF;
+            RETURN NEW;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("""
+        CREATE TRIGGER event_set_updated_at
+        BEFORE INSERT OR UPDATE ON event
+        FOR EACH ROW EXECUTE FUNCTION event_set_updated_at()
+    """)
+
+    op.create_index('ix_event_updated_at_id', 'event', ['updated_at', 'id'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_event_updated_at_id', table_name='event')
+    op.execute("DROP TRIGGER event_set_updated_at ON event")
+    op.execute("DROP FUNCTION event_set_updated_at()")
@@ -0,0 +1,32 @@
+"""Add index for the duplicate events detection
+
+Revision ID: f6a7b8c9d0e1
+Revises: e5f6a7b8c9d0
+Create Date: 2026-10-18 00:00:02.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'f6a7b8c9d0e1'
+down_revision: Union[str, None] = 'e5f6a7b8c9d0'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Rows of the events in the order of the ROW_NUMBER() window of the duplicates detection: partitioned by
+    # community, name, dates and description hash then ranked by creation. The description is hashed so long
+    # descriptions fit in the index.
+    op.create_index(
+        'ix_event_duplicates',
+        'event',
+        ['community_id', 'name', 'start_time', 'end_time', sa.text('md5(description)'), 'created_at', 'id'],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_event_duplicates', table_name='event')
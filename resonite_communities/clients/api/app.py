@@ -1,6 +1,7 @@
 import argparse
 import uvicorn
 import multiprocessing
+from contextlib import asynccontextmanager
 
 from fastapi import FastAPI, Request, APIRouter
 from fastapi_versionizer import Versionizer
@@ -11,6 +12,11 @@ from resonite_communities.clients import StandaloneApplication
 
 from resonite_communities.utils.config import ConfigManager
 from resonite_communities.utils.db import async_request_session
+from resonite_communities.utils.http import http_client
+from resonite_communities.utils.notify import ChangesListener
+from resonite_communities.clients.api.utils.cache import invalidate_changes
+from resonite_communities.clients.api.utils.events_index import events_index
+from resonite_communities.clients.api.utils.broadcaster import broadcaster
 
 config_manager = ConfigManager()
 
@@ -44,7 +50,33 @@ if config_manager.infrastructure_config.SENTRY_DSN:
         profile_lifecycle="trace",
     )
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Each worker listen to the database changes to update its events index, push the changes to the live clients
+    # and invalidate its cached responses. The index must be updated first as the others read from it.
+    changes_listener = ChangesListener(
+        config_manager.infrastructure_config.DATABASE_URL.replace('postgresql+asyncpg://', 'postgresql://')
+    )
+    changes_listener.subscribe(events_index.apply_change)
+    changes_listener.subscribe(broadcaster.on_change)
+    changes_listener.subscribe(invalidate_changes)
+    events_index.start()
+
+    async def resync():
+        # Changes missed by the listener, the subscribers reload everything as after a reconnection
+        await changes_listener.dispatch({'table': None, 'ids': None, 'community_ids': None})
+
+    events_index.start_polling(float(config_manager.infrastructure_config.EVENTS_INDEX_POLL_INTERVAL), resync)
+    await changes_listener.start()
+    app.state.changes_listener = changes_listener
+    try:
+        yield
+    finally:
+        await changes_listener.stop()
+        await events_index.stop_polling()
+        await http_client.close()
+
+app = FastAPI(lifespan=lifespan)
 
 app.add_middleware(MetricsMiddleware, db_path=get_geoip_db_path())
 app.add_middleware(DatabaseSessionMiddleware)
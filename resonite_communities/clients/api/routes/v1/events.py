@@ -1,5 +1,5 @@
 from fastapi import Request
-from resonite_communities.clients.api.utils.formatter import FormatType, set_default_format, get_filtered_events, generate_events_response
+from resonite_communities.clients.api.utils.formatter import FormatType, set_default_format, get_events_snapshot, generate_events_response
 from resonite_communities.clients.api.routes.routers import router_v1
 from resonite_communities.utils.db import get_current_async_session
 
@@ -9,9 +9,10 @@ async def get_events_v1(request: Request, format_type: FormatType = None, commun
     format_type = set_default_format(version="v1", format_type=format_type)
     session = await get_current_async_session()
     return generate_events_response(
+        request=request,
         version="v1",
         format_type=set_default_format(version="v1", format_type=format_type),
-        events=await get_filtered_events(request.url.hostname, "v1", communities, languages, session=session),
+        snapshot=await get_events_snapshot(request.url.hostname, "v1", communities, languages, session=session),
     )
 
 
@@ -1,5 +1,6 @@
 from . import events
 from . import communities
+from . import live
 from . import admin
 from .admin import events
 from .admin import communities
@@ -7,3 +8,4 @@ from .admin import configuration
 from .admin import metrics
 from .admin import users
 from . import streams
+from . import signals
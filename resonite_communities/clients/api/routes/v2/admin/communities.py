@@ -1,12 +1,12 @@
 import calendar
 from datetime import datetime, timedelta, date
 from typing import List, Optional
+from json import JSONDecodeError
 from uuid import UUID
 
 
 
-import requests
-from requests.exceptions import RequestException, JSONDecodeError
+import httpx
 from sqlalchemy import and_, not_, select, func
 from sqlalchemy.exc import SQLAlchemyError
 from fastapi import Query
@@ -19,6 +19,7 @@ from resonite_communities.clients.api.utils.models import CommunityRequest
 from resonite_communities.models.signal import Event
 from resonite_communities.models.community import CommunityPlatform, Community, events_platforms, streams_platforms
 from resonite_communities.utils.db import get_current_async_session
+from resonite_communities.utils.http import http_client
 from resonite_communities.utils.logger import get_logger
 from resonite_communities.utils.config import ConfigManager
 from resonite_communities.utils.config.models import MonitoredDomain, TwitchConfig
@@ -216,7 +217,7 @@ async def update_community(community_id: UUID, data: CommunityRequest, user_auth
         for selected_community_id, selected_community_to_add in data.selected_community_external_ids.items():
             if selected_community_to_add:
                 try:
-                    response = requests.get(
+                    response = await http_client.get(
                         f"{data.events_url}/v2/communities/{selected_community_id}",
                         timeout=10
                     )
@@ -245,7 +246,7 @@ async def update_community(community_id: UUID, data: CommunityRequest, user_auth
                         languages=response_data['languages'],
                         config=remote_config,
                     )
-                except RequestException as e:
+                except httpx.HTTPError as e:
                     logger.error(f"Failed to fetch community {selected_community_id}: {str(e)}")
                     raise HTTPException(
                         status_code=502,
@@ -288,6 +289,7 @@ async def update_community(community_id: UUID, data: CommunityRequest, user_auth
 
         updated = await Community.update(
             filters=(Community.id == community_id),
+            _returning=False,
             **update_fields,
         )
     except SQLAlchemyError as e:
@@ -332,6 +334,7 @@ async def discord_community_setup_import(community_id: UUID, data: DiscordImport
     try:
         updated = await Community.update(
             filters=(Community.id == community_id),
+            _returning=False,
             configured=True,
             enabled=True,
             tags="private" if data.visibility == "PRIVATE" else "public"
@@ -10,6 +10,7 @@ from pydantic import BaseModel
 
 from resonite_communities.clients.utils.auth import UserAuthModel
 from resonite_communities.clients.api.routes.routers import router_v2
+from resonite_communities.clients.api.utils.serializer import StreamingJSONResponse
 from resonite_communities.models.signal import Event, EventStatus
 from resonite_communities.utils.logger import get_logger
 
@@ -22,6 +23,25 @@ class EventUpdateStatusRequest(BaseModel):
     status: EventStatus
 
 
+def format_admin_event(event: Event) -> dict:
+    return {
+        "id": str(event.id),
+        "external_id": str(event.external_id),
+        "name": event.name,
+        "description": event.description,
+        "session_image": event.session_image,
+        "location_str": event.location,
+        "location_web_session_url": event.location_web_session_url,
+        "location_session_url": event.location_session_url,
+        "start_time": event.start_time.strftime("%Y-%m-%dT%H:%M:%SZ"),
+        "end_time": event.end_time.strftime("%Y-%m-%dT%H:%M:%SZ") if event.end_time else None,
+        "community_name": event.community.name,
+        "community_url": event.community.url,
+        "tags": event.tags,
+        "status": event.status,
+    }
+
+
 @router_v2.get("/admin/events")
 async def get_admin_events(
     request: Request,
@@ -72,32 +92,11 @@ async def get_admin_events(
     if community_id:
         custom_filters.append(Event.community_id == community_id)
 
-    try:
-        events = await Event().find(__order_by=['start_time'], __custom_filter=and_(*custom_filters))
-    except SQLAlchemyError as e:
-        logger.error(f"Database error fetching admin events: {str(e)}")
-        raise HTTPException(status_code=500, detail="Database error occurred")
-
-    events_formatted = []
-    for event in events:
-        events_formatted.append({
-            "id": str(event.id),
-            "external_id": str(event.external_id),
-            "name": event.name,
-            "description": event.description,
-            "session_image": event.session_image,
-            "location_str": event.location,
-            "location_web_session_url": event.location_web_session_url,
-            "location_session_url": event.location_session_url,
-            "start_time": event.start_time.strftime("%Y-%m-%dT%H:%M:%SZ"),
-            "end_time": event.end_time.strftime("%Y-%m-%dT%H:%M:%SZ") if event.end_time else None,
-            "community_name": event.community.name,
-            "community_url": event.community.url,
-            "tags": event.tags,
-            "status": event.status,
-        })
-
-    return events_formatted
+    # The events are sent while they are read, a database error past this point abort the response
+    return StreamingJSONResponse(
+        Event.stream(__load=['community'], __order_by=['start_time'], __custom_filter=and_(*custom_filters)),
+        format_admin_event,
+    )
 
 
 @router_v2.post("/admin/events/update_status")
@@ -28,6 +28,7 @@ async def update_user_status(data: UserUpdateStatusRequest, user_auth: UserAuthM
     try:
         result = await User.update(
             filters=(User.id == data.id),
+            _returning=False,
             is_superuser=data.is_superuser,
             is_moderator=data.is_moderator
         )
@@ -1,10 +1,18 @@
 from resonite_communities.clients.api.routes.routers import router_v2
 from resonite_communities.models.community import Community, events_platforms, CommunityPlatform
 from resonite_communities.clients.utils.auth import UserAuthModel, get_user_auth
-from fastapi import Depends
+from resonite_communities.clients.api.utils.serializer import SerializedJSONResponse
+from resonite_communities.clients.api.utils.cache import authenticated_request_key_builder, load_cached
+from resonite_communities.clients.api.utils.formatter import JSONSnapshot
+from resonite_communities.utils.config import ConfigManager
+from resonite_communities.utils.db import async_request_session
+from fastapi import Depends, Request
 
-@router_v2.get("/communities")
+config_manager = ConfigManager()
+
+@router_v2.get("/communities", response_class=SerializedJSONResponse)
 async def get_communities(
+    request: Request,
     platform: str = "events",
     configured: bool = False,
     enabled: bool = False,
@@ -13,58 +21,68 @@ async def get_communities(
     include_all: bool = False,
     user_auth: UserAuthModel = Depends(get_user_auth)
 ):
-    filters = {}
+    async def load():
+        filters = {}
+
+        if not include_all:
+            if platform.lower() in ["streams", "twitch"]:
+                filters['platform__in'] = [CommunityPlatform.TWITCH]
+            elif platform.lower() == "events" or platform == "":
+                # "events" is the default, "" is for backward compatibility
+                filters['platform__in'] = events_platforms
+            else:
+                filters['platform__in'] = events_platforms
 
-    if not include_all:
-        if platform.lower() in ["streams", "twitch"]:
-            filters['platform__in'] = [CommunityPlatform.TWITCH]
-        elif platform.lower() == "events" or platform == "":
-            # "events" is the default, "" is for backward compatibility
-            filters['platform__in'] = events_platforms
-        else:
-            filters['platform__in'] = events_platforms
+        if configured:
+            filters['configured__eq'] = True
 
-    if configured:
-        filters['configured__eq'] = True
+        if enabled:
+            filters['enabled__eq'] = True
 
-    if enabled:
-        filters['enabled__eq'] = True
+        if user_communities_only and user_auth:
+            filters['id__in'] = user_auth.discord_account.user_communities
 
-    if user_communities_only and user_auth:
-        filters['id__in'] = user_auth.discord_account.user_communities
+        if public_only:
+            filters['tag_list__contains'] = ['public']
 
-    if public_only:
-        filters['__custom_filter'] = Community.tags.ilike('%public%')
+        communities = await Community().find(**filters)
 
-    communities = await Community().find(**filters)
+        communities_formatted = []
+        for community in communities:
+            communities_formatted.append({
+                "id": community.id,
+                "name": community.name,
+                "description": community.custom_description if community.custom_description else community.default_description,
+                "default_description": community.default_description,
+                "monitored": community.monitored,
+                "members_count": community.members_count,
+                "url": community.url,
+                "icon": community.logo,
+                "external_id": community.external_id,
+                "platform": community.platform,
+                "public": True if 'public' in (community.tags or []) else False,
+                "configured": community.configured,
+                "enabled": community.enabled,
+            })
+        return JSONSnapshot(communities_formatted), int(config_manager.infrastructure_config.CACHE_TTL), ["communities"]
 
-    communities_formatted = []
-    for community in communities:
-        communities_formatted.append({
-            "id": community.id,
-            "name": community.name,
-            "description": community.custom_description if community.custom_description else community.default_description,
-            "default_description": community.default_description,
-            "monitored": community.monitored,
-            "members_count": community.members_count,
-            "url": community.url,
-            "icon": community.logo,
-            "external_id": community.external_id,
-            "platform": community.platform,
-            "public": True if 'public' in (community.tags or []) else False,
-            "configured": community.configured,
-            "enabled": community.enabled,
-        })
-    return communities_formatted
+    snapshot = await load_cached(
+        authenticated_request_key_builder(get_communities, namespace="fastapi-cache", request=request, user_auth=user_auth),
+        load,
+        stale_while_revalidate=int(config_manager.infrastructure_config.CACHE_STALE_WHILE_REVALIDATE),
+        stale_if_error=int(config_manager.infrastructure_config.CACHE_STALE_IF_ERROR),
+        refresh_context=async_request_session,
+    )
+    return snapshot.response(request)
 
-@router_v2.get("/communities/{community_id}")
+@router_v2.get("/communities/{community_id}", response_class=SerializedJSONResponse)
 async def get_community(community_id: str):
     try:
         community = (await Community().find(id=community_id))[0]
     except IndexError:
-        return {}
+        return SerializedJSONResponse({})
 
-    return {
+    return SerializedJSONResponse({
         "id": community.id,
         "name": community.name,
         "icon": community.logo,
@@ -80,4 +98,4 @@ async def get_community(community_id: str):
         "public": True if 'public' in community.tags else False,
         "configured": community.configured,
         "enabled": community.enabled,
-    }
+    })
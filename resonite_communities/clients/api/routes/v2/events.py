@@ -1,8 +1,9 @@
-from fastapi import Request, Depends, Header
-from resonite_communities.clients.api.utils.formatter import FormatType, set_default_format, get_filtered_events, generate_events_response
+from fastapi import Request, Depends, Header, Query
+from resonite_communities.clients.api.utils.formatter import FormatType, set_default_format, get_events_snapshot, get_events_changes, generate_events_response
 from resonite_communities.clients.api.routes.routers import router_v2
 from resonite_communities.clients.utils.auth import UserAuthModel, get_user_auth
 from resonite_communities.clients.api.utils.auth import get_user_auth_from_header_or_cookie
+from resonite_communities.clients.api.utils.pagination import MAX_LIMIT, Window, get_window
 from resonite_communities.utils.db import get_current_async_session
 import json
 from typing import Optional
@@ -13,11 +14,34 @@ async def get_events_v2(
     format_type: FormatType = None,
     communities: str = "",
     languages: str = "",
+    tags: str = "",
+    window: Window = Depends(get_window),
     user_auth: UserAuthModel = Depends(get_user_auth_from_header_or_cookie)
 ):
     session = await get_current_async_session()
     return generate_events_response(
+        request=request,
         version="v2",
         format_type=set_default_format(version="v2", format_type=format_type),
-        events=await get_filtered_events(request.url.hostname, "v2", communities, languages, user_auth, session=session)
+        snapshot=await get_events_snapshot(request.url.hostname, "v2", communities, languages, user_auth, session=session, tags=tags, window=window)
+    )
+
+@router_v2.get("/events/changes")
+async def get_events_changes_v2(
+    request: Request,
+    since: Optional[str] = None,
+    communities: str = "",
+    languages: str = "",
+    tags: str = "",
+    limit: int = Query(500, ge=1, le=MAX_LIMIT),
+    user_auth: UserAuthModel = Depends(get_user_auth_from_header_or_cookie)
+):
+    return await get_events_changes(
+        request.url.hostname,
+        since=since,
+        communities=communities,
+        languages=languages,
+        tags=tags,
+        limit=limit,
+        user_auth=user_auth,
     )
@@ -0,0 +1,80 @@
+import asyncio
+
+from fastapi import Depends, HTTPException, Request, WebSocket, status
+from fastapi.responses import StreamingResponse
+
+from resonite_communities.clients.api.routes.routers import router_v2
+from resonite_communities.clients.api.utils.auth import get_user_auth_from_header_or_cookie
+from resonite_communities.clients.api.utils.broadcaster import Subscription, broadcaster
+from resonite_communities.clients.api.utils.formatter import get_visibility
+from resonite_communities.clients.api.utils.serializer import dumps
+from resonite_communities.clients.utils.auth import UserAuthModel
+
+# Comment sent when there is no message to keep the connection open through the proxies
+KEEPALIVE_INTERVAL = 15
+
+
+def subscribe(host: str, communities: str, languages: str, user_auth: UserAuthModel = None) -> Subscription:
+    all_visible, private_communities = get_visibility(host, user_auth)
+    return broadcaster.subscribe(
+        communities=communities.split(",") if communities else None,
+        languages=languages.split(",") if languages else None,
+        all_visible=all_visible,
+        private_communities=private_communities,
+    )
+
+
+@router_v2.get("/live")
+async def get_live_v2(
+    request: Request,
+    communities: str = "",
+    languages: str = "",
+    user_auth: UserAuthModel = Depends(get_user_auth_from_header_or_cookie)
+):
+    subscription = subscribe(request.url.hostname, communities, languages, user_auth)
+
+    async def messages():
+        try:
+            yield "retry: 5000\n\n"
+            while not await request.is_disconnected():
+                try:
+                    message = await asyncio.wait_for(subscription.get(), KEEPALIVE_INTERVAL)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                yield f"event: {message['type']}\ndata: {dumps(message).decode()}\n\n"
+        finally:
+            broadcaster.unsubscribe(subscription)
+
+    return StreamingResponse(
+        messages(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router_v2.websocket("/live/ws")
+async def live_ws_v2(websocket: WebSocket, communities: str = "", languages: str = ""):
+    try:
+        subscription = subscribe(websocket.url.hostname, communities, languages)
+    except HTTPException as e:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason=e.detail)
+        return
+
+    await websocket.accept()
+
+    async def send_messages():
+        while True:
+            await websocket.send_text(dumps(await subscription.get()).decode())
+
+    async def wait_disconnect():
+        while (await websocket.receive())["type"] != "websocket.disconnect":
+            pass
+
+    tasks = [asyncio.create_task(send_messages()), asyncio.create_task(wait_disconnect())]
+    try:
+        await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        for task in tasks:
+            task.cancel()
+        broadcaster.unsubscribe(subscription)
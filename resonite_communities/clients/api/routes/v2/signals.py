@@ -0,0 +1,16 @@
+from fastapi import Depends, Request
+from resonite_communities.clients.api.routes.routers import router_v2
+from resonite_communities.clients.api.utils.auth import get_user_auth_from_header_or_cookie
+from resonite_communities.clients.api.utils.formatter import get_signals_snapshot
+from resonite_communities.clients.api.utils.pagination import Window, get_window
+from resonite_communities.clients.api.utils.serializer import SerializedJSONResponse
+from resonite_communities.clients.utils.auth import UserAuthModel
+
+@router_v2.get("/signals", response_class=SerializedJSONResponse)
+async def get_signals_v2(
+    request: Request,
+    window: Window = Depends(get_window),
+    user_auth: UserAuthModel = Depends(get_user_auth_from_header_or_cookie)
+):
+    snapshot = await get_signals_snapshot(request, window, user_auth)
+    return snapshot.response(request)
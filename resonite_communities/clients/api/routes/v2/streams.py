@@ -1,31 +1,80 @@
 from resonite_communities.clients.api.routes.routers import router_v2
 from resonite_communities.models.signal import Stream
 from resonite_communities.clients.utils.auth import UserAuthModel, get_user_auth
-from fastapi import Depends
+from resonite_communities.clients.api.utils.pagination import NEXT_CURSOR_HEADER, Window, encode_cursor, get_window
+from resonite_communities.clients.api.utils.serializer import SerializedJSONResponse
+from resonite_communities.clients.api.utils.cache import load_cached, request_key_builder
+from resonite_communities.clients.api.utils.formatter import JSONSnapshot, expire_until_end
+from resonite_communities.utils.config import ConfigManager
+from resonite_communities.utils.db import async_request_session
+from fastapi import Depends, HTTPException, Request
 from datetime import datetime, timedelta
+from uuid import UUID
+from sqlalchemy import tuple_
 
-@router_v2.get("/streams")
-async def get_streams_v2(user_auth: UserAuthModel = Depends(get_user_auth)):
+config_manager = ConfigManager()
 
-    streams = await Stream().find(
-        __order_by=['start_time'],
-        end_time__gtr_eq=datetime.utcnow(),
-        end_time__less=datetime.utcnow() + timedelta(days=8)
-    )
+@router_v2.get("/streams", response_class=SerializedJSONResponse)
+async def get_streams_v2(
+    request: Request,
+    window: Window = Depends(get_window),
+    user_auth: UserAuthModel = Depends(get_user_auth)
+):
+    async def load():
+        now = datetime.utcnow()
+        filters = {
+            'end_time__gtr_eq': max(window.start_from, now) if window.start_from else now,
+        }
+
+        if window.start_to:
+            filters['start_time__less'] = window.start_to
+        else:
+            filters['end_time__less'] = now + timedelta(days=8)
+
+        if window.after:
+            after_time, after_id = window.after
+            try:
+                after_id = UUID(after_id)
+            except ValueError:
+                raise HTTPException(status_code=400, detail="Invalid cursor")
+            filters['__custom_filter'] = tuple_(Stream.start_time, Stream.id) > tuple_(after_time, after_id)
+
+        if window.limit:
+            # One more stream to know if there is a next page
+            filters['__limit'] = window.limit + 1
+
+        streams = await Stream().find(__load=['community'], __order_by=['start_time', 'id'], **filters)
 
-    streams_formatted = []
-    for stream in streams:
-        streams_formatted.append({
-            "id": str(stream.id),
-            "external_id": str(stream.external_id),
-            "name": stream.name,
-            "start_time": stream.start_time.strftime("%Y-%m-%dT%H:%M:%SZ"),
-            "end_time": stream.end_time.strftime("%Y-%m-%dT%H:%M:%SZ") if stream.end_time else None,
-            "community_name": stream.community.name if stream.community else None,
-            "community_url": stream.community.url if stream.community else None,
-            "community_logo": stream.community.logo if stream.community else None,
-            "tags": stream.tags,
-            "status": stream.status,
-        })
-
-    return streams_formatted
+        headers = {}
+        if window.limit and len(streams) > window.limit:
+            streams = streams[:window.limit]
+            headers[NEXT_CURSOR_HEADER] = encode_cursor(streams[-1].start_time, streams[-1].id)
+
+        streams_formatted = []
+        for stream in streams:
+            streams_formatted.append({
+                "id": str(stream.id),
+                "external_id": str(stream.external_id),
+                "name": stream.name,
+                "start_time": stream.start_time.strftime("%Y-%m-%dT%H:%M:%SZ"),
+                "end_time": stream.end_time.strftime("%Y-%m-%dT%H:%M:%SZ") if stream.end_time else None,
+                "community_name": stream.community.name if stream.community else None,
+                "community_url": stream.community.url if stream.community else None,
+                "community_logo": stream.community.logo if stream.community else None,
+                "tags": stream.tags,
+                "status": stream.status,
+            })
+
+        # Kept until the streams change, or until the first of them end as it must then be removed
+        expire = expire_until_end(streams, now)
+
+        return JSONSnapshot(streams_formatted, headers=headers), expire, ["streams"]
+
+    snapshot = await load_cached(
+        request_key_builder(get_streams_v2, namespace="fastapi-cache", request=request),
+        load,
+        stale_while_revalidate=int(config_manager.infrastructure_config.CACHE_STALE_WHILE_REVALIDATE),
+        stale_if_error=int(config_manager.infrastructure_config.CACHE_STALE_IF_ERROR),
+        refresh_context=async_request_session,
+    )
+    return snapshot.response(request)
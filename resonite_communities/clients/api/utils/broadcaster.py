@@ -0,0 +1,154 @@
+import asyncio
+from dataclasses import dataclass, field
+from typing import Optional
+
+from resonite_communities.clients.api.utils.events_index import EventsIndex, EventsPostings, events_index
+from resonite_communities.clients.api.utils.formatter import format_event
+from resonite_communities.models.types import split_tags
+from resonite_communities.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Message sent to a subscriber that may have missed changes, it should reload the events and streams
+RESYNC = {"type": "resync"}
+
+
+@dataclass(eq=False)
+class Subscription:
+    """A connected client and the changes it want to receive.
+
+    The messages are queued until the client read them. A client too slow to read them fill its queue: the queued
+    messages are then dropped and replaced by a single resync message.
+    """
+    communities: Optional[list[str]] = None
+    languages: Optional[list[str]] = None
+    all_visible: bool = False
+    private_communities: Optional[list[str]] = None
+    max_queue_size: int = 100
+    queue: asyncio.Queue = field(init=False)
+    dropped: int = 0
+
+    def __post_init__(self):
+        self.queue = asyncio.Queue(maxsize=self.max_queue_size)
+
+    def send(self, message: dict):
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            self.dropped += self.queue.qsize()
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(RESYNC)
+
+    async def get(self) -> dict:
+        return await self.queue.get()
+
+    def community_ids(self, postings: EventsPostings) -> Optional[set[str]]:
+        return postings.community_ids(self.communities) if self.communities else None
+
+    def can_see(self, event) -> bool:
+        if self.all_visible or not event.is_private:
+            return True
+        return str(event.community_id) in (self.private_communities or [])
+
+    def wants_event(self, event) -> bool:
+        if self.communities and (event.community is None or event.community.name not in self.communities):
+            return False
+        if self.languages:
+            tags = split_tags(event.tags)
+            if not any(f"lang:{language}" in tags for language in self.languages):
+                return False
+        return self.can_see(event)
+
+    def wants_communities(self, postings: EventsPostings, community_ids: Optional[list[str]]) -> bool:
+        wanted = self.community_ids(postings)
+        if wanted is None or community_ids is None:
+            return True
+        return bool(wanted.intersection(community_ids))
+
+
+class Broadcaster:
+    """Fan out the events and streams changes to the subscribers connected to an API worker.
+
+    It's fed by the database changes listener, after the events index so the changed events are read from it.
+    The collectors rewrite all the events at each collect, the modification date of the events already sent is kept
+    to only send the events really changed.
+    """
+
+    def __init__(self, index: EventsIndex, max_queue_size: int = 100):
+        self.index = index
+        self.max_queue_size = max_queue_size
+        self.subscriptions: set[Subscription] = set()
+        self._sent: dict[str, object] = {}
+
+    def _reset_sent(self, postings: EventsPostings):
+        self._sent = {str(event.id): event.updated_at for event in postings.events}
+
+    def subscribe(self, **filters) -> Subscription:
+        if not self.subscriptions:
+            self._reset_sent(self.index.postings)
+        subscription = Subscription(max_queue_size=self.max_queue_size, **filters)
+        if subscription.languages:
+            subscription.languages = [language.strip().lower() for language in subscription.languages]
+        self.subscriptions.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        self.subscriptions.discard(subscription)
+
+    def publish(self, message: dict, subscriptions=None):
+        for subscription in subscriptions if subscriptions is not None else list(self.subscriptions):
+            subscription.send(message)
+
+    def _event_messages(self, postings: EventsPostings, change: dict) -> list[tuple[dict, object]]:
+        """Get the messages of an events change with the event they are about, None for the removed events."""
+        events = {str(event.id): event for event in postings.events}
+        messages = []
+        for id in map(str, change['ids']):
+            event = events.get(id)
+            if event is None:
+                if id in self._sent:
+                    # Cancelled, completed, deleted or no longer visible on the API
+                    del self._sent[id]
+                    messages.append(({"type": "event", "action": "removed", "id": id}, None))
+            elif id not in self._sent or self._sent[id] != event.updated_at:
+                self._sent[id] = event.updated_at
+                messages.append(({"type": "event", "action": "changed", "event": format_event(event, "v2")}, event))
+
+        # The ended events are removed from the index without change, the clients remove them on their own
+        for id in [id for id in self._sent if id not in events]:
+            del self._sent[id]
+
+        return messages
+
+    async def on_change(self, change: dict):
+        """Subscriber of the database changes listener."""
+        if not self.subscriptions:
+            return
+
+        postings = self.index.postings
+        subscriptions = list(self.subscriptions)
+
+        match change.get('table'):
+            case 'event' if change.get('ids') is not None:
+                for message, event in self._event_messages(postings, change):
+                    for subscription in subscriptions:
+                        if event is None:
+                            wanted = subscription.wants_communities(postings, change.get('community_ids'))
+                        else:
+                            wanted = subscription.wants_event(event)
+                        if wanted:
+                            subscription.send(message)
+            case 'stream':
+                message = {"type": "streams", "ids": change.get('ids')}
+                self.publish(message, [
+                    subscription for subscription in subscriptions
+                    if subscription.wants_communities(postings, change.get('community_ids'))
+                ])
+            case _:
+                # Communities changes, too many changes at once or notifications missed
+                self._reset_sent(postings)
+                self.publish(RESYNC, subscriptions)
+
+
+broadcaster = Broadcaster(events_index)
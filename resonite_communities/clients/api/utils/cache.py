@@ -1,40 +1,544 @@
 import asyncio
+import pickle
+import sys
 import time
-from typing import Any, Optional
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from contextlib import nullcontext
+from dataclasses import dataclass
+from typing import Any, AsyncContextManager, Awaitable, Callable, Iterable, Optional
+
 from fastapi import Response, Request
 
-# Global dictionary to store locks per cache key
-_cache_locks = {}
-_locks_lock = asyncio.Lock()
+try:
+    import redis.asyncio as redis
+    from redis.exceptions import RedisError, LockError
+except ImportError:
+    redis = None
+
+from resonite_communities.utils.config import ConfigManager
+from resonite_communities.utils.logger import get_logger
+
+config_manager = ConfigManager()
+
+logger = get_logger(__name__)
+
+
+class CacheBackend(ABC):
+    """Interface of the storages used by the API cache.
+
+    A backend store any picklable value with a TTL and provide a lock per cache key used to prevent cache
+    stampede: only the holder of the lock compute the value, the others wait and read it from the cache.
+
+    Entries can be stored with tags, all the entries having a tag can then be removed at once when the data
+    they were built from change.
+    """
+
+    @abstractmethod
+    async def get(self, cache_key: str) -> Optional[Any]:
+        """Get a value, None when it's missing or expired."""
+
+    @abstractmethod
+    async def set(self, cache_key: str, value: Any, expire: int, tags: Iterable[str] = ()):
+        """Store a value for `expire` seconds, with the tags invalidating it."""
+
+    @abstractmethod
+    async def delete(self, *cache_keys: str):
+        """Remove values."""
+
+    @abstractmethod
+    async def invalidate_tags(self, *tags: str):
+        """Remove all the values stored with any of the tags."""
+
+    @abstractmethod
+    async def lock(self, cache_key: str):
+        """Get the lock to hold while computing the value of a key."""
+
+
+def estimate_size(value: Any) -> int:
+    """Estimate the memory used by a cached value, in bytes.
+
+    Values holding serialized payloads give their size with a `cache_size` attribute, so they are not pickled
+    again only to be measured.
+    """
+    cache_size = getattr(value, "cache_size", None)
+    if isinstance(cache_size, int):
+        return cache_size
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return len(value)
+    if isinstance(value, str):
+        return len(value.encode())
+    try:
+        return len(pickle.dumps(value))
+    except Exception:
+        return sys.getsizeof(value)
+
+
+class LRUCache:
+    """Bounded LRU storage with a TTL per entry.
+
+    The cache is bounded both in number of entries and in bytes, the size of each entry being estimated when
+    it's stored. When a bound is exceeded the least recently used entries are evicted. Expired entries are
+    removed when they are read and by a sweep running at most every `sweep_interval` seconds.
+    """
+
+    def __init__(self, max_entries: int = 1000, max_bytes: int = 64 * 1024 * 1024, sweep_interval: float = 60):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.sweep_interval = sweep_interval
+        self._entries = OrderedDict()
+        self._last_sweep = time.monotonic()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def get(self, key: str) -> Optional[Any]:
+        self.maybe_sweep()
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        value, expires_at, size = entry
+        if time.time() >= expires_at:
+            self._remove(key)
+            self.expirations += 1
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: str, value: Any, expire: float, size: int = None):
+        self.maybe_sweep()
+        if size is None:
+            size = estimate_size(value)
+        if key in self._entries:
+            self._remove(key)
+        if size > self.max_bytes:
+            logger.warning(f"Not caching {key}, its size ({size} bytes) exceed the cache size ({self.max_bytes} bytes)")
+            return
+        self._entries[key] = (value, time.time() + expire, size)
+        self.size += size
+        while len(self._entries) > self.max_entries or self.size > self.max_bytes:
+            self._remove(next(iter(self._entries)))
+            self.evictions += 1
+
+    def delete(self, key: str) -> bool:
+        if key in self._entries:
+            self._remove(key)
+            return True
+        return False
+
+    def _remove(self, key: str):
+        value, expires_at, size = self._entries.pop(key)
+        self.size -= size
+
+    def maybe_sweep(self):
+        if time.monotonic() - self._last_sweep >= self.sweep_interval:
+            self.sweep()
+
+    def sweep(self) -> int:
+        """Remove all the expired entries."""
+        self._last_sweep = time.monotonic()
+        now = time.time()
+        expired = [key for key, (value, expires_at, size) in self._entries.items() if now >= expires_at]
+        for key in expired:
+            self._remove(key)
+        self.expirations += len(expired)
+        return len(expired)
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._entries),
+            "size": self.size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
+
+
+class MemoryCacheBackend(CacheBackend):
+    """In-memory cache, each worker process keep its own copy.
+
+    The locks are only needed while a value is being computed, the ones not in use are garbage collected every
+    sweep interval or as soon as there is as many locks as cache entries allowed.
+    """
+
+    def __init__(self, max_entries: int = 1000, max_bytes: int = 64 * 1024 * 1024, sweep_interval: float = 60):
+        self._locks = {}
+        self._locks_lock = asyncio.Lock()
+        self._last_locks_collect = time.monotonic()
+        self._store = LRUCache(max_entries=max_entries, max_bytes=max_bytes, sweep_interval=sweep_interval)
+        self._tags = {}
+        self.locks_collected = 0
+
+    async def get(self, cache_key: str) -> Optional[Any]:
+        return self._store.get(cache_key)
+
+    async def set(self, cache_key: str, value: Any, expire: int, tags: Iterable[str] = ()):
+        self._store.set(cache_key, value, expire)
+        for tag in tags:
+            self._tags.setdefault(tag, set()).add(cache_key)
+
+    async def delete(self, *cache_keys: str):
+        for cache_key in cache_keys:
+            self._store.delete(cache_key)
+
+    async def invalidate_tags(self, *tags: str):
+        for tag in tags:
+            for cache_key in self._tags.pop(tag, set()):
+                self._store.delete(cache_key)
+
+    async def lock(self, cache_key: str) -> asyncio.Lock:
+        async with self._locks_lock:
+            if (
+                len(self._locks) >= self._store.max_entries or
+                time.monotonic() - self._last_locks_collect >= self._store.sweep_interval
+            ):
+                self.collect_locks()
+            if cache_key not in self._locks:
+                self._locks[cache_key] = asyncio.Lock()
+            return self._locks[cache_key]
+
+    @staticmethod
+    def _lock_in_use(lock: asyncio.Lock) -> bool:
+        # A released lock still has to be taken by its waiters, another lock for the same key would let a new
+        # coroutine compute the value at the same time
+        return lock.locked() or bool(getattr(lock, "_waiters", None))
+
+    def collect_locks(self) -> int:
+        """Remove the locks not currently held nor waited for, and the tagged keys no longer in the cache."""
+        self._last_locks_collect = time.monotonic()
+        unused = [cache_key for cache_key, lock in self._locks.items() if not self._lock_in_use(lock)]
+        for cache_key in unused:
+            del self._locks[cache_key]
+        self.locks_collected += len(unused)
+
+        for tag in list(self._tags):
+            self._tags[tag] = {cache_key for cache_key in self._tags[tag] if cache_key in self._store}
+            if not self._tags[tag]:
+                del self._tags[tag]
+
+        return len(unused)
+
+    def stats(self) -> dict:
+        return {
+            **self._store.stats(),
+            "locks": len(self._locks),
+            "locks_collected": self.locks_collected,
+        }
+
+
+class SharedLock:
+    """Cross-process single-flight lock.
+
+    The coroutines of the same worker first wait on a local lock so that only one of them poll Redis. The
+    Redis lock is taken with a timeout, a worker crashing while holding it can't block the other workers
+    forever. If the lock can't be taken in time, or Redis is unavailable, the caller continue without the
+    cross-process guarantee rather than failing the request.
+    """
 
-# In-memory cache storage with TTL
-_cache_store = {}
-_cache_ttl = {}
+    def __init__(self, local_lock: asyncio.Lock, redis_lock):
+        self.local_lock = local_lock
+        self.redis_lock = redis_lock
+        self._acquired = False
 
-async def get_cache_lock(cache_key: str) -> asyncio.Lock:
+    async def __aenter__(self):
+        await self.local_lock.acquire()
+        try:
+            self._acquired = await self.redis_lock.acquire()
+        except (RedisError, LockError) as e:
+            logger.warning(f"Can't acquire shared cache lock {self.redis_lock.name}: {e}")
+            self._acquired = False
+        return self
+
+    async def __aexit__(self, *exc_info):
+        try:
+            if self._acquired:
+                await self.redis_lock.release()
+        except (RedisError, LockError) as e:
+            logger.warning(f"Can't release shared cache lock {self.redis_lock.name}: {e}")
+        finally:
+            self._acquired = False
+            self.local_lock.release()
+
+
+class RedisCacheBackend(CacheBackend):
+    """Cache shared by all the workers through a Redis server.
+
+    Values are pickled, Redis handle the expiration. Errors from Redis are logged and handled as cache misses
+    so the API keep working, with the database as fallback, when the cache server is unavailable.
+    """
+
+    def __init__(
+        self,
+        url: str = None,
+        client = None,
+        lock_timeout: float = 30,
+        lock_blocking_timeout: float = 30,
+        lock_poll_interval: float = 0.05,
+    ):
+        if client is None:
+            if redis is None:
+                raise RuntimeError("The redis package is required to use a shared cache.")
+            client = redis.from_url(url)
+        self.client = client
+        self.lock_timeout = lock_timeout
+        self.lock_blocking_timeout = lock_blocking_timeout
+        self.lock_poll_interval = lock_poll_interval
+        self._local_backend = MemoryCacheBackend()
+
+    async def get(self, cache_key: str) -> Optional[Any]:
+        try:
+            value = await self.client.get(cache_key)
+        except RedisError as e:
+            logger.warning(f"Can't read cache key {cache_key}: {e}")
+            return None
+        if value is None:
+            return None
+        try:
+            return pickle.loads(value)
+        except Exception as e:
+            # Written by another version of the code, for example a class changed between two deployments
+            logger.warning(f"Can't unpickle cache key {cache_key}, removing it: {e}")
+            await self.delete(cache_key)
+            return None
+
+    async def set(self, cache_key: str, value: Any, expire: int, tags: Iterable[str] = ()):
+        try:
+            if not tags:
+                await self.client.set(cache_key, pickle.dumps(value), ex=expire)
+                return
+            async with self.client.pipeline(transaction=False) as pipe:
+                pipe.set(cache_key, pickle.dumps(value), ex=expire)
+                for tag in tags:
+                    pipe.sadd(f"tag:{tag}", cache_key)
+                    # Keep the tag as long as its longest lived entry, never shorten it
+                    pipe.expire(f"tag:{tag}", expire, gt=True)
+                    pipe.expire(f"tag:{tag}", expire, nx=True)
+                await pipe.execute()
+        except RedisError as e:
+            logger.warning(f"Can't write cache key {cache_key}: {e}")
+
+    async def delete(self, *cache_keys: str):
+        if not cache_keys:
+            return
+        try:
+            await self.client.delete(*cache_keys)
+        except RedisError as e:
+            logger.warning(f"Can't delete cache keys {cache_keys}: {e}")
+
+    async def invalidate_tags(self, *tags: str):
+        if not tags:
+            return
+        try:
+            for tag in tags:
+                cache_keys = await self.client.smembers(f"tag:{tag}")
+                await self.client.delete(f"tag:{tag}", *cache_keys)
+        except RedisError as e:
+            logger.warning(f"Can't invalidate cache tags {tags}: {e}")
+
+    async def lock(self, cache_key: str) -> SharedLock:
+        return SharedLock(
+            await self._local_backend.lock(cache_key),
+            self.client.lock(
+                f"lock:{cache_key}",
+                timeout=self.lock_timeout,
+                sleep=self.lock_poll_interval,
+                blocking_timeout=self.lock_blocking_timeout,
+            ),
+        )
+
+
+_cache_backend: Optional[CacheBackend] = None
+
+def get_cache_backend() -> CacheBackend:
+    """Get the cache backend of the worker, shared through Redis when `CACHE_URL` is configured."""
+    global _cache_backend
+    if _cache_backend is None:
+        cache_url = config_manager.infrastructure_config.get('CACHE_URL')
+        if cache_url and redis is not None:
+            logger.info("Using Redis as shared cache backend")
+            _cache_backend = RedisCacheBackend(cache_url)
+        else:
+            if cache_url:
+                logger.warning("CACHE_URL is configured but the redis package is not installed, using in-memory cache")
+            _cache_backend = MemoryCacheBackend(
+                max_entries=int(config_manager.infrastructure_config.CACHE_MAX_ENTRIES),
+                max_bytes=int(config_manager.infrastructure_config.CACHE_MAX_BYTES),
+            )
+    return _cache_backend
+
+def set_cache_backend(cache_backend: Optional[CacheBackend]):
+    """Replace the cache backend of the worker, mainly useful for tests."""
+    global _cache_backend
+    _cache_backend = cache_backend
+
+async def get_cache_lock(cache_key: str):
     """Get or create a lock for a specific cache key to prevent cache stampede."""
-    async with _locks_lock:
-        if cache_key not in _cache_locks:
-            _cache_locks[cache_key] = asyncio.Lock()
-        return _cache_locks[cache_key]
+    return await get_cache_backend().lock(cache_key)
 
 async def get_cached(cache_key: str) -> Optional[Any]:
-    """Get a value from the in-memory cache if it exists and hasn't expired."""
-    if cache_key in _cache_store:
-        # Check if the cache entry has expired
-        if cache_key in _cache_ttl:
-            if time.time() < _cache_ttl[cache_key]:
-                return _cache_store[cache_key]
-            else:
-                # Expired, remove it
-                del _cache_store[cache_key]
-                del _cache_ttl[cache_key]
-    return None
-
-async def set_cached(cache_key: str, value: Any, expire: int = 300):
-    """Store a value in the in-memory cache with TTL (in seconds)."""
-    _cache_store[cache_key] = value
-    _cache_ttl[cache_key] = time.time() + expire
+    """Get a value from the cache if it exists and hasn't expired."""
+    return await get_cache_backend().get(cache_key)
+
+async def set_cached(cache_key: str, value: Any, expire: int = 300, tags: Iterable[str] = ()):
+    """Store a value in the cache with TTL (in seconds)."""
+    await get_cache_backend().set(cache_key, value, expire, tags)
+
+async def delete_cached(*cache_keys: str):
+    """Remove values from the cache."""
+    await get_cache_backend().delete(*cache_keys)
+
+_invalidations_count = 0
+
+def get_invalidations_count() -> int:
+    """Number of invalidations received by the worker.
+
+    Compare it before and after loading a value: if it changed, the data may have been modified during the load
+    and the value should not be cached.
+    """
+    return _invalidations_count
+
+async def invalidate_cached(*tags: str):
+    """Remove all the values stored with any of the tags."""
+    global _invalidations_count
+    _invalidations_count += 1
+    await get_cache_backend().invalidate_tags(*tags)
+
+def community_tag(namespace: str, community_id: Any) -> str:
+    return f"{namespace}:community:{community_id}"
+
+def changes_tags(change: dict) -> list[str]:
+    """Get the cache tags to invalidate for a change notification sent by the database writes.
+
+    - `events` is set on all the entries built from events, `events:all` on the ones not filtered per community
+      and `events:community:<id>` on the ones filtered on the community.
+    - `streams` and `communities` are set on the entries built from streams and communities.
+    """
+    match change.get('table'):
+        case 'event':
+            if not change.get('community_ids'):
+                return ['events']
+            return ['events:all'] + [community_tag('events', community_id) for community_id in change['community_ids']]
+        case 'stream':
+            return ['streams']
+        case 'community':
+            # Communities names, visibility and status are part of the events and streams responses
+            return ['events', 'streams', 'communities']
+        case _:
+            return ['events', 'streams', 'communities']
+
+async def invalidate_changes(change: dict):
+    """Subscriber of the database changes listener."""
+    await invalidate_cached(*changes_tags(change))
+
+@dataclass
+class CacheEntry:
+    """A cached value and the time until which it's fresh.
+
+    The entry is kept in the cache after this time to be served stale while it's refreshed, or when it can't be.
+    """
+    value: Any
+    fresh_until: float
+
+    def staleness(self) -> float:
+        """Number of seconds since the entry expired, negative while it's fresh."""
+        return time.time() - self.fresh_until
+
+    @property
+    def cache_size(self) -> int:
+        return estimate_size(self.value)
+
+Loader = Callable[[], Awaitable[tuple[Any, int, Iterable[str]]]]
+
+_refreshes: dict[str, asyncio.Task] = {}
+
+async def _load(cache_key: str, loader: Loader, max_stale: int) -> Any:
+    # Changes notified while the loader run may not be part of the value, don't cache it in this case
+    invalidations_count = get_invalidations_count()
+    value, expire, tags = await loader()
+    if invalidations_count == get_invalidations_count():
+        await set_cached(cache_key, CacheEntry(value, time.time() + expire), expire=expire + max_stale, tags=tags)
+    return value
+
+async def _refresh(
+    cache_key: str,
+    loader: Loader,
+    max_stale: int,
+    refresh_context: Optional[Callable[[], AsyncContextManager]],
+):
+    try:
+        async with await get_cache_lock(cache_key):
+            entry = await get_cached(cache_key)
+            if isinstance(entry, CacheEntry) and entry.staleness() <= 0:
+                return
+            async with (refresh_context or nullcontext)():
+                await _load(cache_key, loader, max_stale)
+    except Exception as e:
+        logger.warning(f"Can't refresh cache key {cache_key}, serving stale value: {e}")
+
+def _schedule_refresh(cache_key: str, *args):
+    if cache_key in _refreshes:
+        return
+    task = asyncio.create_task(_refresh(cache_key, *args))
+    _refreshes[cache_key] = task
+    task.add_done_callback(lambda _: _refreshes.pop(cache_key, None))
+
+async def load_cached(
+    cache_key: str,
+    loader: Loader,
+    stale_while_revalidate: int = 0,
+    stale_if_error: int = 0,
+    refresh_context: Optional[Callable[[], AsyncContextManager]] = None,
+) -> Any:
+    """Get a value from the cache, or load it with only one loader running per key.
+
+    The loader return the value, its TTL (in seconds) and its tags.
+
+    An expired value is still served for `stale_while_revalidate` seconds while a background task refresh it, the
+    requests then don't wait for the loader. It is also served for `stale_if_error` seconds when the loader fail.
+    The background task run in `refresh_context`, as the request it started from may be over before it end.
+    """
+    max_stale = max(stale_while_revalidate, stale_if_error)
+
+    # Fast path
+    entry = await get_cached(cache_key)
+    if isinstance(entry, CacheEntry):
+        staleness = entry.staleness()
+        if staleness <= 0:
+            return entry.value
+        if staleness <= stale_while_revalidate:
+            _schedule_refresh(cache_key, loader, max_stale, refresh_context)
+            return entry.value
+
+    # Get lock for this cache key to prevent stampede
+    lock = await get_cache_lock(cache_key)
+
+    async with lock:
+        # Double-check cache after acquiring lock (another request might have populated it)
+        entry = await get_cached(cache_key)
+        if not isinstance(entry, CacheEntry):
+            entry = None
+        elif entry.staleness() <= 0:
+            return entry.value
+
+        try:
+            return await _load(cache_key, loader, max_stale)
+        except Exception as e:
+            if entry is not None and entry.staleness() <= stale_if_error:
+                logger.warning(f"Can't load cache key {cache_key}, serving stale value: {e}")
+                return entry.value
+            raise
 
 def request_key_builder(
     func,
@@ -93,6 +597,8 @@ def filtered_events_key_builder(
     communities: str = None,
     languages: str = None,
     user_auth = None,
+    tags: str = None,
+    window = None,
     **kwargs,
 ):
     """Cache key builder for get_filtered_events function based on filter parameters."""
@@ -105,6 +611,12 @@ def filtered_events_key_builder(
         languages.replace(',', '_') or "all",
     ]
 
+    if tags:
+        key_parts.append(f"tags:{','.join(sorted(set(tag.strip().lower() for tag in tags.split(','))))}")
+
+    if window:
+        key_parts.append(f"window:{window.cache_key()}")
+
     # Add user-specific cache key components
     if user_auth:
         if user_auth.is_superuser:
@@ -0,0 +1,85 @@
+import gzip
+from typing import Iterable, Optional
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+IDENTITY = "identity"
+
+# Payloads smaller than this are only sent uncompressed, the compression would barely reduce them
+MIN_COMPRESS_SIZE = 1024
+
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 6
+
+# Encodings sent when the client accept several of them with the same preference
+PREFERRED_ENCODINGS = ("br", "gzip")
+
+
+def compress(payload: bytes) -> dict[str, bytes]:
+    """Get the payload and its compressed variants, by content coding.
+
+    The variants are built once with the payload so sending them cost nothing more than sending the payload. The
+    brotli variant is only built when the brotli package is installed.
+    """
+    variants = {IDENTITY: payload}
+    if len(payload) < MIN_COMPRESS_SIZE:
+        return variants
+    # Without mtime the gzip variant is the same for the same payload, on every worker
+    variants["gzip"] = gzip.compress(payload, compresslevel=GZIP_LEVEL, mtime=0)
+    if brotli is not None:
+        variants["br"] = brotli.compress(payload, quality=BROTLI_QUALITY)
+    return variants
+
+
+def parse_accept_encoding(accept_encoding: str) -> dict[str, float]:
+    """Get the quality value of each content coding of an Accept-Encoding header."""
+    qvalues = {}
+    for item in accept_encoding.split(","):
+        coding, *params = [part.strip() for part in item.split(";")]
+        if not coding:
+            continue
+        qvalue = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    qvalue = float(value)
+                except ValueError:
+                    qvalue = 0.0
+        qvalues[coding.lower()] = qvalue
+    return qvalues
+
+
+def negotiate_encoding(accept_encoding: Optional[str], available: Iterable[str]) -> str:
+    """Choose the content coding of a response among the available ones, as described in RFC 9110.
+
+    The compressed encodings are preferred to identity unless identity is explicitly given a higher quality value.
+    Identity is returned when no available encoding is acceptable.
+    """
+    if not accept_encoding:
+        return IDENTITY
+
+    qvalues = parse_accept_encoding(accept_encoding)
+    default = qvalues.get("*", 0.0)
+    candidates = [
+        (qvalues.get(encoding, default), -PREFERRED_ENCODINGS.index(encoding), encoding)
+        for encoding in PREFERRED_ENCODINGS
+        if encoding in available
+    ]
+    candidates = [candidate for candidate in candidates if candidate[0] > 0]
+    if not candidates:
+        return IDENTITY
+
+    qvalue, _, encoding = max(candidates)
+    identity_qvalue = qvalues.get(IDENTITY, default)
+    return encoding if qvalue >= identity_qvalue else IDENTITY
+
+
+def encoded_etag(etag: str, encoding: str) -> str:
+    """Get the ETag of an encoded variant, each variant is a different representation with its own ETag."""
+    if encoding == IDENTITY:
+        return etag
+    return f'{etag[:-1]}-{encoding}"'
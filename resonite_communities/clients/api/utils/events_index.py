@@ -0,0 +1,286 @@
+import asyncio
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Awaitable, Callable, Iterable, Optional
+
+from sqlalchemy import and_, func, or_, select
+from sqlalchemy.orm import selectinload
+
+from resonite_communities.models.signal import Event, EventStatus
+from resonite_communities.models.community import Community
+from resonite_communities.models.types import split_tags
+from resonite_communities.utils.db import get_async_session
+from resonite_communities.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+def iter_bits(bitset: int) -> Iterable[int]:
+    """Iterate over the positions of the set bits, in increasing order."""
+    while bitset:
+        lowest = bitset & -bitset
+        yield lowest.bit_length() - 1
+        bitset ^= lowest
+
+
+@dataclass(frozen=True)
+class EventsPostings:
+    """Events sorted by start time and their posting lists.
+
+    Each posting list is a bitset of the positions of the events in `events`, filters are answered by combining
+    them with bitwise operations. `keys` are the (start_time, id) positions of the events, used for the time
+    windows and the cursors.
+    """
+    events: list = field(default_factory=list)
+    keys: list[tuple[datetime, str]] = field(default_factory=list)
+    all: int = 0
+    public: int = 0
+    by_community_id: dict[str, int] = field(default_factory=dict)
+    by_community_name: dict[str, int] = field(default_factory=dict)
+    by_tag: dict[str, int] = field(default_factory=dict)
+    community_ids_by_name: dict[str, set[str]] = field(default_factory=dict)
+
+    @classmethod
+    def build(cls, events: Iterable[Event], communities: Iterable[tuple] = ()) -> 'EventsPostings':
+        """Build the postings of the events, `communities` are the ids and names of the enabled communities."""
+        community_ids_by_name = {}
+        for community_id, name in communities:
+            community_ids_by_name.setdefault(name, set()).add(str(community_id))
+
+        events = sorted(events, key=lambda event: (event.start_time, str(event.id)))
+        public = 0
+        by_community_id = {}
+        by_community_name = {}
+        by_tag = {}
+        for position, event in enumerate(events):
+            bit = 1 << position
+            if not event.is_private:
+                public |= bit
+            community_id = str(event.community_id)
+            by_community_id[community_id] = by_community_id.get(community_id, 0) | bit
+            if event.community is not None:
+                name = event.community.name
+                by_community_name[name] = by_community_name.get(name, 0) | bit
+            # Same normalization as the tag_list column
+            for tag in split_tags(event.tags):
+                by_tag[tag] = by_tag.get(tag, 0) | bit
+        return cls(
+            events=events,
+            keys=[(event.start_time.replace(tzinfo=None), str(event.id)) for event in events],
+            all=(1 << len(events)) - 1,
+            public=public,
+            by_community_id=by_community_id,
+            by_community_name=by_community_name,
+            by_tag=by_tag,
+            community_ids_by_name=community_ids_by_name,
+        )
+
+    def community_ids(self, names: Iterable[str]) -> set[str]:
+        return set().union(*[self.community_ids_by_name.get(name, set()) for name in names])
+
+    @staticmethod
+    def union(postings: dict[str, int], keys: Iterable[str]) -> int:
+        bitset = 0
+        for key in keys:
+            bitset |= postings.get(key, 0)
+        return bitset
+
+    def query(
+        self,
+        communities: Optional[list[str]] = None,
+        languages: Optional[list[str]] = None,
+        tags: Optional[list[str]] = None,
+        all_visible: bool = False,
+        private_communities: Optional[list[str]] = None,
+        now: Optional[datetime] = None,
+        start_from: Optional[datetime] = None,
+        start_to: Optional[datetime] = None,
+        after: Optional[tuple[datetime, str]] = None,
+        limit: Optional[int] = None,
+    ) -> list[Event]:
+        """Get the upcoming events, ordered by start time, matching the filters.
+
+        The events must be in one of the `communities`, in one of the `languages` and have all the `tags`. Without
+        `all_visible` only the public events and the private events of `private_communities` are returned.
+
+        The events must not be ended at `start_from` (or now if later), must start before `start_to` and be after the
+        `after` (start_time, id) position. At most `limit` events are returned.
+        """
+        bitset = self.all
+        if communities:
+            bitset &= self.union(self.by_community_name, communities)
+        if languages:
+            bitset &= self.union(self.by_tag, [f"lang:{language.strip().lower()}" for language in languages])
+        for tag in tags or []:
+            bitset &= self.by_tag.get(tag, 0)
+        if not all_visible:
+            bitset &= self.public | self.union(self.by_community_id, private_communities or [])
+
+        if after:
+            bitset &= ~((1 << bisect_right(self.keys, after)) - 1)
+        if start_to:
+            bitset &= (1 << bisect_left(self.keys, (start_to,))) - 1
+
+        # The events ended since they were indexed are only removed at the next load
+        now = now or datetime.utcnow()
+        if start_from and start_from > now:
+            now = start_from
+
+        events = []
+        for position in iter_bits(bitset):
+            if limit is not None and len(events) >= limit:
+                break
+            event = self.events[position]
+            if (event.end_time or event.start_time).replace(tzinfo=None) >= now:
+                events.append(event)
+        return events
+
+
+class EventsIndex:
+    """In-memory index of the upcoming events of an API worker.
+
+    The upcoming ACTIVE and READY Resonite events of the enabled communities are loaded once and kept up to date
+    from the database change notifications: only the changed events are reloaded. Any combination of filters is
+    then answered from memory, without a database query on the request path.
+
+    The notifications sent while the changes listener is disconnected are lost, and a dropped connection may not
+    be noticed right away. The index is also polled, see `start_polling`, so it's never stale for long.
+    """
+
+    def __init__(self):
+        self.postings = EventsPostings()
+        self.loads = 0
+        self._events: dict[str, Event] = {}
+        self._communities: list[tuple] = []
+        self._version = None
+        self._loaded = asyncio.Event()
+        self._lock = asyncio.Lock()
+        self._task = None
+        self._poll_task = None
+
+    @staticmethod
+    def upcoming_filter(now: datetime):
+        return and_(
+            Event.community.has(Community.enabled == True),
+            Event.is_resonite == True,
+            Event.is_vrchat == False,
+            Event.status.in_((EventStatus.ACTIVE, EventStatus.READY)),
+            or_(
+                and_(Event.end_time.isnot(None), Event.end_time >= now),
+                and_(Event.end_time.is_(None), Event.start_time >= now)
+            ),
+        )
+
+    async def _fetch(self, *filters) -> list[Event]:
+        # The index outlive the requests, use its own session
+        async with get_async_session() as session:
+            result = await session.execute(
+                select(Event)
+                .options(selectinload(Event.community))
+                .where(self.upcoming_filter(datetime.utcnow()), *filters)
+            )
+            return list(result.scalars().all())
+
+    async def _fetch_communities(self) -> list[tuple]:
+        async with get_async_session() as session:
+            result = await session.execute(select(Community.id, Community.name).where(Community.enabled == True))
+            return [tuple(row) for row in result.all()]
+
+    async def _fetch_version(self) -> tuple:
+        """Latest modification date and row count of the events and of the communities, changing with any write."""
+        async with get_async_session() as session:
+            events = await session.execute(select(func.max(Event.updated_at), func.count(Event.id)))
+            communities = await session.execute(select(func.max(Community.updated_at), func.count(Community.id)))
+            return (*events.one(), *communities.one())
+
+    def _publish(self):
+        self.postings = EventsPostings.build(self._events.values(), self._communities)
+        self.loads += 1
+
+    async def load(self):
+        """Load all the upcoming events."""
+        async with self._lock:
+            # Read first, a change made during the load is then seen by the next check
+            self._version = await self._fetch_version()
+            self._events = {str(event.id): event for event in await self._fetch()}
+            self._communities = await self._fetch_communities()
+            self._publish()
+            self._loaded.set()
+            logger.info(f"Loaded {len(self._events)} upcoming events in the index")
+
+    async def reload_events(self, ids: list[str]):
+        """Reload the changed events, the ones no longer upcoming are removed."""
+        async with self._lock:
+            # The notified changes are not missed ones
+            self._version = await self._fetch_version()
+            events = await self._fetch(Event.id.in_(ids))
+            for id in ids:
+                self._events.pop(str(id), None)
+            for event in events:
+                self._events[str(event.id)] = event
+            self._publish()
+
+    async def apply_change(self, change: dict):
+        """Subscriber of the database changes listener."""
+        if change.get('table') == 'stream':
+            return
+        if change.get('table') == 'event' and change.get('ids') is not None:
+            await self.reload_events(change['ids'])
+        else:
+            # Communities changes affect the name and visibility of all their events
+            await self.load()
+
+    def start(self):
+        """Start loading the index in the background, or retry if the previous load failed."""
+        if self._task is None or (self._task.done() and not self._loaded.is_set()):
+            self._task = asyncio.create_task(self.load())
+            self._task.add_done_callback(self._log_load_error)
+
+    async def is_stale(self) -> bool:
+        """Check if the events or the communities changed since they were last loaded, changes were then missed."""
+        return await self._fetch_version() != self._version
+
+    async def _poll(self, interval: float, on_stale: Callable[[], Awaitable[None]]):
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                if not self._loaded.is_set():
+                    self.start()
+                elif await self.is_stale():
+                    logger.warning("Changes missed by the events index, reloading it")
+                    await on_stale()
+            except Exception as e:
+                logger.error(f"Can't check the events index: {e}")
+
+    def start_polling(self, interval: float, on_stale: Callable[[], Awaitable[None]] = None):
+        """Check the index every `interval` seconds, bounding its staleness when notifications are lost.
+
+        `on_stale` is called when changes were missed, the index is reloaded by default.
+        """
+        if self._poll_task is None:
+            self._poll_task = asyncio.create_task(self._poll(interval, on_stale or self.load))
+
+    async def stop_polling(self):
+        if self._poll_task is not None:
+            self._poll_task.cancel()
+            try:
+                await self._poll_task
+            except asyncio.CancelledError:
+                pass
+            self._poll_task = None
+
+    @staticmethod
+    def _log_load_error(task: asyncio.Task):
+        if not task.cancelled() and task.exception() is not None:
+            logger.error(f"Can't load the events index: {task.exception()}")
+
+    async def get_postings(self) -> EventsPostings:
+        """Get the current postings, waiting for the first load if needed."""
+        if not self._loaded.is_set():
+            self.start()
+            await asyncio.shield(self._task)
+        return self.postings
+
+
+events_index = EventsIndex()
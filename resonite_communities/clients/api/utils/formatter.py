@@ -1,16 +1,31 @@
 import json
-from datetime import datetime
+import hashlib
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from uuid import UUID
+from email.utils import format_datetime, parsedate_to_datetime
 from dacite.types import is_instance
-from fastapi import Depends, Response, HTTPException
-from sqlalchemy import and_, not_, case, or_
-from resonite_communities.models.signal import Event, EventStatus
+from fastapi import Depends, Request, Response, HTTPException
+from sqlalchemy import and_, not_, case, or_, func, literal, null, select, tuple_, union_all
+from resonite_communities.models.signal import Event, EventStatus, Stream
 from resonite_communities.models.community import Community
+from resonite_communities.models.types import split_tags
 
 from resonite_communities.utils.config import ConfigManager
+from resonite_communities.utils.db import async_request_session, get_current_async_session
 
 from resonite_communities.utils.tools import is_local_env
 from resonite_communities.clients.utils.auth import UserAuthModel
-from resonite_communities.clients.api.utils.cache import filtered_events_key_builder, get_cache_lock, get_cached, set_cached
+from resonite_communities.clients.api.utils.cache import (
+    authenticated_request_key_builder,
+    community_tag,
+    filtered_events_key_builder,
+    load_cached,
+)
+from resonite_communities.clients.api.utils.events_index import events_index
+from resonite_communities.clients.api.utils.pagination import NEXT_CURSOR_HEADER, Window, decode_cursor, encode_cursor
+from resonite_communities.clients.api.utils.compression import IDENTITY, compress, encoded_etag, negotiate_encoding
+from resonite_communities.clients.api.utils.serializer import dumps
 
 
 config_manager = ConfigManager()
@@ -38,37 +53,42 @@ def clean_text(text):
         text = ''
     return text
 
-def text_dumps(events, version):
-    """ Convert the Python Dictionary to a text string. """
+def text_fragment(event, version):
+    """ Convert one Python Dictionary to its row of the text string. """
 
     if version not in separators:
         raise ValueError("Unsupported version.")
     field_separator = separators[version]['field']
-    object_separator = separators[version]['object']
 
-    formatted_items = []
-    for event in events:
-        formatted_event_values = []
-        for event_key, event_value in event.items():
+    formatted_event_values = []
+    for event_key, event_value in event.items():
 
-            # Convert list to a more usable text format
-            if isinstance(event_value, list):
-                event_value = ",".join(map(str, event_value))
+        # Convert list to a more usable text format
+        if isinstance(event_value, list):
+            event_value = ",".join(map(str, event_value))
 
-            # Dict are not supported in TEXT format, silently pass to the next
-            elif is_instance(event_value, dict):
-                continue
+        # Dict are not supported in TEXT format, silently pass to the next
+        elif is_instance(event_value, dict):
+            continue
 
-            # Clean some event key of non wanted chars for the v1
-            elif event_key in ['description'] and version == "v1":
-                event_value = clean_text(event_value)
+        # Clean some event key of non wanted chars for the v1
+        elif event_key in ['description'] and version == "v1":
+            event_value = clean_text(event_value)
 
-            # By default we convert anything else to string
-            else:
-                event_value = str(event_value)
-            formatted_event_values.append(event_value)
-        formatted_items.append(field_separator.join(formatted_event_values))
-    return object_separator.join(formatted_items)
+        # By default we convert anything else to string
+        else:
+            event_value = str(event_value)
+        formatted_event_values.append(event_value)
+    return field_separator.join(formatted_event_values)
+
+def text_dumps(events, version):
+    """ Convert the Python Dictionary to a text string. """
+
+    if version not in separators:
+        raise ValueError("Unsupported version.")
+    object_separator = separators[version]['object']
+
+    return object_separator.join(text_fragment(event, version) for event in events)
 
 class JSONEncoder(json.JSONEncoder):
     def default(self, obj):
@@ -76,6 +96,120 @@ class JSONEncoder(json.JSONEncoder):
             return obj.isoformat()
         return super().default(obj)
 
+def serialize_row(event: dict, version: str, format_type: FormatType) -> bytes:
+    """ Serialize one formatted event to its row of the payload of the format. """
+    if format_type == FormatType.TEXT:
+        return text_fragment(event, version).encode()
+    return dumps(event)
+
+def join_rows(rows: list[bytes], version: str, format_type: FormatType) -> bytes:
+    """ Assemble the serialized rows of the events to the payload of the format. """
+    if format_type == FormatType.TEXT:
+        if version not in separators:
+            raise ValueError("Unsupported version.")
+        return separators[version]['object'].encode().join(rows)
+    return b"[" + b",".join(rows) + b"]"
+
+class EventsSnapshot:
+    """ Ready to send payloads of a filtered events result.
+
+    Every format is serialized and compressed once when the snapshot is built, requests hitting the same cache
+    entry then only send the stored bytes. The payloads are assembled from the serialized `rows` of each format when
+    given, else from the formatted `events`.
+
+    The ETag is the hash of the JSON payload, the other formats being rendered from the same events, and of the
+    next page cursor. `last_modified` is the most recent modification date of the events, given by the caller.
+    """
+
+    def __init__(
+        self,
+        events: list[dict] | None,
+        version: str,
+        last_modified: datetime = None,
+        next_cursor: str = None,
+        rows: dict[FormatType, list[bytes]] = None,
+    ):
+        if rows is None:
+            rows = {
+                format_type: [serialize_row(event, version, format_type) for event in events]
+                for format_type in FormatType
+            }
+        self._events = events
+        self.version = version
+        self.next_cursor = next_cursor
+        self.last_modified = last_modified.astimezone(timezone.utc).replace(microsecond=0) if last_modified else None
+        payloads = {format_type: join_rows(rows[format_type], version, format_type) for format_type in FormatType}
+        self.payloads = {format_type: compress(payload) for format_type, payload in payloads.items()}
+        # Size in the cache, the formatted events are not kept when built from the serialized rows
+        self.cache_size = sum(len(payload) for variants in self.payloads.values() for payload in variants.values())
+        if events is not None:
+            self.cache_size += len(self.payload(FormatType.JSON))
+
+        fingerprint = hashlib.sha256(f"{version}:{next_cursor or ''}:".encode())
+        fingerprint.update(payloads[FormatType.JSON])
+        self.fingerprint = fingerprint.hexdigest()[:32]
+
+    @property
+    def events(self) -> list[dict]:
+        if self._events is None:
+            self._events = json.loads(self.payload(FormatType.JSON))
+        return self._events
+
+    def variants(self, format_type: FormatType) -> dict[str, bytes]:
+        if format_type not in self.payloads:
+            raise HTTPException(status_code=400, detail="Unsupported format")
+        return self.payloads[format_type]
+
+    def payload(self, format_type: FormatType, encoding: str = IDENTITY) -> bytes:
+        return self.variants(format_type)[encoding]
+
+    def etag(self, format_type: FormatType) -> str:
+        return f'"{self.fingerprint}-{format_type.value.lower()}"'
+
+class JSONSnapshot:
+    """ Ready to send JSON payload and its compressed variants, see `EventsSnapshot`.
+
+    The ETag is the hash of the payload, `headers` are sent with the payload.
+    """
+
+    def __init__(self, content, headers: dict[str, str] = None):
+        payload = dumps(content)
+        self.variants = compress(payload)
+        self.cache_size = sum(len(variant) for variant in self.variants.values())
+        self.headers = headers or {}
+        self.fingerprint = hashlib.sha256(payload).hexdigest()[:32]
+
+    def etag(self) -> str:
+        return f'"{self.fingerprint}"'
+
+    def response(self, request: Request) -> Response:
+        return send_payload(request, self.variants, "application/json", self.etag(), headers=self.headers)
+
+def is_not_modified(request: Request, etag: str, last_modified: datetime | None) -> bool:
+    """ Evaluate the conditional headers of a request against the validators of a representation.
+
+    As described in RFC 9110, `If-None-Match` takes precedence over `If-Modified-Since` when both are sent.
+    """
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        if if_none_match.strip() == "*":
+            return True
+        # Weak comparison, W/"xxx" match "xxx"
+        candidates = [candidate.strip().removeprefix("W/") for candidate in if_none_match.split(",")]
+        return etag.removeprefix("W/") in candidates
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since is not None and last_modified is not None:
+        try:
+            if_modified_since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        if if_modified_since.tzinfo is None:
+            if_modified_since = if_modified_since.replace(tzinfo=timezone.utc)
+        return last_modified <= if_modified_since
+
+    return False
+
 def set_default_format(
     version: str = "v1",
     format_type: FormatType | None = None,
@@ -91,6 +225,352 @@ def set_default_format(
 
     return format_type
 
+def format_event(signal: Event, version: str) -> dict:
+    """ Format an event for the given version of the API. """
+    if version == "v1":
+        return {
+            "name": signal.name,
+            #"description": signal.custom_description if signal.custom_description else signal.default_description,
+            "description": signal.description,
+            "location_str": signal.location,
+            "start_time": signal.start_time.strftime("%Y/%m/%d %H:%M:%S+00:00"),
+            "end_time": signal.end_time.strftime("%Y/%m/%d %H:%M:%S+00:00") if signal.end_time else None,
+            "community_name": signal.community.name, # TODO: Connect this to a session
+        }
+    elif version == "v2":
+        return {
+            "id": str(signal.id),
+            "external_id": str(signal.external_id),
+            "name": signal.name,
+            #"description": signal.custom_description if signal.custom_description else signal.default_description,
+            "description": signal.description,
+            "session_image": signal.session_image,
+            "location_str": signal.location,
+            "location_web_session_url": signal.location_web_session_url,
+            "location_session_url": signal.location_session_url,
+            "start_time": signal.start_time.strftime("%Y-%m-%dT%H:%M:%SZ"),
+            "end_time": signal.end_time.strftime("%Y-%m-%dT%H:%M:%SZ") if signal.end_time else None,
+            "community_name": signal.community.name, # TODO: Connect this to a session
+            "community_url": signal.community.url,
+            "tags": signal.tags,
+            "status": signal.status,
+            # source
+        }
+    else:
+        raise HTTPException(status_code=400, detail="Unsupported version")
+
+class FragmentCache:
+    """ Serialized rows of the events, for each version and format.
+
+    The rows are keyed by the event id, its modification date, the fields of its community rendered in the rows
+    and the version, so they are only serialized again when one of them change. Rebuilding a result is then a join
+    of the cached rows. The least recently used events are dropped past `max_entries` rows.
+    """
+
+    def __init__(self, max_entries: int = 20000):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._rows: OrderedDict[tuple, dict[FormatType, bytes]] = OrderedDict()
+
+    def __len__(self):
+        return len(self._rows) * len(FormatType)
+
+    @staticmethod
+    def key(signal: Event, version: str) -> tuple:
+        return (
+            signal.id,
+            signal.updated_at or signal.created_at,
+            # Not the modification date of the community, also changing with the fields not rendered
+            signal.community.name,
+            signal.community.url,
+            version,
+        )
+
+    def rows(self, signals: list[Event], version: str) -> dict[FormatType, list[bytes]]:
+        """ Get the serialized rows of the events in every format, serializing only the missing ones. """
+        cached_rows = self._rows
+        text_rows, json_rows = [], []
+        for signal in signals:
+            key = self.key(signal, version)
+            rows = cached_rows.get(key)
+            if rows is None:
+                self.misses += 1
+                event = format_event(signal, version)
+                rows = cached_rows[key] = {
+                    format_type: serialize_row(event, version, format_type) for format_type in FormatType
+                }
+                if len(self) > self.max_entries:
+                    cached_rows.popitem(last=False)
+            else:
+                self.hits += 1
+                cached_rows.move_to_end(key)
+            text_rows.append(rows[FormatType.TEXT])
+            json_rows.append(rows[FormatType.JSON])
+        return {FormatType.TEXT: text_rows, FormatType.JSON: json_rows}
+
+fragment_cache = FragmentCache(int(config_manager.infrastructure_config.CACHE_FRAGMENTS_MAX_ENTRIES))
+
+def expire_until_end(signals, now: datetime) -> int:
+    """ Seconds a result built at `now` (naive UTC) can be cached, until the first of its signals end. """
+    expire = int(config_manager.infrastructure_config.CACHE_TTL)
+    for signal in signals:
+        end_time = signal.end_time or signal.start_time
+        if end_time.tzinfo is not None:
+            end_time = end_time.astimezone(timezone.utc).replace(tzinfo=None)
+        expire = min(expire, max(int((end_time - now).total_seconds()) + 1, 1))
+    return expire
+
+def get_visibility(host: str, user_auth: UserAuthModel = None) -> tuple[bool, list[str] | None]:
+    """ Get if all the events are visible, or else the communities whose private events are visible.
+
+    Private events are visible on the private domains, to the superusers and to the members of their community.
+    """
+    if isinstance(config_manager.infrastructure_config.PUBLIC_DOMAIN, str):
+        public_domains = [config_manager.infrastructure_config.PUBLIC_DOMAIN]
+    else:
+        public_domains = config_manager.infrastructure_config.PUBLIC_DOMAIN
+
+    if isinstance(config_manager.infrastructure_config.PRIVATE_DOMAIN, str):
+        private_domains = [config_manager.infrastructure_config.PRIVATE_DOMAIN]
+    else:
+        private_domains = config_manager.infrastructure_config.PRIVATE_DOMAIN
+
+    if host not in public_domains and host not in private_domains:
+        msg = f"Unsupported domain: {host}."
+        if is_local_env:
+            msg += " You need to configure your hosts file for access to the locally to the HTTP API."
+            msg += " See https://docs.resonite-communities.com/DeveloperGuide/server-configuration/"
+        raise HTTPException(status_code=400, detail=msg)
+
+    all_visible = host in private_domains or bool(user_auth and user_auth.is_superuser)
+    private_communities = user_auth.discord_account.user_communities if user_auth and not all_visible else None
+    return all_visible, private_communities
+
+async def get_events_changes(
+    host: str,
+    since: str = None,
+    communities: str = "",
+    languages: str = "",
+    tags: str = "",
+    limit: int = 500,
+    user_auth: UserAuthModel = None,
+) -> dict:
+    """ Get the events created or modified since the `since` token, ordered by modification date.
+
+    The cancelled and completed events are returned with their new status. Without token, no event is returned
+    and the token of the current end of the feed is given.
+
+    The events no longer visible with these filters (deleted, of a disabled community, made private or no longer
+    matching the filters) are not returned: there is no tombstone, the clients find them out by reloading the events.
+    """
+    all_visible, private_communities = get_visibility(host, user_auth)
+
+    # The modification date is set when the row is written, not when its transaction commit. The changes are only
+    # returned once older than CHANGES_SETTLE_DELAY, so a change is never written before a token already returned as
+    # long as its transaction commit within this delay.
+    settle_delay = timedelta(seconds=int(config_manager.infrastructure_config.CHANGES_SETTLE_DELAY))
+
+    filters = [
+        Event.updated_at <= func.clock_timestamp() - settle_delay,
+        Event.community.has(Community.enabled == True),
+        Event.is_resonite == True,
+        Event.is_vrchat == False,
+    ]
+
+    if not all_visible:
+        filters.append(or_(
+            Event.is_private == False,
+            Event.community_id.in_(private_communities or []),
+        ))
+    if communities:
+        filters.append(Event.community.has(Community.name.in_(communities.split(","))))
+    if languages:
+        filters.append(Event.tag_list.overlap([f"lang:{language}" for language in split_tags(languages)]))
+    if tags:
+        filters.append(Event.tag_list.contains(split_tags(tags)))
+
+    if since is None:
+        latest = await Event.find(
+            __columns=["updated_at", "id"], __custom_filter=and_(*filters), __order_by=["-updated_at", "-id"], __limit=1
+        )
+        if latest:
+            token = encode_cursor(latest[0]["updated_at"], latest[0]["id"])
+        else:
+            token = encode_cursor(datetime.utcnow() - settle_delay, UUID(int=0))
+        return {"events": [], "token": token, "has_more": False}
+
+    updated_at, id = decode_cursor(since)
+    try:
+        id = UUID(id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid token")
+    filters.append(tuple_(Event.updated_at, Event.id) > tuple_(updated_at, id))
+
+    signals = await Event.find(
+        __load=["community"], __custom_filter=and_(*filters), __order_by=["updated_at", "id"], __limit=limit + 1
+    )
+    has_more = len(signals) > limit
+    signals = signals[:limit]
+
+    return {
+        "events": [format_event(signal, "v2") for signal in signals],
+        "token": encode_cursor(signals[-1].updated_at, signals[-1].id) if signals else since,
+        "has_more": has_more,
+    }
+
+def signals_query(
+    now: datetime,
+    window: Window,
+    all_visible: bool = False,
+    private_communities: list[str] = None,
+):
+    """ Build the query of the upcoming events and streams in one result ordered by start time.
+
+    Both are projected to the same columns and merged with an UNION ALL, the time window and the cursor are applied
+    on the merged result. The events are the upcoming ACTIVE and READY Resonite events of the enabled communities
+    visible to the client, the streams are the ones not ended and starting in the 8 next days.
+    """
+    # The ended signals are never returned, even if an earlier `from` is requested
+    start_from = max(window.start_from, now) if window.start_from else now
+
+    event_filters = [
+        Community.enabled == True,
+        Event.is_resonite == True,
+        Event.is_vrchat == False,
+        Event.status.in_((EventStatus.ACTIVE, EventStatus.READY)),
+        or_(
+            and_(Event.end_time.isnot(None), Event.end_time >= start_from),
+            and_(Event.end_time.is_(None), Event.start_time >= start_from),
+        ),
+    ]
+    if not all_visible:
+        event_filters.append(or_(
+            Event.is_private == False,
+            Event.community_id.in_(private_communities or []),
+        ))
+    stream_filters = [Stream.end_time >= start_from]
+    if window.start_to:
+        event_filters.append(Event.start_time < window.start_to)
+        stream_filters.append(Stream.start_time < window.start_to)
+    else:
+        stream_filters.append(Stream.end_time < now + timedelta(days=8))
+
+    events = (
+        select(
+            literal("event").label("type"),
+            Event.id,
+            Event.external_id,
+            Event.name,
+            Event.description,
+            Event.session_image,
+            Event.location.label("location_str"),
+            Event.location_web_session_url,
+            Event.location_session_url,
+            Event.start_time,
+            Event.end_time,
+            Community.name.label("community_name"),
+            Community.url.label("community_url"),
+            Community.logo.label("community_logo"),
+            Event.tags,
+            Event.status,
+        )
+        .join(Community, Event.community_id == Community.id)
+        .where(*event_filters)
+    )
+    streams = (
+        select(
+            literal("stream").label("type"),
+            Stream.id,
+            Stream.external_id,
+            Stream.name,
+            null().label("description"),
+            null().label("session_image"),
+            null().label("location_str"),
+            null().label("location_web_session_url"),
+            null().label("location_session_url"),
+            Stream.start_time,
+            Stream.end_time,
+            Community.name.label("community_name"),
+            Community.url.label("community_url"),
+            Community.logo.label("community_logo"),
+            Stream.tags,
+            Stream.status,
+        )
+        .outerjoin(Community, Stream.community_id == Community.id)
+        .where(*stream_filters)
+    )
+
+    signals = union_all(events, streams).subquery("signals")
+    query = select(signals).order_by(signals.c.start_time, signals.c.id)
+    if window.after:
+        after_time, after_id = window.after
+        try:
+            after_id = UUID(after_id)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        query = query.where(tuple_(signals.c.start_time, signals.c.id) > tuple_(after_time, after_id))
+    if window.limit:
+        # One more signal to know if there is a next page
+        query = query.limit(window.limit + 1)
+    return query
+
+def format_signal(row) -> dict:
+    """ Format an event or a stream row of `signals_query`, the fields not applicable to its type are null. """
+    return {
+        "type": row.type,
+        "id": str(row.id),
+        "external_id": str(row.external_id),
+        "name": row.name,
+        "description": row.description,
+        "session_image": row.session_image,
+        "location_str": row.location_str,
+        "location_web_session_url": row.location_web_session_url,
+        "location_session_url": row.location_session_url,
+        "start_time": row.start_time.strftime("%Y-%m-%dT%H:%M:%SZ"),
+        "end_time": row.end_time.strftime("%Y-%m-%dT%H:%M:%SZ") if row.end_time else None,
+        "community_name": row.community_name,
+        "community_url": row.community_url,
+        "community_logo": row.community_logo,
+        "tags": row.tags,
+        "status": row.status,
+    }
+
+async def get_signals_snapshot(
+    request: Request,
+    window: Window,
+    user_auth: UserAuthModel = None,
+) -> JSONSnapshot:
+    """ Get the upcoming events and streams ordered by start time, from a single query. """
+    host = request.url.hostname
+    all_visible, private_communities = get_visibility(host, user_auth)
+
+    async def load():
+        now = datetime.utcnow()
+        session = await get_current_async_session()
+        result = await session.execute(signals_query(now, window, all_visible, private_communities))
+        rows = result.all()
+
+        headers = {}
+        if window.limit and len(rows) > window.limit:
+            rows = rows[:window.limit]
+            headers[NEXT_CURSOR_HEADER] = encode_cursor(rows[-1].start_time, rows[-1].id)
+
+        # Kept until the events or streams change, or until the first of them end
+        expire = expire_until_end(rows, now)
+
+        return JSONSnapshot([format_signal(row) for row in rows], headers=headers), expire, ["events", "events:all", "streams"]
+
+    return await load_cached(
+        authenticated_request_key_builder(
+            get_signals_snapshot, namespace=f"fastapi-cache:{host}", request=request, user_auth=user_auth
+        ),
+        load,
+        stale_while_revalidate=int(config_manager.infrastructure_config.CACHE_STALE_WHILE_REVALIDATE),
+        stale_if_error=int(config_manager.infrastructure_config.CACHE_STALE_IF_ERROR),
+        refresh_context=async_request_session,
+    )
+
 async def get_filtered_events(
     host: str,
     version: str,
@@ -98,7 +578,24 @@ async def get_filtered_events(
     languages: str,
     user_auth: UserAuthModel = None,
     session = None,
+    tags: str = "",
+    window: Window = None,
 ):
+    snapshot = await get_events_snapshot(
+        host, version, communities, languages, user_auth, session=session, tags=tags, window=window
+    )
+    return snapshot.events
+
+async def get_events_snapshot(
+    host: str,
+    version: str,
+    communities: str,
+    languages: str,
+    user_auth: UserAuthModel = None,
+    session = None,
+    tags: str = "",
+    window: Window = None,
+) -> EventsSnapshot:
 
     # Build cache key
     cache_key = filtered_events_key_builder(
@@ -108,161 +605,128 @@ async def get_filtered_events(
         version=version,
         communities=communities,
         languages=languages,
-        user_auth=user_auth
+        user_auth=user_auth,
+        tags=tags,
+        window=window,
     )
 
-    # Try to get from cache first (fast path)
-    cached_data = await get_cached(cache_key)
-    if cached_data is not None:
-        return cached_data
-
-    # Get lock for this cache key to prevent stampede
-    lock = await get_cache_lock(cache_key)
-
-    async with lock:
-        # Double-check cache after acquiring lock (another request might have populated it)
-        cached_data = await get_cached(cache_key)
-        if cached_data is not None:
-            return cached_data
-
-        # Cache miss - execute the actual query
-        signals = []
-
-        communities_filter = Event.community.has(Community.enabled == True)
-        if communities:
-            communities = [community for community in communities.split(",")]
-            communities_filter = and_(
-                Event.community.has(Community.name.in_(communities)),
-                Event.community.has(Community.enabled == True)
-            )
+    async def load():
+        # Cache miss - answer the filters from the upcoming events index of the worker
+        postings = await events_index.get_postings()
 
-        if isinstance(config_manager.infrastructure_config.PUBLIC_DOMAIN, str):
-            public_domains = [config_manager.infrastructure_config.PUBLIC_DOMAIN]
-        else:
-            public_domains = config_manager.infrastructure_config.PUBLIC_DOMAIN
-
-        if isinstance(config_manager.infrastructure_config.PRIVATE_DOMAIN, str):
-            private_domains = [config_manager.infrastructure_config.PRIVATE_DOMAIN]
-        else:
-            private_domains = config_manager.infrastructure_config.PRIVATE_DOMAIN
-
-        if host not in public_domains and host not in private_domains:
-            msg = f"Unsupported domain: {host}."
-            if is_local_env:
-                msg += " You need to configure your hosts file for access to the locally to the HTTP API."
-                msg += " See https://docs.resonite-communities.com/DeveloperGuide/server-configuration/"
-            raise HTTPException(status_code=400, detail=msg)
-
-        if host in private_domains:
-            visibility_filter = True
-        elif user_auth and user_auth.is_superuser:
-            visibility_filter = True
-        elif user_auth:
-            visibility_filter = or_(
-                Event.is_private == False,  # All public events
-                and_(  # Private events that the user has access to
-                    Event.is_private == True,
-                    Event.community_id.in_(user_auth.discord_account.user_communities)
-                )
+        community_names = communities.split(",") if communities else None
+        cache_tags = ["events"]
+        if community_names:
+            # Only the changes of the events of the requested communities invalidate the result
+            cache_tags.extend(
+                community_tag("events", community_id) for community_id in postings.community_ids(community_names)
             )
         else:
-            visibility_filter = Event.is_private == False
+            cache_tags.append("events:all")
+
+        all_visible, private_communities = get_visibility(host, user_auth)
 
-        # Only get Resonite events
-        platform_filter = and_(
-            Event.is_resonite == True,
-            Event.is_vrchat == False
+        # The index only contain the upcoming ACTIVE and READY Resonite events of the enabled communities
+        now = datetime.utcnow()
+        signals = postings.query(
+            communities=community_names,
+            languages=languages.split(',') if languages else None,
+            tags=split_tags(tags),
+            all_visible=all_visible,
+            private_communities=private_communities,
+            now=now,
+            start_from=window.start_from if window else None,
+            start_to=window.start_to if window else None,
+            after=window.after if window else None,
+            # One more event to know if there is a next page
+            limit=window.limit + 1 if window and window.limit else None,
         )
 
-        # Only get Events that are ACTIVE or READY
-        status_filter = Event.status.in_((EventStatus.ACTIVE, EventStatus.READY))
+        next_cursor = None
+        if window and window.limit and len(signals) > window.limit:
+            signals = signals[:window.limit]
+            next_cursor = encode_cursor(signals[-1].start_time, signals[-1].id)
 
-        # Determine if an event is either active or upcoming by comparing end_time or start_time with the current time.
-        # If end_time is available, it will be used; otherwise, fallback to start_time.
-        # Event is considered active or upcoming if the time is greater than or equal to now
-        now = datetime.utcnow()
-        time_filter = or_(
-            and_(Event.end_time.isnot(None), Event.end_time >= now),
-            and_(Event.end_time.is_(None), Event.start_time >= now)
+        # Only the dates of the events, the communities are also written for the changes of fields not rendered
+        last_modified = max(
+            (signal.updated_at or signal.created_at for signal in signals if signal.updated_at or signal.created_at),
+            default=None,
         )
 
-        # Determine the languages
-        if languages:
-            language_filter = or_(
-                *[Event.tags.ilike(f"%lang:{language}%") for language in languages.split(',')]
-            )
-        else:
-            language_filter = True
-
-        custom_filter=and_(
-            communities_filter,
-            visibility_filter,
-            platform_filter,
-            status_filter,
-            time_filter,
-            language_filter
+        # Only the events modified since the previous builds are formatted and serialized again
+        snapshot = EventsSnapshot(
+            None,
+            version,
+            last_modified=last_modified,
+            next_cursor=next_cursor,
+            rows=fragment_cache.rows(signals, version),
         )
 
-        # TODO: Instead of extend the signals variable, the Event and Stream find command should be one
-        # SQL commend, optimization to order elements by date
-        signals.extend(await Event.find(__custom_filter=custom_filter, __order_by=["start_time"]))
+        # The result is kept until the data it was built from change, or until the first of the events end as it
+        # must then be removed from the result
+        expire = expire_until_end(signals, now)
 
-        versioned_events = []
-        for signal in signals:
-            if version == "v1":
-                versioned_events.append({
-                    "name": signal.name,
-                    #"description": signal.custom_description if signal.custom_description else signal.default_description,
-                    "description": signal.description,
-                    "location_str": signal.location,
-                    "start_time": signal.start_time.strftime("%Y/%m/%d %H:%M:%S+00:00"),
-                    "end_time": signal.end_time.strftime("%Y/%m/%d %H:%M:%S+00:00") if signal.end_time else None,
-                    "community_name": signal.community.name, # TODO: Connect this to a session
-                })
-            elif version == "v2":
-                versioned_events.append({
-                    "id": str(signal.id),
-                    "external_id": str(signal.external_id),
-                    "name": signal.name,
-                    #"description": signal.custom_description if signal.custom_description else signal.default_description,
-                    "description": signal.description,
-                    "session_image": signal.session_image,
-                    "location_str": signal.location,
-                    "location_web_session_url": signal.location_web_session_url,
-                    "location_session_url": signal.location_session_url,
-                    "start_time": signal.start_time.strftime("%Y-%m-%dT%H:%M:%SZ"),
-                    "end_time": signal.end_time.strftime("%Y-%m-%dT%H:%M:%SZ") if signal.end_time else None,
-                    "community_name": signal.community.name, # TODO: Connect this to a session
-                    "community_url": signal.community.url,
-                    "tags": signal.tags,
-                    "status": signal.status,
-                    # source
-                })
-            else:
-                raise HTTPException(status_code=400, detail="Unsupported version")
+        return snapshot, expire, cache_tags
 
-        #raise ValueError(versioned_events)
-
-        # Store in cache with 5 minute TTL
-        await set_cached(cache_key, versioned_events, expire=300)
+    return await load_cached(
+        cache_key,
+        load,
+        stale_while_revalidate=int(config_manager.infrastructure_config.CACHE_STALE_WHILE_REVALIDATE),
+        stale_if_error=int(config_manager.infrastructure_config.CACHE_STALE_IF_ERROR),
+    )
 
-        return versioned_events
+media_types = {
+    FormatType.TEXT: "text/plain",
+    FormatType.JSON: "application/json",
+}
 
 def generate_events_response(
+        request: Request,
         version: str,
         format_type: FormatType = Depends(set_default_format),
-        events: list[dict] = Depends(get_filtered_events),
+        snapshot: EventsSnapshot = Depends(get_events_snapshot),
 ):
-    match format_type:
-        case FormatType.TEXT:
-            return Response(
-                text_dumps(events, version),
-                media_type="text/plain",
-            )
-        case FormatType.JSON:
-            return Response(
-                json.dumps(events, cls=JSONEncoder),
-                media_type="application/json",
-            )
-        case _:
-            raise HTTPException(status_code=400, detail="Unsupported format")
+    if format_type not in media_types:
+        raise HTTPException(status_code=400, detail="Unsupported format")
+
+    headers = {}
+    if snapshot.next_cursor:
+        headers[NEXT_CURSOR_HEADER] = snapshot.next_cursor
+
+    return send_payload(
+        request,
+        snapshot.variants(format_type),
+        media_types[format_type],
+        snapshot.etag(format_type),
+        last_modified=snapshot.last_modified,
+        headers=headers,
+    )
+
+def send_payload(
+        request: Request,
+        variants: dict[str, bytes],
+        media_type: str,
+        etag: str,
+        last_modified: datetime = None,
+        headers: dict[str, str] = None,
+) -> Response:
+    """ Send the variant of a payload in the best encoding accepted by the client, or a 304 when it's up to date.
+
+    The variants are compressed in advance, nothing is compressed on the request path.
+    """
+    encoding = negotiate_encoding(request.headers.get("accept-encoding"), variants)
+
+    headers = {
+        **(headers or {}),
+        "ETag": encoded_etag(etag, encoding),
+        "Vary": "Accept-Encoding",
+    }
+    if last_modified:
+        headers["Last-Modified"] = format_datetime(last_modified, usegmt=True)
+
+    if is_not_modified(request, headers["ETag"], last_modified):
+        return Response(status_code=304, headers=headers)
+
+    if encoding != IDENTITY:
+        headers["Content-Encoding"] = encoding
+    return Response(variants[encoding], media_type=media_type, headers=headers)
@@ -0,0 +1,75 @@
+import base64
+import binascii
+import json
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Optional
+
+from fastapi import HTTPException, Query
+
+# Name of the response header giving the cursor of the next page
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+MAX_LIMIT = 1000
+
+
+def to_utc_naive(value: Optional[datetime]) -> Optional[datetime]:
+    """Signals times are compared as naive UTC datetimes."""
+    if value is not None and value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def encode_cursor(start_time: datetime, id: str) -> str:
+    """Encode the position of a signal in the (start_time, id) order as an opaque cursor."""
+    position = [to_utc_naive(start_time).isoformat(), str(id)]
+    return base64.urlsafe_b64encode(json.dumps(position).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, str]:
+    try:
+        start_time, id = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        return datetime.fromisoformat(start_time), str(id)
+    except (binascii.Error, UnicodeDecodeError, ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+@dataclass(frozen=True)
+class Window:
+    """Time window and page of signals requested.
+
+    - `start_from`: only the signals not ended at this time, or now if later.
+    - `start_to`: only the signals starting before this time.
+    - `after`: only the signals after this (start_time, id) position, decoded from the cursor of the previous page.
+    - `limit`: maximum number of signals returned.
+    """
+    start_from: Optional[datetime] = None
+    start_to: Optional[datetime] = None
+    after: Optional[tuple[datetime, str]] = None
+    limit: Optional[int] = None
+
+    def cache_key(self) -> str:
+        return ":".join([
+            self.start_from.isoformat() if self.start_from else "",
+            self.start_to.isoformat() if self.start_to else "",
+            encode_cursor(*self.after) if self.after else "",
+            str(self.limit or ""),
+        ])
+
+    def __bool__(self):
+        return any((self.start_from, self.start_to, self.after, self.limit))
+
+
+def get_window(
+    start_from: Optional[datetime] = Query(None, alias="from"),
+    start_to: Optional[datetime] = Query(None, alias="to"),
+    limit: Optional[int] = Query(None, ge=1, le=MAX_LIMIT),
+    cursor: Optional[str] = None,
+) -> Window:
+    """FastAPI dependency of the `from`, `to`, `limit` and `cursor` query parameters."""
+    return Window(
+        start_from=to_utc_naive(start_from),
+        start_to=to_utc_naive(start_to),
+        after=decode_cursor(cursor) if cursor else None,
+        limit=limit,
+    )
@@ -0,0 +1,74 @@
+import json
+from datetime import date, datetime, time
+from enum import Enum
+from typing import Any, AsyncIterable, AsyncIterator, Callable
+from uuid import UUID
+
+from fastapi import Response
+from fastapi.responses import StreamingResponse
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Size of the chunks sent by the streaming responses
+STREAM_CHUNK_SIZE = 64 * 1024
+
+
+def default(obj: Any) -> Any:
+    """Convert the values unknown to the JSON encoders.
+
+    orjson already handle the datetimes, UUIDs and enums natively, the stdlib encoder get the same output from here.
+    """
+    if isinstance(obj, (datetime, date, time)):
+        return obj.isoformat()
+    if isinstance(obj, UUID):
+        return str(obj)
+    if isinstance(obj, Enum):
+        return obj.value
+    if isinstance(obj, (set, frozenset, tuple)):
+        return list(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps(obj: Any) -> bytes:
+    """Serialize to compact UTF-8 JSON, with orjson when it's installed."""
+    if orjson is not None:
+        return orjson.dumps(obj, default=default, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(obj, default=default, separators=(",", ":"), ensure_ascii=False).encode()
+
+
+async def stream_json_array(rows: AsyncIterable, format_row: Callable[[Any], Any] = None) -> AsyncIterator[bytes]:
+    """Serialize the rows as a JSON array while they are read.
+
+    Each row is formatted and serialized as soon as it comes, only the current chunk is kept in memory.
+    """
+    chunk = bytearray(b"[")
+    first = True
+    async for row in rows:
+        if not first:
+            chunk += b","
+        first = False
+        chunk += dumps(format_row(row) if format_row else row)
+        if len(chunk) >= STREAM_CHUNK_SIZE:
+            yield bytes(chunk)
+            chunk.clear()
+    chunk += b"]"
+    yield bytes(chunk)
+
+
+class SerializedJSONResponse(Response):
+    """JSON response serialized with `dumps`, without going through `jsonable_encoder`."""
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+class StreamingJSONResponse(StreamingResponse):
+    """JSON array response sent while the rows are read, see `stream_json_array`."""
+
+    def __init__(self, rows: AsyncIterable, format_row: Callable[[Any], Any] = None, **kwargs):
+        kwargs.setdefault("media_type", "application/json")
+        super().__init__(stream_json_array(rows, format_row), **kwargs)
@@ -9,6 +9,13 @@ class VersionedAPIRouter(APIRouter):
 
     def add_api_route(self, *args, **kwargs):
         super().add_api_route(*args, **kwargs)
+        self._set_routes_version()
+
+    def add_api_websocket_route(self, *args, **kwargs):
+        super().add_api_websocket_route(*args, **kwargs)
+        self._set_routes_version()
+
+    def _set_routes_version(self):
         for route in self.routes:
 
             # This try/catch is here to see if having a version 2.0 and 2.1 is supported, need to look deeper
@@ -32,12 +32,15 @@ async def render_main(request: Request, user_auth: UserAuthModel, tab: str):
     session = await get_current_async_session()
 
     # Make concurrent API calls instead of sequential
-    events, streams, all_communities = await asyncio.gather(
-        api_client.get("/v2/events", user_auth=user_auth),
-        api_client.get("/v2/streams", user_auth=user_auth),
+    signals, all_communities = await asyncio.gather(
+        api_client.get("/v2/signals", user_auth=user_auth),
         api_client.get("/v2/communities", {"include_all": True}, user_auth=user_auth)
     )
 
+    # Events and streams come in one list ordered by start time
+    events = [signal for signal in signals if signal['type'] == 'event']
+    streams = [signal for signal in signals if signal['type'] == 'stream']
+
     # Client-side filtering
     streamers = [c for c in all_communities if c.get('platform') == 'TWITCH']
     communities = [c for c in all_communities if c.get('public') and c.get('platform') != 'TWITCH']
@@ -103,7 +103,7 @@ class APIClient:
             # Validate response before parsing JSON
             if not response.content:
                 logger.error(f"API returned empty response for {endpoint} (status: {response.status_code})")
-                return [] if any(x in endpoint for x in ["events", "communities", "streams"]) else {}
+                return [] if any(x in endpoint for x in ["events", "communities", "streams", "signals"]) else {}
             
             result = response.json()
             # Cache successful response (if caching is enabled)
@@ -114,7 +114,7 @@ class APIClient:
         except httpx.TimeoutException as e:
             logger.error(f"API request timeout for {endpoint}: {type(e).__name__}: {str(e)}")
             logger.debug(f"Timeout traceback: {traceback.format_exc()}")
-            return [] if any(x in endpoint for x in ["events", "communities", "streams"]) else {}
+            return [] if any(x in endpoint for x in ["events", "communities", "streams", "signals"]) else {}
             
         except httpx.HTTPStatusError as e:
             logger.error(f"API HTTP error for {endpoint}: {e.response.status_code} - {str(e)}")
@@ -123,30 +123,30 @@ class APIClient:
                     logger.error(f"Response detail: {response.json()}")
                 except:
                     logger.error(f"Response text: {response.text[:500]}")
-            return [] if any(x in endpoint for x in ["events", "communities", "streams"]) else {}
+            return [] if any(x in endpoint for x in ["events", "communities", "streams", "signals"]) else {}
             
         except json.JSONDecodeError as e:
             logger.error(f"API JSON decode error for {endpoint}: {str(e)}")
             if response:
                 logger.error(f"Response status: {response.status_code}, Content preview: {response.text[:500]}")
-            return [] if any(x in endpoint for x in ["events", "communities", "streams"]) else {}
+            return [] if any(x in endpoint for x in ["events", "communities", "streams", "signals"]) else {}
             
         except httpx.ConnectError as e:
             logger.error(f"API connection error for {endpoint}: {type(e).__name__}: {str(e)}")
             logger.debug(f"Connection error traceback: {traceback.format_exc()}")
-            return [] if any(x in endpoint for x in ["events", "communities", "streams"]) else {}
+            return [] if any(x in endpoint for x in ["events", "communities", "streams", "signals"]) else {}
             
         except httpx.HTTPError as e:
             logger.error(f"API HTTP error for {endpoint}: {type(e).__name__}: {str(e)}")
             if response:
                 logger.error(f"Response status: {response.status_code if hasattr(response, 'status_code') else 'N/A'}")
             logger.debug(f"HTTP error traceback: {traceback.format_exc()}")
-            return [] if any(x in endpoint for x in ["events", "communities", "streams"]) else {}
+            return [] if any(x in endpoint for x in ["events", "communities", "streams", "signals"]) else {}
             
         except Exception as e:
             logger.error(f"Unexpected error in API client for {endpoint}: {type(e).__name__}: {str(e)}")
             logger.error(f"Full traceback: {traceback.format_exc()}")
-            return [] if any(x in endpoint for x in ["events", "communities", "streams"]) else {}
+            return [] if any(x in endpoint for x in ["events", "communities", "streams", "signals"]) else {}
 
     async def post(self, endpoint: str, data: Dict[str, Any], user_auth: Optional[UserAuthModel] = None):
         headers = {
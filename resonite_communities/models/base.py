@@ -3,15 +3,16 @@ from datetime import datetime, timezone
 
 from typing import Optional, Any
 
-from sqlalchemy import select, inspect, desc, asc, ClauseElement
+from sqlalchemy import select, update, delete, inspect, desc, asc, and_, or_, ClauseElement
 from sqlalchemy.dialects.postgresql import insert as dialects_insert
-from sqlalchemy.orm import RelationshipProperty, selectinload
+from sqlalchemy.orm import ONETOMANY, RelationshipProperty, selectinload
 from sqlmodel import SQLModel
 
 
 from resonite_communities.utils.logger import get_logger
 
-from resonite_communities.utils.db import get_current_async_session
+from resonite_communities.utils.db import get_async_session, get_current_async_session
+from resonite_communities.utils.notify import notify_changes
 
 logger = get_logger('BaseModel')
 
@@ -21,6 +22,10 @@ class DatabaseMethodsMixin:
 
     insert_only_fields: ClassVar[list[str]] = ['created_at']
     update_only_fields: ClassVar[list[str]] = ['updated_at']
+    # Send a change notification to the API workers on each write
+    notify_changes: ClassVar[bool] = False
+    # Rows by statement of bulk_upsert, keep the bind parameters well under the 32767 allowed by Postgres
+    bulk_upsert_chunk_size: ClassVar[int] = 500
 
     def __str__(self):
         """
@@ -75,6 +80,10 @@ class DatabaseMethodsMixin:
                     query = query.where(getattr(cls, field).like(filter_value))
                 case 'in':
                     query = query.where(getattr(cls, field).in_(filter_value))
+                case 'contains':
+                    query = query.where(getattr(cls, field).contains(filter_value))
+                case 'overlap':
+                    query = query.where(getattr(cls, field).overlap(filter_value))
             #else:
             #    raise ValueError(f"Unsupported operator '{operator}")
             filters.pop(filter_name)
@@ -84,6 +93,7 @@ class DatabaseMethodsMixin:
     def _apply_special_directive(cls, query, filters: dict[str, Any]):
         order_by = filters.pop('__order_by', None)
         custom_filter = filters.pop('__custom_filter', None)
+        limit = filters.pop('__limit', None)
 
         if order_by:
             for field in order_by:
@@ -96,8 +106,28 @@ class DatabaseMethodsMixin:
         if isinstance(custom_filter, ClauseElement):
             query = query.where(custom_filter)
 
+        if limit is not None:
+            query = query.limit(limit)
+
         return query
 
+    @classmethod
+    async def _notify_changes(cls, session, instances: list):
+        """Queue a change notification for the written instances, sent on commit."""
+        if not cls.notify_changes or not instances:
+            return
+        await notify_changes(
+            session,
+            cls.__tablename__,
+            ids=[instance.id for instance in instances],
+            community_ids=[getattr(instance, 'community_id', None) for instance in instances],
+        )
+
+    @classmethod
+    def _changed_filter(cls, fields: dict[str, Any]) -> ClauseElement:
+        """Filter of the rows with at least one of the fields distinct from its value, NULL included."""
+        return or_(*[getattr(cls, key).is_distinct_from(value) for key, value in fields.items()])
+
     @classmethod
     def set_insert_fields(cls, fields_to_update: dict):
         """Set fields that should only be set during insert.
@@ -129,6 +159,8 @@ class DatabaseMethodsMixin:
         try:
             signal_instance = cls(**data)
             session.add(signal_instance)
+            await session.flush()
+            await cls._notify_changes(session, [signal_instance])
             await session.commit()
             await session.refresh(signal_instance)
             return signal_instance
@@ -145,30 +177,30 @@ class DatabaseMethodsMixin:
         - Operator-based: {"field_name__operator": value}
         - Special directives: {"__order_by": ["field1", "-field2"]}
         - Custom filter: {"__custom_filter": <sqlalchemy.sql.expression>}
+        - Limit: {"__limit": 20}
+        - Relationships to load with the instances: {"__load": ["community"]}, none by default
+        - Columns to select: {"__columns": ["id", "name"]}, the rows are then returned as read-only mappings
+          instead of instances
 
         Examples
             await signal.find(name='Fluffy event')  # Simple match
             await signal.find(start_time__gtr_eq=datetime.now())  # Operator based match
             await signal.find(__order_by = "start_time")  # Special directive match
             await signal.find(__custom_filter = case(...)  # Custom filter match
+            await signal.find(__load = ["community"])  # Access signal.community on the results
+            await community.find(__columns = ["id", "name"])  # [{"id": ..., "name": ...}, ...]
         """
         cls._validate_filter(filters)
 
         session = await get_current_async_session()
         try:
             instances = []
-            query = select(cls)
-
-            # Include other model
-            for rel_name, rel_attr in inspect(cls).relationships.items():
-                if isinstance(rel_attr, RelationshipProperty):
-                    query = query.options(selectinload(rel_attr))
-
-            query = cls._apply_simple_filter(query, filters)
-            query = cls._apply_operator_filter(query, filters)
-            query = cls._apply_special_directive(query, filters)
+            columns = filters.get('__columns')
+            query = cls._find_query(filters)
 
             result = await session.execute(query)
+            if columns:
+                return list(result.mappings().all())
             rows = result.unique().all()
             for row in rows:
                 instances.append(row[0])
@@ -177,16 +209,76 @@ class DatabaseMethodsMixin:
             logger.error(f"Error in find operation: {e}")
             raise
 
+    @classmethod
+    async def stream(cls, batch_size: int = 500, **filters: Any):
+        """
+        Same as find but yield the instances as they are read from the database cursor, `batch_size` rows at a time.
+
+        The rows are read in a session of their own so the iteration can outlive the request session, for example
+        in the body of a streaming response.
+
+        Examples
+            async for event in Event.stream(__order_by=['start_time']):
+                ...
+        """
+        cls._validate_filter(filters)
+
+        try:
+            columns = filters.get('__columns')
+            query = cls._find_query(filters).execution_options(yield_per=batch_size)
+            async with get_async_session() as session:
+                result = await session.stream(query)
+                async for instance in (result.mappings() if columns else result.scalars()):
+                    yield instance
+        except Exception as e:
+            logger.error(f"Error in stream operation: {e}")
+            raise
+
+    @classmethod
+    def _find_query(cls, filters: dict[str, Any]):
+        columns = filters.pop('__columns', None)
+        load = filters.pop('__load', None) or []
+
+        if columns:
+            for column in columns:
+                if column not in cls.__table__.columns:
+                    raise ValueError(f"Invalid column '{column}' for model '{cls.__name__}'")
+            query = select(*[getattr(cls, column) for column in columns])
+        else:
+            query = select(cls)
+
+        # Include other model, only when asked as each relationship cost a query
+        relationships = inspect(cls).relationships
+        for rel_name in load:
+            rel_attr = relationships.get(rel_name)
+            if not isinstance(rel_attr, RelationshipProperty):
+                raise ValueError(f"Invalid relationship '{rel_name}' for model '{cls.__name__}'")
+            if columns:
+                raise ValueError("Relationships can't be loaded with a columns selection")
+            query = query.options(selectinload(getattr(cls, rel_name)))
+
+        query = cls._apply_simple_filter(query, filters)
+        query = cls._apply_operator_filter(query, filters)
+        query = cls._apply_special_directive(query, filters)
+        return query
+
     @classmethod
     async def update(
         cls,
         filters: ClauseElement,
+        _returning: bool = True,
+        _only_changed: bool = False,
         **fields_to_update: Any
     ):
         """ Generic update method for updating database records with a custom filter.
 
+        The rows are updated with a single UPDATE ... WHERE ... RETURNING statement.
+
         Parameters:
             filters (ClauseElement): A SQLAlchemy filter expression to select the rows to update.
+            _returning (bool): Return the updated instances, else only the number of updated rows.
+            _only_changed (bool): Only update the rows with at least one field different from its new value, the
+                other rows are neither written, nor notified nor counted. The JSON fields can't be compared.
             fields_to_update (Any): Fields to update, provided as keyword arguments. Example: name="John".
 
         Examples:
@@ -196,32 +288,30 @@ class DatabaseMethodsMixin:
                 name="John Doe",
                 status="active"
             )
+            # Only get the number of updated rows
+            await MyModel.update(MyModel.age > 30, _returning=False, status="active")
         """
-        fields_to_update['updated_at'] = datetime.now(timezone.utc)
         cls._validate_filter(fields_to_update)
+        if _only_changed and fields_to_update:
+            filters = and_(filters, cls._changed_filter(fields_to_update))
+        fields_to_update['updated_at'] = datetime.now(timezone.utc)
+
+        stmt = update(cls).where(filters).values(**fields_to_update)
 
         session = await get_current_async_session()
         try:
-            instances = []
-            query = select(cls).where(filters)
-            result = await session.execute(query)
-            rows = result.unique().all()
-
-            # Update all instances in batch
-            for row in rows:
-                instance = row[0]
-                for key, value in fields_to_update.items():
-                    setattr(instance, key, value)
-                instances.append(instance)
-
-            # Commit changes before expunging
-            if instances:
+            if _returning:
+                result = await session.execute(stmt.returning(cls))
+                instances = list(result.scalars().all())
+                if instances:
+                    await cls._notify_changes(session, instances)
+                    await session.commit()
+                return instances
+
+            updated = await cls._execute_without_rows(session, stmt)
+            if updated:
                 await session.commit()
-                for instance in instances:
-                    await session.refresh(instance)
-                    session.expunge(instance)
-
-            return instances
+            return updated
         except Exception as e:
             logger.error(f"Error in update operation: {e}")
             raise
@@ -231,8 +321,14 @@ class DatabaseMethodsMixin:
         cls,
         _filter_field: str | list[str],
         _filter_value: Any | list[Any],
+        _only_changed: bool = False,
         **fields_to_update: Any
     ):
+        """ Insert a row, or update the row with the same `_filter_field` values.
+
+        With `_only_changed`, an existing row is only updated when one of its fields differs from its new value, None
+        is then returned for an unchanged row. The JSON fields can't be compared.
+        """
         cls._validate_filter(fields_to_update)
 
         if not isinstance(_filter_field, list):
@@ -249,9 +345,15 @@ class DatabaseMethodsMixin:
         update_data = cls.set_update_fields(update_data)
 
         stmt = dialects_insert(cls).values(**insert_data)
+        changed = None
+        if _only_changed:
+            changed = cls._changed_filter({
+                key: stmt.excluded[key] for key in update_data if key not in cls.update_only_fields
+            })
         stmt = stmt.on_conflict_do_update(
             index_elements=_filter_field,
-            set_=update_data
+            set_=update_data,
+            where=changed,
         ).returning(cls)
 
         session = await get_current_async_session()
@@ -261,6 +363,7 @@ class DatabaseMethodsMixin:
             if row is None:
                 return None
             instance = row[0]
+            await cls._notify_changes(session, [instance])
             await session.commit()
             await session.refresh(instance)
             return instance
@@ -269,33 +372,161 @@ class DatabaseMethodsMixin:
             raise
 
     @classmethod
-    async def delete(cls, **filters: Optional[dict[str, Any]]):
-        cls._validate_filter(filters)
+    async def bulk_upsert(
+        cls,
+        rows: list[dict[str, Any]],
+        conflict_cols: str | list[str],
+        return_ids: bool = False,
+        chunk_size: int = None,
+    ):
+        """ Insert or update many rows, with one INSERT ... ON CONFLICT DO UPDATE statement by chunk of rows.
+
+        All the rows are written in the same transaction, committed once at the end. A row conflicting with an
+        existing one on `conflict_cols` update all its fields except the insert only ones. When several rows have
+        the same conflict values, the last one is written.
+
+        Parameters:
+            rows (list[dict[str, Any]]): Fields of each row, all the rows must have the same fields.
+            conflict_cols (str | list[str]): Fields of the unique constraint to upsert on.
+            return_ids (bool): Return the ids of the written rows instead of their count.
+            chunk_size (int): Maximum number of rows by statement, `bulk_upsert_chunk_size` by default.
 
+        Examples:
+            await Event.bulk_upsert(
+                [{'external_id': '1', 'name': 'Fluffy event'}, {'external_id': '2', 'name': 'Fluffy party'}],
+                conflict_cols='external_id',
+            )
+        """
+        if not isinstance(conflict_cols, list):
+            conflict_cols = [conflict_cols]
+        if not rows:
+            return [] if return_ids else 0
+
+        fields = set(rows[0])
+        for row in rows:
+            if set(row) != fields:
+                raise ValueError("All the rows should have the same fields")
+            missing = [column for column in conflict_cols if column not in row]
+            if missing:
+                raise ValueError(f"Missing conflict fields {missing} in row")
+        cls._validate_filter(rows[0])
+
+        # Postgres refuse to update the same row twice in one statement
+        unique_rows = {tuple(row[column] for column in conflict_cols): row for row in rows}
+
+        insert_rows = [
+            cls.set_insert_fields({key: value for key, value in row.items() if key not in cls.update_only_fields})
+            for row in unique_rows.values()
+        ]
+
+        chunk_size = chunk_size or cls.bulk_upsert_chunk_size
         session = await get_current_async_session()
         try:
-            query = select(cls)
-            query = cls._apply_simple_filter(query, filters)
-            query = cls._apply_operator_filter(query, filters)
-            query = cls._apply_special_directive(query, filters)
+            ids = []
+            count = 0
+            for start in range(0, len(insert_rows), chunk_size):
+                stmt = dialects_insert(cls).values(insert_rows[start:start + chunk_size])
+                # Only the fields given by the caller, not the ones set_insert_fields adds for the new rows
+                update_data = {
+                    key: stmt.excluded[key]
+                    for key in fields
+                    if key not in cls.insert_only_fields and key not in cls.update_only_fields
+                    and key not in conflict_cols
+                }
+                update_data = cls.set_update_fields(update_data)
+                stmt = stmt.on_conflict_do_update(index_elements=conflict_cols, set_=update_data)
+
+                if return_ids or cls.notify_changes:
+                    written = (await session.execute(stmt.returning(*cls._notify_columns()))).all()
+                    await cls._notify_changes(session, written)
+                    ids.extend(row.id for row in written)
+                    count += len(written)
+                else:
+                    result = await session.execute(stmt)
+                    count += result.rowcount
+            await session.commit()
+            return ids if return_ids else count
+        except Exception as e:
+            logger.error(f"Error in bulk upsert operation: {e}")
+            raise
 
-            result = await session.execute(query)
-            rows = result.all()
-            deleted = len(rows)
+    @classmethod
+    async def delete(cls, _returning: bool = False, **filters: Optional[dict[str, Any]]):
+        """ Generic delete method, the filters are the same as find.
+
+        The rows are deleted with a single DELETE ... WHERE ... statement, the rows of the relationships cascading
+        the deletes are deleted first with one statement by relationship.
+
+        Parameters:
+            _returning (bool): Return the ids of the deleted rows, else only the number of deleted rows.
+            filters (Any): Filters of the rows to delete.
+
+        Examples:
+            await Event.delete(id__eq=event_id)
+            await Event.delete(_returning=True, status=EventStatus.CANCELED)  # [UUID(...), ...]
+        """
+        cls._validate_filter(filters)
+
+        session = await get_current_async_session()
+        try:
+            if '__limit' in filters or '__order_by' in filters:
+                condition = cls.id.in_(cls._find_query({**filters, '__columns': ['id']}))
+            else:
+                condition = cls._find_query(filters).whereclause
+
+            for relationship in inspect(cls).relationships:
+                if not relationship.cascade.delete or relationship.direction is not ONETOMANY:
+                    continue
+                related = relationship.mapper.class_
+                # One statement by relationship, matching the rows referencing the deleted ones
+                stmt = delete(related)
+                for local, remote in relationship.local_remote_pairs:
+                    parents = select(local)
+                    if condition is not None:
+                        parents = parents.where(condition)
+                    stmt = stmt.where(remote.in_(parents))
+                await related._execute_without_rows(session, stmt)
+
+            stmt = delete(cls)
+            if condition is not None:
+                stmt = stmt.where(condition)
+
+            if _returning:
+                deleted = list((await session.execute(stmt.returning(*cls._notify_columns()))).all())
+                await cls._notify_changes(session, deleted)
+                result = [row.id for row in deleted]
+            else:
+                result = await cls._execute_without_rows(session, stmt)
 
-            # Delete all instances in batch
-            for row in rows:
-                await session.delete(row[0])
-            
             # Commit deletions
-            if deleted > 0:
+            if result:
                 await session.commit()
 
-            return deleted
+            return result
         except Exception as e:
             logger.error(f"Error in delete operation: {e}")
             raise
 
+    @classmethod
+    def _notify_columns(cls) -> list:
+        """Columns read back from the written rows for the change notifications."""
+        columns = [cls.id]
+        if 'community_id' in cls.__table__.columns:
+            columns.append(cls.community_id)
+        return columns
+
+    @classmethod
+    async def _execute_without_rows(cls, session, stmt) -> int:
+        """Execute an UPDATE or DELETE statement and get the number of rows written.
+
+        The rows are only read back when the model notify its changes, to get their ids.
+        """
+        if not cls.notify_changes:
+            return (await session.execute(stmt)).rowcount
+        written = (await session.execute(stmt.returning(*cls._notify_columns()))).all()
+        await cls._notify_changes(session, written)
+        return len(written)
+
 
 class BaseModel(DatabaseMethodsMixin, SQLModel):
     pass
@@ -1,12 +1,13 @@
+from typing import ClassVar
 from uuid import UUID, uuid4
 from datetime import datetime
 
 import easydict
 from sqlmodel import Field, JSON, Relationship
-from sqlalchemy import Column, UniqueConstraint
+from sqlalchemy import Column, Index, UniqueConstraint
 from sqlalchemy.orm import Mapped
 
-from resonite_communities.models.types import EasyDictType
+from resonite_communities.models.types import EasyDictType, tag_list_column
 from resonite_communities.models.base import BaseModel
 from resonite_communities.signals import CEEnum
 
@@ -22,7 +23,12 @@ events_platforms = [CommunityPlatform.DISCORD, CommunityPlatform.JSON, Community
 streams_platforms = [CommunityPlatform.TWITCH]
 
 class Community(BaseModel, table=True):
-    __table_args__ = (UniqueConstraint("external_id", "platform"),)
+    notify_changes: ClassVar[bool] = True
+
+    __table_args__ = (
+        UniqueConstraint("external_id", "platform"),
+        Index('ix_community_tag_list', 'tag_list', postgresql_using='gin'),
+    )
     id: UUID = Field(default_factory=uuid4, primary_key=True)
     created_at: datetime = Field(sa_column=Column(DateTime(timezone=True)))
     updated_at: datetime | None = Field(sa_column=Column(DateTime(timezone=True)))
@@ -40,6 +46,7 @@ class Community(BaseModel, table=True):
     url: str | None = Field()
     members_count: int | None = Field(default=0)
     tags: str | None = Field()
+    tag_list: list[str] | None = Field(default=None, sa_column=tag_list_column())
     languages: str | None = Field()
     config: dict | None = Field(default={}, sa_column=Column(EasyDictType, default=easydict.EasyDict()))
     events: Mapped[list["Event"]] = Relationship(
@@ -1,12 +1,17 @@
+import hashlib
+import json
+from enum import Enum
+from typing import Any, ClassVar
 from uuid import UUID, uuid4
-from datetime import datetime
+from datetime import datetime, timezone
 
 from sqlmodel import Field, Relationship
 
 from resonite_communities.models.base import BaseModel
 from resonite_communities.models.community import Community
+from resonite_communities.models.types import tag_list_column
 from resonite_communities.signals import CEEnum
-from sqlalchemy import Column, DateTime
+from sqlalchemy import Column, DateTime, Index, text
 
 
 class EventStatus(CEEnum):
@@ -17,7 +22,52 @@ class EventStatus(CEEnum):
     COMPLETED = "COMPLETED"
 
 
+# Fields of a collected signal not part of its content
+CONTENT_HASH_EXCLUDED_FIELDS = {'content_hash', 'created_at', 'updated_at'}
+
+
+def _normalize_content_value(value: Any) -> Any:
+    if isinstance(value, datetime):
+        if value.tzinfo is not None:
+            value = value.astimezone(timezone.utc)
+        return value.isoformat()
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, UUID):
+        return str(value)
+    return value
+
+
+def content_hash(fields: dict[str, Any]) -> str:
+    """ Hash of the content of a collected signal, to only write the signals that changed since the last collect.
+
+    The fields are normalized first so the same content always gives the same hash: the dates are converted to UTC
+    and the comma separated tags are sorted, as the collectors build them from sets.
+    """
+    normalized = {}
+    for key, value in fields.items():
+        if key in CONTENT_HASH_EXCLUDED_FIELDS:
+            continue
+        if key == 'tags' and value:
+            value = ','.join(sorted(value.split(',')))
+        normalized[key] = _normalize_content_value(value)
+    payload = json.dumps(normalized, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
 class Event(BaseModel, table=True):
+    notify_changes: ClassVar[bool] = True
+
+    __table_args__ = (
+        Index('ix_event_tag_list', 'tag_list', postgresql_using='gin'),
+        # Range scans of the changes feed
+        Index('ix_event_updated_at_id', 'updated_at', 'id'),
+        # Partitions of the duplicate events detection, see DiscordEventsCollector.detect_and_handle_duplicates
+        Index(
+            'ix_event_duplicates',
+            'community_id', 'name', 'start_time', 'end_time', text('md5(description)'), 'created_at', 'id',
+        ),
+    )
     id: UUID = Field(default_factory=uuid4, primary_key=True)
     created_at: datetime = Field(sa_column=Column(DateTime(timezone=True)))
     updated_at: datetime | None = Field(sa_column=Column(DateTime(timezone=True)))
@@ -35,12 +85,14 @@ class Event(BaseModel, table=True):
     community_id: UUID = Field(foreign_key='community.id')
     community: Community | None = Relationship(back_populates="events")
     tags: str | None = Field()
+    tag_list: list[str] | None = Field(default=None, sa_column=tag_list_column())
     external_id: str = Field(unique=True)
     scheduler_type: str = Field()
     status: EventStatus = Field()
     is_private: bool = Field(default=False, index=True)
     is_resonite: bool = Field(default=False, index=True)
     is_vrchat: bool = Field(default=False, index=True)
+    content_hash: str | None = Field(default=None)
 
     @classmethod
     def set_insert_fields(cls, fields_to_update: dict):
@@ -52,6 +104,8 @@ class Event(BaseModel, table=True):
         return fields_to_update
 
 class Stream(BaseModel, table=True):
+    notify_changes: ClassVar[bool] = True
+
     id: UUID = Field(default_factory=uuid4, primary_key=True)
     created_at: datetime = Field(sa_column=Column(DateTime(timezone=True)))
     updated_at: datetime | None = Field(sa_column=Column(DateTime(timezone=True)))
@@ -64,6 +118,7 @@ class Stream(BaseModel, table=True):
     tags: str | None = Field()
     scheduler_type: str = Field()
     status: EventStatus = Field()
+    content_hash: str | None = Field(default=None)
 
     @classmethod
     def set_insert_fields(cls, fields_to_update: dict):
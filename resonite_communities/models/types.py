@@ -1,3 +1,5 @@
+from sqlalchemy import Column, Computed, Text
+from sqlalchemy.dialects.postgresql import ARRAY
 from sqlalchemy.types import TypeDecorator, JSON
 import easydict
 import json
@@ -15,4 +17,18 @@ class EasyDictType(TypeDecorator):
     def process_result_value(self, value, dialect):
         if value:
             return easydict.EasyDict(value)
-        return easydict.EasyDict()
\ No newline at end of file
+        return easydict.EasyDict()
+
+
+# Tags are stored as a comma-separated string, this expression normalize them as an array for the GIN indexes
+TAG_LIST_EXPRESSION = r"array_remove(regexp_split_to_array(lower(trim(coalesce(tags, ''))), '\s*,\s*'), '')"
+
+
+def split_tags(tags: str | None) -> list[str]:
+    """Same normalization of the tags as TAG_LIST_EXPRESSION."""
+    return [tag.strip() for tag in (tags or '').lower().split(',') if tag.strip()]
+
+
+def tag_list_column() -> Column:
+    """Read-only column computed by the database from the `tags` column."""
+    return Column(ARRAY(Text), Computed(TAG_LIST_EXPRESSION, persisted=True))
@@ -27,6 +27,7 @@ from resonite_communities.utils.tools import (
 
 from resonite_communities.utils.config import ConfigManager
 from resonite_communities.utils.db import async_request_session
+from resonite_communities.utils.http import http_client
 
 config_manager = ConfigManager()
 
@@ -50,6 +51,7 @@ async def main():
                 game_id=config.Twitch.game_id,
                 account_name=config.Twitch.account_name,
             )
+            await twitch_client.auth()
 
         discord_client = disnake.Client()
         intents = disnake.Intents.all()
@@ -119,25 +121,27 @@ async def main():
     logger.info('Starting scheduler...')
     scheduler.start()
 
-    if not config.DISCORD_BOT_TOKEN and not config.AD_DISCORD_BOT_TOKEN:
-        logger.warning('No discord bot token configured at all!')
-        return
+    try:
+        if not config.DISCORD_BOT_TOKEN and not config.AD_DISCORD_BOT_TOKEN:
+            logger.warning('No discord bot token configured at all!')
+            return
 
-    logger.info('Starting Discord bots...')
+        logger.info('Starting Discord bots...')
 
-    tasks = []
+        tasks = []
 
-    if config.DISCORD_BOT_TOKEN:
-        tasks.append(bot.start(config.DISCORD_BOT_TOKEN))
+        if config.DISCORD_BOT_TOKEN:
+            tasks.append(bot.start(config.DISCORD_BOT_TOKEN))
 
-    if config.DISCORD_BOT_TOKEN and config.AD_DISCORD_BOT_TOKEN:
-        tasks.append(ad_bot.start(config.AD_DISCORD_BOT_TOKEN))
+        if config.DISCORD_BOT_TOKEN and config.AD_DISCORD_BOT_TOKEN:
+            tasks.append(ad_bot.start(config.AD_DISCORD_BOT_TOKEN))
 
-    if tasks:
-        await asyncio.gather(*tasks)
-
-    # End process
-    logger.info('Stopping...')
+        if tasks:
+            await asyncio.gather(*tasks)
+    finally:
+        # End process, the pooled connections of the collectors are closed
+        logger.info('Stopping...')
+        await http_client.close()
 
 def run_without_reload():
     asyncio.run(main())
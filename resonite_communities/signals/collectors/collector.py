@@ -1,7 +1,16 @@
+import asyncio
+import traceback
+from datetime import datetime, timezone
+
+from sqlalchemy import and_, func
+
+from resonite_communities.models.signal import EventStatus
 from resonite_communities.signals.signal import Signal
 from resonite_communities.utils.db import async_request_session
 
 class Collector(Signal):
+    # Complete the ended signals in a background job, for the sources never telling when their signals are over
+    expire_ended_signals = False
 
     async def init_scheduler(self):
         # You **must** call this method in your collector __init__ method
@@ -12,11 +21,94 @@ class Collector(Signal):
 
         async def job_with_session():
             async with async_request_session():
-                await self.collect()
+                await self.run_collect()
 
         job_id = f'{getattr(self, "collector_name", self.name)}_collect'
         self.scheduler.add_job(
             job_with_session, 'interval', minutes=self.config.REFRESH_INTERVAL,
             id=job_id, replace_existing=True,
         )
-        await self.collect()
\ No newline at end of file
+
+        if self.expire_ended_signals:
+            async def expire_job_with_session():
+                async with async_request_session():
+                    await self.expire_ended()
+
+            self.scheduler.add_job(
+                expire_job_with_session, 'interval', minutes=self.config.REFRESH_INTERVAL,
+                id=f'{getattr(self, "collector_name", self.name)}_expire', replace_existing=True,
+            )
+
+        await self.run_collect()
+
+    async def run_collect(self):
+        """Run a collect cycle and report the signals it wrote."""
+        self.upsert_counts.clear()
+        await self.collect()
+        if self.upsert_counts:
+            self.logger.info(
+                f"{self.upsert_counts['inserted']} signals inserted, {self.upsert_counts['changed']} changed and "
+                f"{self.upsert_counts['unchanged']} unchanged"
+            )
+
+    async def collect_communities(self, collect_community, communities: list) -> dict:
+        """ Run `collect_community(community)` for each community concurrently.
+
+        At most COLLECTOR_CONCURRENCY communities are collected at the same time, each in its own database session
+        as the session of the context can't be used by concurrent tasks. A community taking more than
+        COLLECTOR_TIMEOUT seconds or failing is logged and doesn't stop the others.
+
+        Returns:
+            dict: The result of `collect_community` by id of community, for the communities collected.
+        """
+        semaphore = asyncio.Semaphore(int(self.config.COLLECTOR_CONCURRENCY))
+        timeout = float(self.config.COLLECTOR_TIMEOUT)
+
+        async def collect_in_session(community):
+            async with async_request_session():
+                return await collect_community(community)
+
+        async def run(community):
+            async with semaphore:
+                try:
+                    results[community.id] = await asyncio.wait_for(collect_in_session(community), timeout)
+                except asyncio.TimeoutError:
+                    self.logger.error(f"Timeout processing community {community.name} after {timeout}s")
+                except Exception as e:
+                    self.logger.error(f"Error processing community {community.name}: {str(e)}")
+                    self.logger.error(f"Traceback: {traceback.format_exc()}")
+
+        results = {}
+        await asyncio.gather(*(run(community) for community in communities))
+        return results
+
+    async def complete_ended(self, *filters) -> int:
+        """ Mark COMPLETED the READY and ACTIVE signals ended, in one statement.
+
+        A signal is ended once its end time is passed, or its start time when it has no end time.
+
+        Args:
+            filters: Other conditions the signals to complete must match.
+
+        Returns:
+            int: The number of completed signals.
+        """
+        model = type(self.model)
+        return await model.update(
+            filters=and_(
+                model.status.in_([EventStatus.ACTIVE, EventStatus.READY]),
+                func.coalesce(model.end_time, model.start_time) < datetime.now(timezone.utc),
+                *filters,
+            ),
+            _returning=False,
+            status=EventStatus.COMPLETED,
+        )
+
+    async def expire_ended(self):
+        """Complete the ended signals of the communities of the collector."""
+        community_ids = [community.id for community in self.communities]
+        if not community_ids:
+            return
+        completed = await self.complete_ended(type(self.model).community_id.in_(community_ids))
+        if completed:
+            self.logger.info(f'Completed {completed} ended signals')
@@ -1,16 +1,16 @@
 from dateutil.parser import parse
-import requests
-import traceback
 
 from resonite_communities.models.community import Community, CommunityPlatform
 from resonite_communities.models.signal import EventStatus
 from resonite_communities.signals.collectors.event import EventsCollector
 from resonite_communities.signals import SignalSchedulerType
+from resonite_communities.utils.http import http_client
 
 
 class CommunityEventsCollector(EventsCollector):
     scheduler_type = SignalSchedulerType.APSCHEDULER
     platform = CommunityPlatform.JSON_COMMUNITY_EVENT
+    expire_ended_signals = True
 
     def __init__(self, config, services, scheduler):
         super().__init__(config, services, scheduler)
@@ -27,6 +27,8 @@ class CommunityEventsCollector(EventsCollector):
                     (Community.platform == community.platform) &
                     (Community.platform_on_remote == community.platform_on_remote)
                 ),
+                _returning=False,
+                _only_changed=True,
                 monitored=True,
             )
             self.communities.append(community)
@@ -35,48 +37,53 @@ class CommunityEventsCollector(EventsCollector):
         await super().collect()
         self.logger.info(f'Starting collecting signals')
         await self.update_communities()
-        for community in self.communities:
-            try:
-                self.logger.info(f'Collecting signals for {community.name}')
-                if not community.config.get('community_configurator'):
-                    self.logger.error(f"Invalid config for community '{community.name}': {community.config}")
-                    continue
-                community_configurator = (await Community.find(id=community.config.community_configurator))[0]
-                if not community_configurator.config.get('events_url'):
-                    self.logger.error(f"Invalid config for configurator '{community_configurator.name}': missing events_url")
-                    continue
+        await self.collect_communities(self.collect_community, self.communities)
+        self.logger.info(f'Finished collecting signals')
+
+    async def collect_community(self, community):
+        self.logger.info(f'Collecting signals for {community.name}')
+        if not community.config.get('community_configurator'):
+            self.logger.error(f"Invalid config for community '{community.name}': {community.config}")
+            return
+        community_configurator = (await Community.find(id=community.config.community_configurator))[0]
+        if not community_configurator.config.get('events_url'):
+            self.logger.error(f"Invalid config for configurator '{community_configurator.name}': missing events_url")
+            return
 
-                response = requests.get(f"{community_configurator.config.events_url}/v2/events")
+        # The configurator events are shared by its communities, each one keep its own validators
+        events_url = f"{community_configurator.config.events_url}/v2/events"
+        validators_key = (community.id, events_url)
+        response = await http_client.get_if_modified(events_url, key=validators_key)
+        if response is None:
+            self.logger.info(f"Events of {community.name} not modified")
+            return
 
-                if response.status_code != 200:
-                    raise ValueError(f"{response.status_code} from server: {response.text}")
+        if response.status_code != 200:
+            raise ValueError(f"{response.status_code} from server: {response.text}")
 
-                for event in response.json():
-                    if not event['community_name'] == community.name:
-                        continue
-                    await self.model.upsert(
-                        _filter_field='external_id',
-                        _filter_value=event['id'],
-                        name=event['name'],
-                        description=event['description'],
-                        session_image=event['session_image'],
-                        location=event['location_str'],
-                        location_web_session_url=event['location_web_session_url'],
-                        location_session_url=event['location_session_url'],
-                        start_time=parse(event['start_time']),
-                        end_time=parse(event['end_time']) if event['end_time'] else None,
-                        community_id=community.id,
-                        tags=event['tags'],
-                        external_id=event['id'],
-                        scheduler_type=self.scheduler_type.name,
-                        status=event['status'],
-                        created_at_external=None,
-                        is_private='private' in event['tags'],
-                        is_resonite='resonite' in event['tags'],
-                        is_vrchat='vrchat' in event['tags'],
-                    )
-            except Exception as e:
-                self.logger.error(f"Error processing community {community.name}: {str(e)}")
-                self.logger.error(f"Traceback: {traceback.format_exc()}")
+        rows = []
+        for event in response.json():
+            if not event['community_name'] == community.name:
                 continue
-        self.logger.info(f'Finished collecting signals')
+            rows.append(dict(
+                name=event['name'],
+                description=event['description'],
+                session_image=event['session_image'],
+                location=event['location_str'],
+                location_web_session_url=event['location_web_session_url'],
+                location_session_url=event['location_session_url'],
+                start_time=parse(event['start_time']),
+                end_time=parse(event['end_time']) if event['end_time'] else None,
+                community_id=community.id,
+                tags=event['tags'],
+                external_id=event['id'],
+                scheduler_type=self.scheduler_type.name,
+                status=event['status'],
+                created_at_external=None,
+                is_private='private' in event['tags'],
+                is_resonite='resonite' in event['tags'],
+                is_vrchat='vrchat' in event['tags'],
+            ))
+
+        await self.upsert_signals(rows)
+        http_client.store_validators(validators_key, response)
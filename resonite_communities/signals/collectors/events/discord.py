@@ -1,10 +1,9 @@
 import re
 from typing import Any
-from datetime import datetime, timezone
 import traceback
 
 from disnake.ext import commands
-from sqlalchemy import select, func
+from sqlalchemy import ARRAY, String, all_, bindparam, case, select, func
 from sqlmodel import Session
 
 from resonite_communities.utils.db import engine, async_request_session
@@ -71,6 +70,8 @@ class DiscordEventsCollector(EventsCollector, commands.Cog):
                         (Community.platform == CommunityPlatform.DISCORD) &
                         (Community.platform_on_remote == None)
                     ),
+                    _returning=False,
+                    _only_changed=True,
                     monitored=True,
                     configured=community.configured,
                     enabled=community.enabled,
@@ -97,24 +98,6 @@ class DiscordEventsCollector(EventsCollector, commands.Cog):
                 community.config["bot"] = guild_bot
                 self.communities.append(community)
 
-    def is_cancel(self, local_event):
-        """ Check if an event is considered as canceled.
-
-        Discord never send past or deleted event, but we do still store all of them.
-        We need to know if an event is being canceled, for that we check the following parameters:
-            - There is an end date AND it's in the future
-            - There is no end date AND the start date is in the future
-        Any event in the past that are considered as canceled we can't have the information in the
-        current process.
-
-        """
-        local_event_end_time = getattr(local_event, 'end_time')
-        if (
-                (local_event_end_time and local_event.end_time < datetime.now(timezone.utc)) or
-                (not local_event_end_time and local_event.start_time < datetime.now(timezone.utc))
-        ):
-            return True
-
     def determine_event_visibility(self, event: Any, community: Any) -> str:
         """Determine if an event should be tagged as 'public' or 'private'.
 
@@ -148,121 +131,69 @@ class DiscordEventsCollector(EventsCollector, commands.Cog):
         # Secure default: private for all other cases
         return 'private'
 
-    async def detect_and_handle_duplicates(self, community: Any) -> None:
-            """ Detect and handle duplicate events for a given community.
-
-            This function identifies duplicate events in the database based on their
-            name, start time, end time, and description. It cancels all but one of the
-            duplicate events and updates the session image if necessary.
-
-            Args:
-                community (Community): The community object for which duplicate events
-                                    are being detected and handled.
-
-            Steps:
-                1. Detect duplicate events using a subquery.
-                2. Retrieve all duplicate events from the database.
-                3. Iterate through the duplicates and:
-                    - Keep the first event as the unique one.
-                    - Cancel all other duplicates.
-                    - Update the session image if available.
-
-            Notes:
-                - Relies on SQLAlchemy and SQLModel for database operations.
-                - Uses `EventStatus` to filter events that are READY, PENDING, or ACTIVE.
-            """
-
-            # Detect all the duplicate events
-            duplicate_subquery = (
-                select(
-                    Event.name,
-                    Event.start_time,
-                    Event.end_time,
-                    Event.description)
-                .where(
-                    Event.community_id == community.id,
-                    Event.status.in_([
-                        EventStatus.READY,
-                        EventStatus.PENDING,
-                        EventStatus.ACTIVE
-                    ]),
-                )
-                .group_by(
-                    Event.name,
-                    Event.start_time,
-                    Event.end_time,
-                    Event.description
-                )
-                .having(func.count() > 1)  # Only include groups with more than one event
-            ).subquery()
-
-            # Filter all the duplicate events
-            duplicates_query = (
-                select(
-                    Event.id,
-                    Event.name,
-                    Event.status,
-                    Event.session_image,
-                    Event.start_time,
-                    Event.end_time,
-                    Event.description)
-                .where(
-                    (Event.name == duplicate_subquery.c.name) &
-                    (Event.start_time == duplicate_subquery.c.start_time) &
-                    (Event.end_time == duplicate_subquery.c.end_time) &
-                    (Event.description == duplicate_subquery.c.description)
-                )
-                .where(
-                    Event.community_id == community.id,
-                    Event.status.in_([EventStatus.READY, EventStatus.PENDING, EventStatus.ACTIVE]),
-                )
-            )
+    async def detect_and_handle_duplicates(self, communities: list[Any]) -> None:
+        """ Detect and handle the duplicate events of the collected communities at once.
 
-            from resonite_communities.utils.db import get_current_async_session
+        Events of the same community with the same name, start time, end time and description are duplicates.
+        A single UPDATE statement ranks the READY, PENDING and ACTIVE events of each group of duplicates with
+        ROW_NUMBER(), keeps the oldest one and cancels the others. The session image of a group, if any of its
+        events have one, is set on all of them.
 
-            session = await get_current_async_session()
-            result = await session.execute(duplicates_query)
-            duplicate_events = result.mappings().all()
+        The descriptions are compared by their md5 hash, as indexed by `ix_event_duplicates`. As values are
+        compared with `=`, the events without end time or description are never duplicates.
 
-            if not len(duplicate_events):
-                return
-
-            self.logger.info(f"Processing {len(duplicate_events)} duplicate events for community {community.id}")
-
-            last_unique_event_identifier = None
-            first_duplicate_event = None
-            for duplicate_event in duplicate_events:
-
-                # Generate a unique identifier for each event based on its attributes
-                unique_event_identifier = f"{duplicate_event['name'].replace('\n', '').replace(' ', '')}_{str(duplicate_event['start_time']).replace('\n', '').replace(' ', '')}_{str(duplicate_event['end_time']).replace('\n', '').replace(' ', '')}_{duplicate_event['description'].replace('\n', '').replace(' ', '')}"
-
-                if last_unique_event_identifier != unique_event_identifier:
-                    first_duplicate_event = duplicate_event['id']
-
-                if last_unique_event_identifier != unique_event_identifier:
-                    await self.model.update(
-                        filters=(
-                            (Event.id != first_duplicate_event) &
-                            (Event.name == duplicate_event['name']) &
-                            (Event.start_time == duplicate_event['start_time']) &
-                            (Event.end_time == duplicate_event['end_time']) &
-                            (Event.description == duplicate_event['description'])
-                        ),
-                        status=EventStatus.CANCELED,
-                    )
+        Args:
+            communities (list[Community]): The communities of the collector to check, the events of the other
+                collectors are left alone.
+        """
+        community_ids = [community.id for community in communities]
+        if not community_ids:
+            return
+
+        duplicate_group = (
+            Event.community_id,
+            Event.name,
+            Event.start_time,
+            Event.end_time,
+            func.md5(Event.description),
+        )
+        ranked_events = (
+            select(
+                Event.id,
+                func.row_number().over(
+                    partition_by=duplicate_group,
+                    order_by=(Event.created_at, Event.id),
+                ).label('position'),
+                func.count().over(partition_by=duplicate_group).label('duplicates'),
+                func.max(Event.session_image).over(partition_by=duplicate_group).label('session_image'),
+            )
+            .where(
+                Event.community_id.in_(community_ids),
+                Event.status.in_([EventStatus.READY, EventStatus.PENDING, EventStatus.ACTIVE]),
+                # PARTITION BY group the NULL values together
+                Event.end_time.isnot(None),
+                Event.description.isnot(None),
+            )
+        ).subquery()
 
-                if duplicate_event['session_image']:
-                    await self.model.update(
-                        filters=(
-                            (Event.name == duplicate_event['name']) &
-                            (Event.start_time == duplicate_event['start_time']) &
-                            (Event.end_time == duplicate_event['end_time']) &
-                            (Event.description == duplicate_event['description'])
-                        ),
-                        session_image=duplicate_event['session_image'],
+        updated = await self.model.update(
+            filters=(
+                (Event.id == ranked_events.c.id) &
+                (ranked_events.c.duplicates > 1) &
+                (
+                    (ranked_events.c.position > 1) |
+                    Event.session_image.is_distinct_from(
+                        func.coalesce(ranked_events.c.session_image, Event.session_image)
                     )
+                )
+            ),
+            _returning=False,
+            status=case((ranked_events.c.position > 1, EventStatus.CANCELED), else_=Event.status),
+            session_image=func.coalesce(ranked_events.c.session_image, Event.session_image),
+        )
 
-                last_unique_event_identifier = unique_event_identifier
+        if updated:
+            self.logger.info(f"Processed {updated} duplicate events")
 
     async def upsert_events(self, events: list[Any], community: Any) -> None:
         """ Process and upsert a list of events for a specific community into the database.
@@ -287,6 +218,7 @@ class DiscordEventsCollector(EventsCollector, commands.Cog):
             starting with '+' followed by key:value pairs. Matched lines are removed
             from the description after processing.
         """
+        rows = []
         for event in events:
 
             tags = {tag for tag in (community.tags or '').split(',') if tag != 'public' and tag != 'private'}
@@ -332,9 +264,7 @@ class DiscordEventsCollector(EventsCollector, commands.Cog):
             if 'lang' not in tags and community.languages:
                 tags.add(f"lang:{community.languages.split(',')[0]}")
 
-            await self.model.upsert(
-                _filter_field='external_id',
-                _filter_value=str(event.id),
+            rows.append(dict(
                 name=event.name,
                 description=description,
                 session_image=event.image.url if event.image else None,
@@ -343,7 +273,7 @@ class DiscordEventsCollector(EventsCollector, commands.Cog):
                 location_session_url=self.get_location_session_url(event.description),
                 start_time=event.scheduled_start_time,
                 end_time=event.scheduled_end_time,
-                community_id= (await Community.find(external_id=community.external_id))[0].id,
+                community_id=community.id,
                 tags=",".join(tags),
                 external_id=str(event.id),
                 scheduler_type=self.scheduler_type.name,
@@ -351,59 +281,75 @@ class DiscordEventsCollector(EventsCollector, commands.Cog):
                 is_private='private' in tags,
                 is_resonite='resonite' in tags,
                 is_vrchat='vrchat' in tags,
-            )
+            ))
+
+        await self.upsert_signals(rows)
 
-    async def detect_and_handle_passed_events(self, events: list[Any], community: Any) -> None:
+    async def detect_and_handle_passed_events(self, events_ids: dict[Any, list[str]]) -> None:
         """ Detect events that are no longer active in the Discord and mark them as completed.
 
-        If an event exists in the database but is not present in Discord events list,
-        and passes the cancellation check, it will be marked as COMPLETED.
+        If an event exists in the database but is not present in the Discord events list of its community,
+        and is ended (see `complete_ended`), it will be marked as COMPLETED. All the
+        communities are handled with a single statement once the collection cycle is done.
 
         Args:
-            events (_type_): List of event objects from Discord.
-            community (_type_): The community object which events are associated with.
+            events_ids (dict[Any, list[str]]): Ids of the events currently in Discord, by id of the collected
+                community. Only the events of these communities are checked.
         """
-        events_id = {event.id:event for event in events}
+        if not events_ids:
+            return
 
-        for local_event in await self.model.find(
-                scheduler_type=self.scheduler_type.name,
-                community_id=(await Community.find(external_id=community.external_id))[0].id,
-                status__in=(EventStatus.ACTIVE, EventStatus.READY),
-        ):
-
-            # If an event in the database no longer exists in Discord
-            # and passes the cancellation check, mark it as COMPLETED
-            if int(local_event.external_id) not in events_id and self.is_cancel(local_event):
-                await self.model.update(
-                    filters=(self.model.external_id == local_event.external_id),
-                    status=EventStatus.COMPLETED
-                )
+        seen_events_ids = [event_id for community_events_ids in events_ids.values() for event_id in community_events_ids]
+        # The external ids are unique, the ids seen in all the communities can be compared at once
+        completed = await self.complete_ended(
+            Event.scheduler_type == self.scheduler_type.name,
+            Event.community_id.in_(list(events_ids)),
+            Event.external_id != all_(bindparam('seen_events_ids', seen_events_ids, type_=ARRAY(String))),
+        )
+
+        if completed:
+            self.logger.info(f"Completed {completed} passed events")
 
     async def collect(self):
         await super().collect()
         self.logger.info(f'Starting collecting signals')
         await self.update_communities()
+        communities = []
         for community in self.communities:
             if not community.configured:
                 self.logger.warning(f'Community {community.name} not configured, skipping')
                 continue
+            communities.append(community)
 
-            try:
-                self.logger.info(f'Collecting signals for {community.name}')
+        events_ids = await self.collect_communities(self.collect_community, communities)
 
-                events = community.config['bot'].scheduled_events
+        try:
+            await self.detect_and_handle_passed_events(events_ids)
+        except Exception as e:
+            self.logger.error(f"Error processing passed events: {str(e)}")
+            self.logger.error(f"Traceback: {traceback.format_exc()}")
 
-                await self.upsert_events(events, community)
+        try:
+            await self.detect_and_handle_duplicates(communities)
+        except Exception as e:
+            self.logger.error(f"Error processing duplicate events: {str(e)}")
+            self.logger.error(f"Traceback: {traceback.format_exc()}")
 
-                await self.detect_and_handle_passed_events(events, community)
+        self.logger.info(f'Finished collecting signals')
 
-                await self.detect_and_handle_duplicates(community)
-            except Exception as e:
-                self.logger.error(f"Error processing community {community.name}: {str(e)}")
-                self.logger.error(f"Traceback: {traceback.format_exc()}")
-                continue
+    async def collect_community(self, community: Any) -> list[str]:
+        """ Upsert the current Discord events of a community.
 
-        self.logger.info(f'Finished collecting signals')
+        Returns:
+            list[str]: Ids of the events of the community in Discord.
+        """
+        self.logger.info(f'Collecting signals for {community.name}')
+
+        events = community.config['bot'].scheduled_events
+
+        await self.upsert_events(events, community)
+
+        return [str(event.id) for event in events]
 
     @commands.Cog.listener()
     async def on_ready(self):
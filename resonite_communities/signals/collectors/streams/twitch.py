@@ -1,8 +1,6 @@
 from dateutil.parser import parse
-import traceback
 
 from resonite_communities.models.community import CommunityPlatform, Community
-from resonite_communities.models.signal import EventStatus
 from resonite_communities.signals import SignalSchedulerType
 
 from resonite_communities.signals.collectors.stream import StreamsCollector
@@ -11,6 +9,7 @@ from resonite_communities.signals.collectors.stream import StreamsCollector
 class TwitchStreamsCollector(StreamsCollector):
     scheduler_type = SignalSchedulerType.APSCHEDULER
     platform = CommunityPlatform.TWITCH
+    expire_ended_signals = True
     broadcasters = []
 
     def __init__(self, config, services, scheduler):
@@ -23,19 +22,21 @@ class TwitchStreamsCollector(StreamsCollector):
         self.broadcasters = []
         if not self.services.twitch.ready:
             return
-        for streamer in await Community.find(platform__in=[CommunityPlatform.TWITCH]):
+        streamers = await Community.find(platform__in=[CommunityPlatform.TWITCH])
+        broadcasters_info = await self.services.twitch.get_broadcasters_info(streamers)
+        for streamer in streamers:
             broadcaster = dict()
             broadcaster['config'] = streamer
-            try:
-                broadcaster['twitch'] = self.services.twitch.get_broadcaster_info(streamer)
-            except ValueError as exc:
-                self.logger.warning(exc)
+            if streamer.external_id not in broadcasters_info:
+                self.logger.warning(f'No Twitch user found for the external_id {streamer.external_id}')
                 continue
+            broadcaster['twitch'] = broadcasters_info[streamer.external_id]
             if not 'followers' in broadcaster['twitch'] or not 'profile_image_url' in broadcaster['twitch']:
                 continue
             await Community.upsert(
                 _filter_field=['external_id', 'platform'],
                 _filter_value=[streamer.external_id, CommunityPlatform.TWITCH],
+                _only_changed=True,
                 name=streamer.name,
                 platform=CommunityPlatform.TWITCH,
                 monitored=streamer.monitored,
@@ -46,6 +47,7 @@ class TwitchStreamsCollector(StreamsCollector):
             if not any(b.get('id') == broadcaster['twitch']['id'] for b in self.broadcasters):
                 self.broadcasters.append(broadcaster)
             self.communities.append(streamer)
+        self.update_community_map()
 
     async def collect(self):
         await super().collect()
@@ -54,23 +56,27 @@ class TwitchStreamsCollector(StreamsCollector):
         self.logger.info('Update streams collector')
         await self.update_communities()
 
-        for broadcaster in self.broadcasters:
-            try:
-                broadcaster_streams = self.services.twitch.get_schedule(broadcaster['twitch'])
-                for broadcaster_stream in broadcaster_streams:
-                    await self.model.upsert(
-                        _filter_field='external_id',
-                        _filter_value=broadcaster_stream['id'],
-                        name=broadcaster_stream['title'],
-                        start_time=parse(broadcaster_stream['start_time']),
-                        end_time=parse(broadcaster_stream['end_time']),
-                        community_id=(await Community.find(external_id=broadcaster['config'].external_id))[0].id,
-                        tags=",".join(broadcaster.get('config', {}).tags),
-                        external_id=broadcaster_stream['id'],
-                        scheduler_type=self.scheduler_type.name,
-                        status=EventStatus.READY,
-                    )
-            except Exception as e:
-                self.logger.error(f"Error processing community {broadcaster_stream['id']}: {str(e)}")
-                self.logger.error(f"Traceback: {traceback.format_exc()}")
-                continue
+        schedules = await self.services.twitch.get_schedules([broadcaster['twitch'] for broadcaster in self.broadcasters])
+        broadcasters = {broadcaster['config'].id: broadcaster for broadcaster in self.broadcasters}
+
+        async def upsert_streams(community):
+            broadcaster = broadcasters[community.id]
+            broadcaster_streams = schedules[broadcaster['twitch']['id']]
+            if isinstance(broadcaster_streams, Exception):
+                raise broadcaster_streams
+            community_id = self.get_community(CommunityPlatform.TWITCH, community.external_id).id
+            rows = []
+            for broadcaster_stream in broadcaster_streams:
+                rows.append(dict(
+                    name=broadcaster_stream['title'],
+                    start_time=parse(broadcaster_stream['start_time']),
+                    end_time=parse(broadcaster_stream['end_time']),
+                    community_id=community_id,
+                    tags=",".join(community.tags),
+                    external_id=broadcaster_stream['id'],
+                    scheduler_type=self.scheduler_type.name,
+                ))
+            await self.upsert_signals(rows)
+
+        # Written by community, a failing community doesn't stop the others
+        await self.collect_communities(upsert_streams, [broadcaster['config'] for broadcaster in self.broadcasters])
@@ -1,3 +1,4 @@
+from collections import Counter
 from copy import deepcopy
 import atexit
 
@@ -5,6 +6,7 @@ from resonite_communities.models.community import Community, CommunityPlatform
 from resonite_communities.signals import SignalSchedulerType
 from resonite_communities.utils.logger import get_logger
 from resonite_communities.models.base import BaseModel
+from resonite_communities.models.signal import content_hash
 
 class Signal:
     scheduler_type = None
@@ -18,6 +20,10 @@ class Signal:
         self.services = services
         self.scheduler = scheduler
         self.communities = []
+        # Communities of the current run by (platform, external_id), see update_community_map
+        self.community_map = {}
+        # Signals inserted, changed and unchanged by upsert_signals during the current collect
+        self.upsert_counts = Counter()
 
         self._validate_scheduler_type()
         self._validate_platform()
@@ -48,6 +54,17 @@ class Signal:
     def update_communities(self):
         raise ValueError("Not implemented")
 
+    def update_community_map(self):
+        """Index the communities of the run, to be called once they are updated in `update_communities`."""
+        self.community_map = {
+            (community.platform, community.external_id): community
+            for community in self.communities
+        }
+
+    def get_community(self, platform, external_id):
+        """Get a community of the run without querying the database."""
+        return self.community_map[(platform, external_id)]
+
     async def add(self, **data):
         return await self.model.add(**data)
 
@@ -60,5 +77,44 @@ class Signal:
     async def upsert(self, _filter_field, _filter_value, **data):
         return await self.model.upsert(_filter_field, _filter_value, **data)
 
+    async def bulk_upsert(self, rows, conflict_cols, **options):
+        return await self.model.bulk_upsert(rows, conflict_cols, **options)
+
+    async def upsert_signals(self, rows: list[dict]) -> Counter:
+        """ Upsert the collected signals on their external id, only writing the new and changed ones.
+
+        The content hash of each row is compared to the one stored with the signal, read with a single query, so the
+        signals unchanged since the last collect are not written again.
+
+        Returns:
+            Counter: The number of signals inserted, changed and unchanged.
+        """
+        # Same as bulk_upsert, the last row of an external id is the one written
+        rows = list({row['external_id']: row for row in rows}.values())
+        for row in rows:
+            row['content_hash'] = content_hash(row)
+
+        stored = await self.model.find(
+            external_id__in=[row['external_id'] for row in rows],
+            __columns=['external_id', 'content_hash'],
+        ) if rows else []
+        stored_hashes = {signal['external_id']: signal['content_hash'] for signal in stored}
+
+        counts = Counter(inserted=0, changed=0, unchanged=0)
+        to_write = []
+        for row in rows:
+            if row['external_id'] not in stored_hashes:
+                counts['inserted'] += 1
+            elif stored_hashes[row['external_id']] != row['content_hash']:
+                counts['changed'] += 1
+            else:
+                counts['unchanged'] += 1
+                continue
+            to_write.append(row)
+
+        await self.model.bulk_upsert(to_write, conflict_cols='external_id')
+        self.upsert_counts.update(counts)
+        return counts
+
     async def delete(self, **filter):
         return await self.model.delete(**filter)
@@ -52,6 +52,16 @@ class ConfigManager:
             'API_WORKERS',
             'MAX_CONCURRENT_REQUESTS',
             'CACHE_URL',
+            'CACHE_MAX_ENTRIES',
+            'CACHE_MAX_BYTES',
+            'CACHE_TTL',
+            'CACHE_STALE_WHILE_REVALIDATE',
+            'CACHE_STALE_IF_ERROR',
+            'CACHE_FRAGMENTS_MAX_ENTRIES',
+            'EVENTS_INDEX_POLL_INTERVAL',
+            'COLLECTOR_CONCURRENCY',
+            'COLLECTOR_TIMEOUT',
+            'CHANGES_SETTLE_DELAY',
             'DB_APPLICATION_NAME',
         ]
         required_vars = [
@@ -75,6 +85,16 @@ class ConfigManager:
             'WEB_WORKERS': 3,
             'API_WORKERS': 3,
             'MAX_CONCURRENT_REQUESTS': 15,
+            'CACHE_MAX_ENTRIES': 1000,
+            'CACHE_MAX_BYTES': 64 * 1024 * 1024,
+            'CACHE_TTL': 300,
+            'CACHE_STALE_WHILE_REVALIDATE': 0,
+            'CACHE_STALE_IF_ERROR': 0,
+            'CACHE_FRAGMENTS_MAX_ENTRIES': 20000,
+            'EVENTS_INDEX_POLL_INTERVAL': 60,
+            'COLLECTOR_CONCURRENCY': 4,
+            'COLLECTOR_TIMEOUT': 120,
+            'CHANGES_SETTLE_DELAY': 5,
         }
 
         config = {}
@@ -0,0 +1,150 @@
+import asyncio
+from typing import Any, Optional
+from urllib.parse import urlsplit
+
+import httpx
+
+from resonite_communities.utils.logger import get_logger
+
+logger = get_logger('HTTPClient')
+
+TIMEOUT = httpx.Timeout(15.0, connect=5.0)
+MAX_CONNECTIONS = 100
+# Requests sent at the same time to a single host, the collectors fetch many feeds from the same servers
+MAX_CONNECTIONS_PER_HOST = 6
+RETRIES = 3
+RETRY_BACKOFF = 0.5
+RETRY_STATUSES = {429, 502, 503, 504}
+# Longest Retry-After followed, a longer one is handled as a failed request
+MAX_RETRY_AFTER = 30
+
+
+class HTTPClient:
+    """ Async HTTP client shared by the collectors and the API, on top of a pooled `httpx.AsyncClient`.
+
+    The requests are retried on connection errors, timeouts and the `RETRY_STATUSES` responses, with an exponential
+    backoff or the delay of the Retry-After header. The client is created on first use, in the running event loop.
+    """
+
+    def __init__(
+        self,
+        timeout: httpx.Timeout = TIMEOUT,
+        max_connections: int = MAX_CONNECTIONS,
+        max_connections_per_host: int = MAX_CONNECTIONS_PER_HOST,
+        retries: int = RETRIES,
+        retry_backoff: float = RETRY_BACKOFF,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ):
+        self.timeout = timeout
+        self.max_connections = max_connections
+        self.max_connections_per_host = max_connections_per_host
+        self.retries = retries
+        self.retry_backoff = retry_backoff
+        self.transport = transport
+        self._client: Optional[httpx.AsyncClient] = None
+        self._hosts: dict[str, asyncio.Semaphore] = {}
+        # Validators of the last response processed, by key, see get_if_modified
+        self._validators: dict[Any, dict[str, str]] = {}
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                timeout=self.timeout,
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections,
+                    keepalive_expiry=30.0,
+                ),
+                follow_redirects=True,
+                transport=self.transport,
+            )
+        return self._client
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def _host_semaphore(self, url: str) -> asyncio.Semaphore:
+        host = urlsplit(str(url)).netloc
+        if host not in self._hosts:
+            self._hosts[host] = asyncio.Semaphore(self.max_connections_per_host)
+        return self._hosts[host]
+
+    def _retry_delay(self, attempt: int, response: Optional[httpx.Response] = None) -> Optional[float]:
+        """Get the delay before retrying, None when the request must not be retried."""
+        if attempt >= self.retries:
+            return None
+        delay = self.retry_backoff * 2 ** attempt
+        if response is not None and 'Retry-After' in response.headers:
+            try:
+                delay = float(response.headers['Retry-After'])
+            except ValueError:
+                pass
+            if delay > MAX_RETRY_AFTER:
+                return None
+        return delay
+
+    async def request(self, method: str, url: str, **kwargs) -> httpx.Response:
+        """Send a request, retried on the transient errors. The last response or error is returned or raised."""
+        attempt = 0
+        while True:
+            try:
+                async with self._host_semaphore(url):
+                    response = await self.client.request(method, url, **kwargs)
+            except httpx.TransportError as e:
+                delay = self._retry_delay(attempt)
+                if delay is None:
+                    raise
+                logger.warning(f"{method} {url} failed ({type(e).__name__}: {e}), retrying in {delay}s")
+            else:
+                if response.status_code not in RETRY_STATUSES:
+                    return response
+                delay = self._retry_delay(attempt, response)
+                if delay is None:
+                    return response
+                logger.warning(f"{method} {url} returned {response.status_code}, retrying in {delay}s")
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    async def get(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request('GET', url, **kwargs)
+
+    async def post(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request('POST', url, **kwargs)
+
+    async def get_if_modified(self, url: str, key: Any = None, **kwargs) -> Optional[httpx.Response]:
+        """ Conditional GET, None is returned when the resource didn't change since the last response processed.
+
+        The ETag and Last-Modified of the last response processed for `key` (the url by default) are sent as
+        If-None-Match and If-Modified-Since. They are only kept once the response is processed, see
+        `store_validators`, so a response failing to be processed is fully sent again the next time.
+        """
+        key = url if key is None else key
+        headers = dict(kwargs.pop('headers', None) or {})
+        validators = self._validators.get(key, {})
+        if 'ETag' in validators:
+            headers['If-None-Match'] = validators['ETag']
+        if 'Last-Modified' in validators:
+            headers['If-Modified-Since'] = validators['Last-Modified']
+
+        response = await self.get(url, headers=headers, **kwargs)
+        if response.status_code == 304:
+            return None
+        return response
+
+    def store_validators(self, key: Any, response: httpx.Response):
+        """Keep the validators of a processed response for the next `get_if_modified` of `key` (or url)."""
+        validators = {
+            header: response.headers[header]
+            for header in ('ETag', 'Last-Modified')
+            if header in response.headers
+        }
+        if validators:
+            self._validators[key] = validators
+        else:
+            self._validators.pop(key, None)
+
+
+http_client = HTTPClient()
@@ -0,0 +1,125 @@
+import asyncio
+import json
+from typing import Any, Awaitable, Callable
+
+import asyncpg
+from sqlalchemy import func, select
+
+from resonite_communities.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+CHANGES_CHANNEL = 'signals_changes'
+
+# PostgreSQL refuse NOTIFY payloads bigger than 8000 bytes
+MAX_PAYLOAD_SIZE = 7900
+
+
+def build_changes_payload(table: str, ids: list[Any], community_ids: list[Any]) -> str:
+    """ Build the payload of a change notification.
+
+    When there is too many rows changed at once for the payload to fit in a notification, the rows ids and then
+    the communities ids are dropped. A missing list of ids must be understood by the listeners as "anything of
+    this table may have changed".
+    """
+    change = {
+        'table': table,
+        'ids': sorted({str(id) for id in ids}),
+        'community_ids': sorted({str(community_id) for community_id in community_ids if community_id}),
+    }
+    payload = json.dumps(change)
+    if len(payload) > MAX_PAYLOAD_SIZE:
+        change['ids'] = None
+        payload = json.dumps(change)
+    if len(payload) > MAX_PAYLOAD_SIZE:
+        change['community_ids'] = None
+        payload = json.dumps(change)
+    return payload
+
+
+async def notify_changes(session, table: str, ids: list[Any], community_ids: list[Any]):
+    """ Queue a change notification in the current transaction of the session.
+
+    PostgreSQL only deliver the notification to the listeners when the transaction is committed, nothing is
+    sent if it's rolled back.
+    """
+    payload = build_changes_payload(table, ids, community_ids)
+    await session.execute(select(func.pg_notify(CHANGES_CHANNEL, payload)))
+
+
+class ChangesListener:
+    """ Listen to the change notifications sent by the database writes and dispatch them to the subscribers.
+
+    The listener use its own connection, outside of the SQLAlchemy pool, as a LISTEN is bound to the connection
+    for all its life. The notifications sent while the listener is not connected are lost, so each time the
+    connection is established the subscribers receive a reset change (`{'table': None}`) meaning anything may
+    have changed.
+    """
+
+    def __init__(self, dsn: str, channel: str = CHANGES_CHANNEL, reconnect_delay: float = 5):
+        self.dsn = dsn
+        self.channel = channel
+        self.reconnect_delay = reconnect_delay
+        self.subscribers: list[Callable[[dict], Awaitable[None]]] = []
+        self._connection = None
+        self._task = None
+        self._connection_lost = None
+        self._dispatches = set()
+
+    def subscribe(self, callback: Callable[[dict], Awaitable[None]]):
+        self.subscribers.append(callback)
+
+    async def dispatch(self, change: dict):
+        for callback in self.subscribers:
+            try:
+                await callback(change)
+            except Exception as e:
+                logger.error(f"Error in changes subscriber {callback.__name__}: {e}")
+
+    def _on_notification(self, connection, pid, channel, payload):
+        try:
+            change = json.loads(payload)
+        except json.JSONDecodeError:
+            logger.warning(f"Invalid change notification: {payload}")
+            return
+        task = asyncio.get_running_loop().create_task(self.dispatch(change))
+        self._dispatches.add(task)
+        task.add_done_callback(self._dispatches.discard)
+
+    def _on_termination(self, connection):
+        if self._connection_lost:
+            self._connection_lost.set()
+
+    async def _run(self):
+        while True:
+            try:
+                self._connection = await asyncpg.connect(self.dsn)
+                self._connection_lost = asyncio.Event()
+                self._connection.add_termination_listener(self._on_termination)
+                await self._connection.add_listener(self.channel, self._on_notification)
+                logger.info(f"Listening to database changes on channel {self.channel}")
+                # Notifications sent while not connected are lost
+                await self.dispatch({'table': None, 'ids': None, 'community_ids': None})
+                await self._connection_lost.wait()
+                logger.warning("Connection to the database lost, stop listening to changes")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Can't listen to database changes: {e}")
+            await asyncio.sleep(self.reconnect_delay)
+
+    async def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._connection is not None and not self._connection.is_closed():
+            await self._connection.close()
+        self._connection = None
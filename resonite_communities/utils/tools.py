@@ -1,4 +1,5 @@
-import requests
+import asyncio
+import time
 
 from easydict import EasyDict as edict
 import toml
@@ -7,6 +8,7 @@ from flask.logging import default_handler
 from resonite_communities.utils.text_api import ekey, separator
 
 from resonite_communities.utils.config import ConfigManager
+from resonite_communities.utils.http import http_client
 
 config_manager = ConfigManager()
 
@@ -14,18 +16,53 @@ from resonite_communities.utils.logger import get_logger
 
 logger = get_logger('community_events')
 
+# Helix limits, see https://dev.twitch.tv/docs/api/reference
+TWITCH_AUTH_URL = 'https://id.twitch.tv/oauth2/token'
+HELIX_URL = 'https://api.twitch.tv/helix'
+# Logins by /users request, the maximum accepted by Helix
+HELIX_USERS_BATCH_SIZE = 100
+# Segments by /schedule page, the maximum accepted by Helix
+HELIX_SCHEDULE_PAGE_SIZE = 25
+# Pages of a /schedule followed at most, a misbehaving pagination can't loop forever
+HELIX_SCHEDULE_MAX_PAGES = 20
+# Helix requests sent at the same time
+HELIX_CONCURRENCY = 8
+# The app token is renewed this many seconds before it expires
+TOKEN_REFRESH_MARGIN = 600
+
 class TwitchClient:
+    """ Async client of the Twitch Helix API, authenticated with an app access token.
+
+    The token is renewed before it expires, or when a request is refused with a 401. Once the Ratelimit-* headers
+    of the responses show the rate limit bucket is empty, the requests wait for its reset.
+    """
 
-    def __init__(self, client_id, secret, game_id, account_name):
+    def __init__(
+        self, client_id, secret, game_id, account_name, http=http_client,
+        api_url=HELIX_URL, auth_url=TWITCH_AUTH_URL, concurrency=HELIX_CONCURRENCY,
+    ):
         self.client_id = client_id
         self.secret = secret
         self.game_id = game_id
         self.account_name = account_name
+        self.http = http
+        self.api_url = api_url
+        self.auth_url = auth_url
         self.logger = get_logger(self.__class__.__name__)
 
+        # Ready once authenticated, see auth
         self.ready = False
+        self._oauth_token = None
+        self._oauth_token_refresh_at = 0.0
+        self._auth_lock = asyncio.Lock()
+
+        self._semaphore = asyncio.Semaphore(concurrency)
+        # Rate limit bucket of the last response, see _wait_ratelimit
+        self._ratelimit_lock = asyncio.Lock()
+        self._ratelimit_remaining = None
+        self._ratelimit_reset = 0.0
+        self._in_flight = 0
 
-        self._auth()
         self.broadcasters = {}
 
     def _parse_error(self, response):
@@ -37,9 +74,9 @@ class TwitchClient:
         except Exception:
             return f"{response.status_code}"
 
-    def _auth(self):
-        response = requests.post(
-            f'https://id.twitch.tv/oauth2/token',
+    async def auth(self):
+        response = await self.http.post(
+            self.auth_url,
             params={
                 'client_id': self.client_id,
                 'client_secret': self.secret,
@@ -50,62 +87,158 @@ class TwitchClient:
         if response.status_code == 200:
             auth_data = response.json()
             self._oauth_token = auth_data['access_token']
-            self._oauth_token_expire_in = auth_data['expires_in'] # use this later
+            expires_in = auth_data['expires_in']
+            self._oauth_token_refresh_at = time.monotonic() + max(expires_in - TOKEN_REFRESH_MARGIN, expires_in / 2)
             self.ready = True
         else:
             self.logger.error(f"Can't connect to twitch: {self._parse_error(response)}")
 
-    def _get_broadcaster_followers(self, user):
+    async def _ensure_token(self, refused_token=None):
+        """Renew the app token when it is about to expire or was refused, once for all the concurrent requests."""
+        async with self._auth_lock:
+            if (
+                self._oauth_token is None
+                or self._oauth_token == refused_token
+                or time.monotonic() >= self._oauth_token_refresh_at
+            ):
+                await self.auth()
+
+    async def _wait_ratelimit(self):
+        """Wait for the reset of the rate limit bucket when its points left are taken by the requests in flight."""
+        async with self._ratelimit_lock:
+            if self._ratelimit_remaining is not None and self._ratelimit_remaining <= self._in_flight:
+                delay = self._ratelimit_reset - time.time()
+                if delay > 0:
+                    self.logger.warning(f"Twitch rate limit reached, waiting {delay:.1f}s")
+                    await asyncio.sleep(delay)
+                self._ratelimit_remaining = None
+            self._in_flight += 1
+
+    def _update_ratelimit(self, response):
+        if 'Ratelimit-Remaining' in response.headers:
+            self._ratelimit_remaining = int(response.headers['Ratelimit-Remaining'])
+            self._ratelimit_reset = float(response.headers.get('Ratelimit-Reset', 0))
+
+    async def _get(self, path, params):
+        """ GET a Helix endpoint.
+
+        A request refused with a 401 is sent again once with a new token, and a request over the rate limit is sent
+        again once the bucket is reset.
+        """
+        refused_token = None
+        async with self._semaphore:
+            for attempt in range(2):
+                await self._ensure_token(refused_token)
+                token = self._oauth_token
+                await self._wait_ratelimit()
+                try:
+                    response = await self.http.get(
+                        f'{self.api_url}{path}',
+                        params=params,
+                        headers={'Client-ID': self.client_id, 'Authorization': f"Bearer {token}"}
+                    )
+                finally:
+                    self._in_flight -= 1
+                self._update_ratelimit(response)
+                if attempt == 0 and response.status_code == 401:
+                    refused_token = token
+                    continue
+                if attempt == 0 and response.status_code == 429:
+                    self._ratelimit_remaining = 0
+                    continue
+                return response
+
+    async def get_users(self, logins):
+        """ Get the Twitch users by lowercase login, with one request by batch of up to 100 logins.
+
+        The logins without user are missing from the result.
+        """
+        logins = list(dict.fromkeys(login.lower() for login in logins))
+        batches = [
+            logins[start:start + HELIX_USERS_BATCH_SIZE]
+            for start in range(0, len(logins), HELIX_USERS_BATCH_SIZE)
+        ]
+        responses = await asyncio.gather(*(
+            self._get('/users', [('login', login) for login in batch])
+            for batch in batches
+        ))
+        users = {}
+        for response in responses:
+            if response.status_code != 200:
+                self.logger.error(f"Can't connect to twitch: {self._parse_error(response)}")
+                continue
+            for user in response.json()['data']:
+                users[user['login'].lower()] = user
+        return users
+
+    async def _get_broadcaster_followers(self, user):
         broadcasters_followers = {}
         if not self.ready:
             return broadcasters_followers
-        response = requests.get(
-            f'https://api.twitch.tv/helix/channels/followers?broadcaster_id={user}',
-            headers={'Client-ID': self.client_id, 'Authorization': f"Bearer {self._oauth_token}"}
-        )
+        # Only the total is used
+        response = await self._get('/channels/followers', {'broadcaster_id': user, 'first': 1})
         if response.status_code == 200:
             broadcasters_followers = response.json()
         else:
             self.logger.error(f"Can't connect to twitch: {self._parse_error(response)}")
         return broadcasters_followers
 
-    def get_broadcaster_info(self, streamer):
-        broadcaster_info = {}
+    async def get_broadcasters_info(self, streamers):
+        """ Get the Twitch user of the streamers communities with their followers, by external id.
+
+        The streamers without Twitch user are missing from the result.
+        """
         if not self.ready:
-            return broadcaster_info
-        response = requests.get(
-            f'https://api.twitch.tv/helix/users?login={streamer.external_id}',
-            headers={'Client-ID': self.client_id, 'Authorization': f"Bearer {self._oauth_token}"}
-        )
-        if response.status_code == 200:
-            users_data = response.json()
-            if len(users_data['data']) != 1:
-                raise ValueError(f'Too many users found for the external_id {streamer.external_id}')
-            broadcaster_info = users_data['data'][0]
-            broadcaster_info['followers'] = self._get_broadcaster_followers(users_data['data'][0]['id'])
-        else:
-            self.logger.error(f"Can't connect to twitch: {self._parse_error(response)}")
-        return broadcaster_info
+            return {}
+        users = await self.get_users([streamer.external_id for streamer in streamers])
+        followers = await asyncio.gather(*(self._get_broadcaster_followers(user['id']) for user in users.values()))
+        for user, user_followers in zip(users.values(), followers):
+            user['followers'] = user_followers
+        return {
+            streamer.external_id: users[streamer.external_id.lower()]
+            for streamer in streamers
+            if streamer.external_id.lower() in users
+        }
 
-    def get_schedule(self, broadcaster):
+    async def get_schedule(self, broadcaster):
         events = []
         if not self.ready:
             return events
-        response = requests.get(
-            f'https://api.twitch.tv/helix/schedule',
-            params={'broadcaster_id': broadcaster['id']},
-            headers={'Client-ID': self.client_id, 'Authorization': f"Bearer {self._oauth_token}"}
-        )
-        if response.status_code == 200:
+        params = {'broadcaster_id': broadcaster['id'], 'first': HELIX_SCHEDULE_PAGE_SIZE}
+        cursors = set()
+        for _ in range(HELIX_SCHEDULE_MAX_PAGES):
+            response = await self._get('/schedule', params)
+            if response.status_code != 200:
+                if response.status_code != 404:
+                    self.logger.error(f"{broadcaster['login']} => Can't connect to twitch: {self._parse_error(response)}")
+                return events
             schedule_data = response.json()
-            for event in schedule_data['data']['segments']:
+            # No segments during a vacation
+            for event in schedule_data['data']['segments'] or []:
                 if (event['category'] and event['category']['id'] == self.game_id) or schedule_data['data']['broadcaster_name'] == self.account_name:
                     events.append(event)
-        else:
-            if response.status_code != 404:
-                self.logger.error(f"{broadcaster['login']} => Can't connect to twitch: {self._parse_error(response)}")
+            cursor = schedule_data.get('pagination', {}).get('cursor')
+            if not cursor:
+                return events
+            if cursor in cursors:
+                self.logger.warning(f"{broadcaster['login']} => The schedule pagination returned the cursor {cursor} again")
+                return events
+            cursors.add(cursor)
+            params = {**params, 'after': cursor}
+        self.logger.warning(f"{broadcaster['login']} => The schedule has more than {HELIX_SCHEDULE_MAX_PAGES} pages")
         return events
 
+    async def get_schedules(self, broadcasters):
+        """ Get the schedule of each broadcaster concurrently, by broadcaster id.
+
+        The schedule of a broadcaster failing to be fetched is the exception raised.
+        """
+        schedules = await asyncio.gather(
+            *(self.get_schedule(broadcaster) for broadcaster in broadcasters),
+            return_exceptions=True,
+        )
+        return {broadcaster['id']: schedule for broadcaster, schedule in zip(broadcasters, schedules)}
+
     def get_streamers(self):
         streamers = []
         if not self.ready:
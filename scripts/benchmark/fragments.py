@@ -0,0 +1,57 @@
+"""Compare the rebuild of the events payloads with and without the serialized rows cache.
+
+Build the TEXT and JSON payloads of 5k events from scratch, then from the rows cache with a share of the events
+modified since the previous build. The time is the best of the runs.
+
+The configuration environment variables of the API must be set, the database is not used.
+
+    python scripts/benchmark/fragments.py [--events 5000] [--modified 0.01] [--runs 5]
+"""
+import argparse
+import time
+from datetime import timedelta
+
+from resonite_communities.clients.api.utils.formatter import EventsSnapshot, FragmentCache, format_event
+
+from serialization import make_events
+
+
+def measure(function, runs: int) -> float:
+    best = float("inf")
+    for _ in range(runs):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--events", type=int, default=5000, help="Number of events (default: 5000)")
+    parser.add_argument("--modified", type=float, default=0.01, help="Share of events modified between builds (default: 0.01)")
+    parser.add_argument("--runs", type=int, default=5, help="Number of runs of each build (default: 5)")
+    args = parser.parse_args()
+
+    events = make_events(args.events)
+    modified = events[:int(len(events) * args.modified)]
+
+    print(f"{args.events} events, {len(modified)} modified between builds, best of {args.runs} runs")
+    print(f"{'version':<8} {'build':<34} {'time':>10}")
+    for version in ("v1", "v2"):
+        def uncached():
+            EventsSnapshot([format_event(event, version) for event in events], version)
+
+        cache = FragmentCache(max_entries=len(events) * 4)
+        cache.rows(events, version)
+
+        def cached():
+            for event in modified:
+                event.updated_at += timedelta(seconds=1)
+            EventsSnapshot(None, version, rows=cache.rows(events, version))
+
+        for name, function in (("format and serialize all", uncached), ("rows cache", cached)):
+            print(f"{version:<8} {name:<34} {measure(function, args.runs) * 1000:>8.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""Compare the JSON serialization of the events payloads.
+
+Serialize 10k formatted v2 events with the previous encoder (`json.dumps` with `JSONEncoder`), with the
+serializer (orjson when installed, else its stdlib fallback) and with the serializer streaming mode. The time is the
+best of the runs, the memory is the peak allocated while serializing.
+
+The configuration environment variables of the API must be set, the database is not used.
+
+    python scripts/benchmark/serialization.py [--events 10000] [--runs 5]
+"""
+import argparse
+import asyncio
+import json
+import time
+import tracemalloc
+import uuid
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+from resonite_communities.clients.api.utils import serializer
+from resonite_communities.clients.api.utils.formatter import JSONEncoder, format_event
+from resonite_communities.clients.api.utils.serializer import dumps, stream_json_array
+from resonite_communities.models.signal import EventStatus
+
+
+def make_events(count: int) -> list:
+    community = SimpleNamespace(
+        name="Fluffy community",
+        url="https://discord.gg/fluffy",
+        created_at=datetime(2024, 1, 1, tzinfo=timezone.utc),
+        updated_at=None,
+    )
+    start_time = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    return [
+        SimpleNamespace(
+            id=uuid.uuid4(),
+            external_id=str(1000000000000000000 + index),
+            name=f"Fluffy event #{index}",
+            description="A fluffy gathering with music, games and friends. " * 4,
+            session_image="https://assets.resonite.com/fluffy.webp",
+            location=f"Fluffy world {index}",
+            location_web_session_url=f"https://go.resonite.com/session/S-{index}",
+            location_session_url=f"ressession:///S-{index}",
+            start_time=start_time + timedelta(minutes=index),
+            end_time=start_time + timedelta(minutes=index + 90),
+            community=community,
+            tags="resonite,public,lang:en",
+            status=EventStatus.READY,
+            created_at=start_time - timedelta(days=7),
+            updated_at=start_time - timedelta(days=1),
+        )
+        for index in range(count)
+    ]
+
+
+async def iter_rows(rows):
+    for row in rows:
+        yield row
+
+
+def stream(events) -> int:
+    async def send():
+        # The chunks are dropped as a response would send them
+        size = 0
+        async for chunk in stream_json_array(iter_rows(events), lambda event: format_event(event, "v2")):
+            size += len(chunk)
+        return size
+    return asyncio.run(send())
+
+
+def measure(function, runs: int) -> tuple[float, int, int]:
+    best = float("inf")
+    for _ in range(runs):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+
+    tracemalloc.start()
+    size = function()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return best, peak, size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--events", type=int, default=10000, help="Number of events (default: 10000)")
+    parser.add_argument("--runs", type=int, default=5, help="Number of runs of each encoder (default: 5)")
+    args = parser.parse_args()
+
+    events = make_events(args.events)
+    formatted = [format_event(event, "v2") for event in events]
+
+    encoders = {
+        "json.dumps(cls=JSONEncoder)": lambda: len(json.dumps(formatted, cls=JSONEncoder).encode()),
+        f"serializer.dumps ({'orjson' if serializer.orjson else 'stdlib'})": lambda: len(dumps(formatted)),
+        "format + json.dumps(cls=JSONEncoder)": lambda: len(json.dumps(
+            [format_event(event, "v2") for event in events], cls=JSONEncoder
+        ).encode()),
+        "format + serializer streaming": lambda: stream(events),
+    }
+
+    print(f"{args.events} events, best of {args.runs} runs")
+    print(f"{'encoder':<42} {'time':>10} {'peak memory':>14} {'size':>12}")
+    for name, function in encoders.items():
+        best, peak, size = measure(function, args.runs)
+        print(f"{name:<42} {best * 1000:>8.1f}ms {peak / 1024 / 1024:>12.1f}MB {size / 1024:>10.0f}KB")
+
+
+if __name__ == "__main__":
+    main()
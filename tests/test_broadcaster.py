@@ -0,0 +1,108 @@
+import asyncio
+from datetime import datetime
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+@pytest.fixture(scope='module', autouse=True)
+def _patch_modules():
+    with patch.dict('sys.modules', {
+        'resonite_communities.utils.db': MagicMock(),
+        'resonite_communities.models.signal': MagicMock(),
+        'resonite_communities.models.community': MagicMock(),
+        'resonite_communities.clients.api.utils.formatter': MagicMock(
+            format_event=lambda event, version: {"id": event.id},
+        ),
+    }):
+        yield
+
+@pytest.fixture(scope='module')
+def broadcaster(_patch_modules):
+    from resonite_communities.clients.api.utils import broadcaster
+    return broadcaster
+
+def make_event(id, community, tags="", is_private=False, updated_at=datetime(2025, 1, 1)):
+    return SimpleNamespace(
+        id=id,
+        community_id=f"id-{community}",
+        community=SimpleNamespace(name=community),
+        start_time=datetime(2025, 1, 2),
+        end_time=None,
+        tags=tags,
+        is_private=is_private,
+        updated_at=updated_at,
+    )
+
+def make_broadcaster(broadcaster, events, max_queue_size=100):
+    from resonite_communities.clients.api.utils.events_index import EventsPostings
+    index = SimpleNamespace(postings=EventsPostings.build(
+        events, communities=[("id-fluffy", "fluffy"), ("id-owo", "owo")],
+    ))
+    return broadcaster.Broadcaster(index, max_queue_size=max_queue_size)
+
+def received(subscription):
+    messages = []
+    while not subscription.queue.empty():
+        messages.append(subscription.queue.get_nowait())
+    return messages
+
+class TestBroadcaster:
+
+    def test_changed_event_sent_to_matching_subscribers(self, broadcaster):
+        live = make_broadcaster(broadcaster, [])
+        everyone = live.subscribe()
+        fluffy = live.subscribe(communities=["fluffy"])
+        owo = live.subscribe(communities=["owo"])
+        french = live.subscribe(languages=["FR"])
+        live.index.postings = live.index.postings.build(
+            [make_event("1", "fluffy", tags="lang:en")], communities=[("id-fluffy", "fluffy"), ("id-owo", "owo")],
+        )
+        asyncio.run(live.on_change({"table": "event", "ids": ["1"], "community_ids": ["id-fluffy"]}))
+        message = {"type": "event", "action": "changed", "event": {"id": "1"}}
+        assert received(everyone) == [message]
+        assert received(fluffy) == [message]
+        assert received(owo) == []
+        assert received(french) == []
+
+    def test_private_event_only_sent_to_allowed_subscribers(self, broadcaster):
+        live = make_broadcaster(broadcaster, [])
+        anonymous = live.subscribe()
+        member = live.subscribe(private_communities=["id-fluffy"])
+        live.index.postings = live.index.postings.build([make_event("1", "fluffy", is_private=True)])
+        asyncio.run(live.on_change({"table": "event", "ids": ["1"], "community_ids": ["id-fluffy"]}))
+        assert received(anonymous) == []
+        assert len(received(member)) == 1
+
+    def test_unchanged_event_not_sent_again(self, broadcaster):
+        live = make_broadcaster(broadcaster, [make_event("1", "fluffy")])
+        subscription = live.subscribe()
+        asyncio.run(live.on_change({"table": "event", "ids": ["1"], "community_ids": ["id-fluffy"]}))
+        assert received(subscription) == []
+
+    def test_removed_event(self, broadcaster):
+        live = make_broadcaster(broadcaster, [make_event("1", "fluffy")])
+        subscription = live.subscribe()
+        live.index.postings = live.index.postings.build([])
+        async def run():
+            await live.on_change({"table": "event", "ids": ["1"], "community_ids": ["id-fluffy"]})
+            await live.on_change({"table": "event", "ids": ["1"], "community_ids": ["id-fluffy"]})
+        asyncio.run(run())
+        assert received(subscription) == [{"type": "event", "action": "removed", "id": "1"}]
+
+    def test_slow_subscriber_is_resynced(self, broadcaster):
+        live = make_broadcaster(broadcaster, [], max_queue_size=2)
+        subscription = live.subscribe()
+        async def run():
+            for _ in range(3):
+                await live.on_change({"table": "stream", "ids": ["1"], "community_ids": ["id-fluffy"]})
+        asyncio.run(run())
+        assert received(subscription) == [broadcaster.RESYNC]
+        assert subscription.dropped == 2
+
+    def test_unsubscribed_subscriber_receive_nothing(self, broadcaster):
+        live = make_broadcaster(broadcaster, [])
+        subscription = live.subscribe()
+        live.unsubscribe(subscription)
+        asyncio.run(live.on_change({"table": None, "ids": None, "community_ids": None}))
+        assert received(subscription) == []
@@ -0,0 +1,381 @@
+import asyncio
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+@pytest.fixture(scope='module', autouse=True)
+def _patch_modules():
+    with patch.dict('sys.modules', {
+        'resonite_communities.utils.config': MagicMock(),
+    }):
+        yield
+
+@pytest.fixture(scope='module')
+def cache(_patch_modules):
+    from resonite_communities.clients.api.utils import cache
+    return cache
+
+async def single_flight(backends, cache_key, loader):
+    """Same pattern as get_filtered_events: check, lock, double-check and load."""
+    async def get(backend):
+        value = await backend.get(cache_key)
+        if value is not None:
+            return value
+        async with await backend.lock(cache_key):
+            value = await backend.get(cache_key)
+            if value is not None:
+                return value
+            value = await loader()
+            await backend.set(cache_key, value, 300)
+            return value
+    return await asyncio.gather(*[get(backend) for backend in backends])
+
+class TestLRUCache:
+
+    def test_get_missing_key_counts_miss(self, cache):
+        lru = cache.LRUCache()
+        assert lru.get("fluffy") is None
+        assert lru.misses == 1
+
+    def test_get_counts_hit(self, cache):
+        lru = cache.LRUCache()
+        lru.set("fluffy", "owo", 300)
+        assert lru.get("fluffy") == "owo"
+        assert lru.hits == 1
+
+    def test_evict_least_recently_used_entry(self, cache):
+        lru = cache.LRUCache(max_entries=2)
+        lru.set("first", "owo", 300)
+        lru.set("second", "owo", 300)
+        lru.get("first")
+        lru.set("third", "owo", 300)
+        assert "first" in lru
+        assert "second" not in lru
+        assert "third" in lru
+        assert lru.evictions == 1
+
+    def test_evict_when_max_bytes_exceeded(self, cache):
+        lru = cache.LRUCache(max_bytes=10)
+        lru.set("first", b"12345", 300)
+        lru.set("second", b"12345", 300)
+        lru.set("third", b"12345", 300)
+        assert len(lru) == 2
+        assert lru.size == 10
+        assert "first" not in lru
+
+    def test_value_bigger_than_cache_not_stored(self, cache):
+        lru = cache.LRUCache(max_bytes=10)
+        lru.set("first", b"12345", 300)
+        lru.set("fluffy", b"12345678901", 300)
+        assert "fluffy" not in lru
+        assert "first" in lru
+
+    def test_replace_value_update_size(self, cache):
+        lru = cache.LRUCache()
+        lru.set("fluffy", b"12345", 300)
+        lru.set("fluffy", b"12", 300)
+        assert lru.size == 2
+        assert lru.get("fluffy") == b"12"
+
+    def test_expired_entry(self, cache):
+        lru = cache.LRUCache()
+        lru.set("fluffy", "owo", -1)
+        assert lru.get("fluffy") is None
+        assert lru.expirations == 1
+        assert lru.size == 0
+
+    def test_sweep_removes_expired_entries(self, cache):
+        lru = cache.LRUCache(sweep_interval=0)
+        lru.set("expired", "owo", -1)
+        lru.set("fluffy", "owo", 300)
+        lru.get("fluffy")
+        assert "expired" not in lru
+        assert "fluffy" in lru
+        assert lru.expirations == 1
+
+class TestEstimateSize:
+
+    def test_cache_size_not_pickled(self, cache):
+        value = MagicMock(cache_size=42)
+        with patch.object(cache.pickle, 'dumps', side_effect=AssertionError):
+            assert cache.estimate_size(value) == 42
+            assert cache.estimate_size(cache.CacheEntry(value, 0)) == 42
+
+    def test_pickled_size(self, cache):
+        assert cache.estimate_size({"owo": 1}) == len(cache.pickle.dumps({"owo": 1}))
+
+class TestCacheBackend:
+
+    def test_incomplete_backend(self, cache):
+        class GetOnlyBackend(cache.CacheBackend):
+            async def get(self, cache_key):
+                return None
+
+        with pytest.raises(TypeError, match="abstract"):
+            GetOnlyBackend()
+
+class TestMemoryCacheBackend:
+
+    def test_get_missing_key(self, cache):
+        backend = cache.MemoryCacheBackend()
+        assert asyncio.run(backend.get("fluffy")) is None
+
+    def test_set_and_get(self, cache):
+        backend = cache.MemoryCacheBackend()
+        async def run():
+            await backend.set("fluffy", {"owo": 1}, 300)
+            return await backend.get("fluffy")
+        assert asyncio.run(run()) == {"owo": 1}
+
+    def test_expired_value(self, cache):
+        backend = cache.MemoryCacheBackend()
+        async def run():
+            await backend.set("fluffy", "owo", -1)
+            return await backend.get("fluffy")
+        assert asyncio.run(run()) is None
+
+    def test_delete(self, cache):
+        backend = cache.MemoryCacheBackend()
+        async def run():
+            await backend.set("fluffy", "owo", 300)
+            await backend.delete("fluffy", "missing")
+            return await backend.get("fluffy")
+        assert asyncio.run(run()) is None
+
+    def test_single_flight(self, cache):
+        backend = cache.MemoryCacheBackend()
+        calls = []
+        async def loader():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return "owo"
+        values = asyncio.run(single_flight([backend] * 5, "fluffy", loader))
+        assert values == ["owo"] * 5
+        assert len(calls) == 1
+
+    def test_unused_locks_are_collected(self, cache):
+        backend = cache.MemoryCacheBackend(max_entries=3)
+        async def run():
+            for index in range(10):
+                async with await backend.lock(f"fluffy:{index}"):
+                    pass
+        asyncio.run(run())
+        assert len(backend._locks) <= 3
+        assert backend.locks_collected > 0
+
+    def test_invalidate_tags(self, cache):
+        backend = cache.MemoryCacheBackend()
+        async def run():
+            await backend.set("all", "owo", 300, tags=["events", "events:all"])
+            await backend.set("fluffy", "owo", 300, tags=["events", "events:community:1"])
+            await backend.set("other", "owo", 300, tags=["events", "events:community:2"])
+            await backend.invalidate_tags("events:all", "events:community:1")
+            return [await backend.get(cache_key) for cache_key in ("all", "fluffy", "other")]
+        assert asyncio.run(run()) == [None, None, "owo"]
+
+    def test_tags_of_removed_entries_are_collected(self, cache):
+        backend = cache.MemoryCacheBackend()
+        async def run():
+            await backend.set("fluffy", "owo", 300, tags=["events"])
+            await backend.delete("fluffy")
+            backend.collect_locks()
+        asyncio.run(run())
+        assert backend._tags == {}
+
+    def test_held_locks_are_not_collected(self, cache):
+        backend = cache.MemoryCacheBackend()
+        async def run():
+            lock = await backend.lock("fluffy")
+            async with lock:
+                backend.collect_locks()
+                return await backend.lock("fluffy") is lock
+        assert asyncio.run(run())
+
+    def test_waited_locks_are_not_collected(self, cache):
+        backend = cache.MemoryCacheBackend()
+        async def run():
+            lock = await backend.lock("fluffy")
+            await lock.acquire()
+            waiter = asyncio.create_task(lock.acquire())
+            await asyncio.sleep(0)
+            # The waiter is woken up but doesn't hold the lock yet
+            lock.release()
+            backend.collect_locks()
+            same_lock = await backend.lock("fluffy") is lock
+            await waiter
+            lock.release()
+            return same_lock
+        assert asyncio.run(run())
+
+class TestRedisCacheBackend:
+
+    @pytest.fixture
+    def server(self):
+        fakeredis = pytest.importorskip("fakeredis")
+        return fakeredis.FakeServer()
+
+    def make_backend(self, cache, server):
+        import fakeredis
+        return cache.RedisCacheBackend(client=fakeredis.FakeAsyncRedis(server=server), lock_poll_interval=0.001)
+
+    def test_set_and_get_shared_between_workers(self, cache, server):
+        first_worker = self.make_backend(cache, server)
+        second_worker = self.make_backend(cache, server)
+        async def run():
+            await first_worker.set("fluffy", {"owo": [1, 2]}, 300)
+            return await second_worker.get("fluffy")
+        assert asyncio.run(run()) == {"owo": [1, 2]}
+
+    def test_delete(self, cache, server):
+        backend = self.make_backend(cache, server)
+        async def run():
+            await backend.set("fluffy", "owo", 300)
+            await backend.delete("fluffy")
+            return await backend.get("fluffy")
+        assert asyncio.run(run()) is None
+
+    def test_invalidate_tags_shared_between_workers(self, cache, server):
+        first_worker = self.make_backend(cache, server)
+        second_worker = self.make_backend(cache, server)
+        async def run():
+            await first_worker.set("fluffy", "owo", 300, tags=["events", "events:community:1"])
+            await first_worker.set("other", "owo", 300, tags=["events", "events:community:2"])
+            await second_worker.invalidate_tags("events:community:1")
+            return [await first_worker.get("fluffy"), await first_worker.get("other")]
+        assert asyncio.run(run()) == [None, "owo"]
+
+    def test_single_flight_across_workers(self, cache, server):
+        workers = [self.make_backend(cache, server) for _ in range(3)]
+        calls = []
+        async def loader():
+            calls.append(1)
+            await asyncio.sleep(0.05)
+            return "owo"
+        values = asyncio.run(single_flight(workers * 2, "fluffy", loader))
+        assert values == ["owo"] * 6
+        assert len(calls) == 1
+
+    def test_unreadable_value_is_a_cache_miss(self, cache, server):
+        import fakeredis
+        client = fakeredis.FakeAsyncRedis(server=server)
+        backend = cache.RedisCacheBackend(client=client)
+        async def run():
+            # Pickle of a class no longer existing
+            await client.set("fluffy", b"cremoved_module\nFluffy\n.")
+            return await backend.get("fluffy"), await client.exists("fluffy")
+        assert asyncio.run(run()) == (None, 0)
+
+    def test_redis_errors_are_cache_misses(self, cache):
+        from redis.exceptions import ConnectionError
+        client = MagicMock()
+        async def fail(*args, **kwargs):
+            raise ConnectionError("Redis is down")
+        client.get = fail
+        client.set = fail
+        backend = cache.RedisCacheBackend(client=client)
+        async def run():
+            await backend.set("fluffy", "owo", 300)
+            return await backend.get("fluffy")
+        assert asyncio.run(run()) is None
+
+class TestChangesTags:
+
+    def test_event_change_invalidate_its_communities(self, cache):
+        change = {"table": "event", "ids": ["1"], "community_ids": ["fluffy"]}
+        assert cache.changes_tags(change) == ["events:all", "events:community:fluffy"]
+
+    def test_event_change_without_communities_invalidate_all_events(self, cache):
+        change = {"table": "event", "ids": None, "community_ids": None}
+        assert cache.changes_tags(change) == ["events"]
+
+    def test_community_change_invalidate_everything_built_from_it(self, cache):
+        change = {"table": "community", "ids": ["1"], "community_ids": []}
+        assert set(cache.changes_tags(change)) == {"events", "streams", "communities"}
+
+    def test_reset_invalidate_everything(self, cache):
+        change = {"table": None, "ids": None, "community_ids": None}
+        assert set(cache.changes_tags(change)) == {"events", "streams", "communities"}
+
+    def test_invalidations_are_counted(self, cache):
+        cache.set_cache_backend(cache.MemoryCacheBackend())
+        count = cache.get_invalidations_count()
+        asyncio.run(cache.invalidate_changes({"table": "stream", "ids": None, "community_ids": None}))
+        cache.set_cache_backend(None)
+        assert cache.get_invalidations_count() == count + 1
+
+class TestLoadCached:
+
+    @pytest.fixture(autouse=True)
+    def backend(self, cache):
+        backend = cache.MemoryCacheBackend()
+        cache.set_cache_backend(backend)
+        yield backend
+        cache.set_cache_backend(None)
+
+    def make_loader(self, values):
+        calls = []
+        async def loader():
+            calls.append(1)
+            value = values[len(calls) - 1]
+            if isinstance(value, Exception):
+                raise value
+            return value, 300, ["events"]
+        return loader, calls
+
+    def expire(self, cache, backend, seconds_ago):
+        entry = backend._store.get("fluffy")
+        entry.fresh_until = cache.time.time() - seconds_ago
+
+    def test_fresh_value_is_served_from_cache(self, cache):
+        loader, calls = self.make_loader(["owo", "uwu"])
+        async def run():
+            return [await cache.load_cached("fluffy", loader) for _ in range(2)]
+        assert asyncio.run(run()) == ["owo", "owo"]
+        assert len(calls) == 1
+
+    def test_stale_value_is_served_while_refreshed(self, cache, backend):
+        loader, calls = self.make_loader(["owo", "uwu"])
+        async def run():
+            await cache.load_cached("fluffy", loader, stale_while_revalidate=60)
+            self.expire(cache, backend, 10)
+            stale = await asyncio.gather(*[
+                cache.load_cached("fluffy", loader, stale_while_revalidate=60) for _ in range(5)
+            ])
+            await asyncio.gather(*cache._refreshes.values())
+            return stale, await cache.load_cached("fluffy", loader, stale_while_revalidate=60)
+        stale, refreshed = asyncio.run(run())
+        assert stale == ["owo"] * 5
+        assert refreshed == "uwu"
+        assert len(calls) == 2
+
+    def test_value_too_stale_is_loaded(self, cache, backend):
+        loader, calls = self.make_loader(["owo", "uwu"])
+        async def run():
+            await cache.load_cached("fluffy", loader, stale_while_revalidate=60)
+            self.expire(cache, backend, 120)
+            return await cache.load_cached("fluffy", loader, stale_while_revalidate=60)
+        assert asyncio.run(run()) == "uwu"
+
+    def test_stale_value_is_served_on_error(self, cache, backend):
+        loader, calls = self.make_loader(["owo", ConnectionError("Database is down")])
+        async def run():
+            await cache.load_cached("fluffy", loader, stale_if_error=600)
+            self.expire(cache, backend, 120)
+            return await cache.load_cached("fluffy", loader, stale_if_error=600)
+        assert asyncio.run(run()) == "owo"
+
+    def test_error_is_raised_without_stale_value(self, cache, backend):
+        loader, calls = self.make_loader(["owo", ConnectionError("Database is down")])
+        async def run():
+            await cache.load_cached("fluffy", loader, stale_if_error=60)
+            self.expire(cache, backend, 120)
+            return await cache.load_cached("fluffy", loader, stale_if_error=60)
+        with pytest.raises(ConnectionError):
+            asyncio.run(run())
+
+    def test_value_loaded_during_invalidation_is_not_cached(self, cache, backend):
+        async def loader():
+            await cache.invalidate_cached("events")
+            return "owo", 300, ["events"]
+        asyncio.run(cache.load_cached("fluffy", loader))
+        assert "fluffy" not in backend._store
@@ -0,0 +1,236 @@
+import asyncio
+import sys
+from datetime import datetime, timedelta, timezone
+from contextlib import asynccontextmanager
+from unittest.mock import AsyncMock, MagicMock, patch
+from uuid import uuid4
+
+import httpx
+from easydict import EasyDict
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql
+
+sys.modules['resonite_communities.utils.config'] = MagicMock()
+sys.modules['resonite_communities.utils.db'] = MagicMock()
+
+from resonite_communities.models.community import Community, CommunityPlatform
+from resonite_communities.models.signal import Event, EventStatus, content_hash
+from resonite_communities.signals.collectors import collector as collector_module
+from resonite_communities.signals.collectors.events import json as json_module
+from resonite_communities.signals.collectors.events.json import JSONEventsCollector
+from resonite_communities.signals.collectors.streams.twitch import TwitchStreamsCollector
+
+class TestExpireEnded:
+
+    def test_complete_ended_events_of_the_communities(self):
+        collector = JSONEventsCollector(config=None, services=None, scheduler=None)
+        collector.communities = [Community(id=uuid4()), Community(id=uuid4())]
+        with patch.object(Event, 'update', AsyncMock(return_value=2)) as update:
+            asyncio.run(collector.expire_ended())
+
+        update.assert_awaited_once()
+        kwargs = update.await_args.kwargs
+        assert kwargs['status'] == EventStatus.COMPLETED
+        assert kwargs['_returning'] is False
+        compiled = select(Event.id).where(kwargs['filters']).compile(dialect=postgresql.dialect())
+        assert "coalesce(event.end_time, event.start_time) < " in str(compiled)
+        assert compiled.params['status_1'] == [EventStatus.ACTIVE, EventStatus.READY]
+        assert compiled.params['community_id_1'] == [community.id for community in collector.communities]
+
+    def test_no_community(self):
+        collector = JSONEventsCollector(config=None, services=None, scheduler=None)
+        with patch.object(Event, 'update', AsyncMock()) as update:
+            asyncio.run(collector.expire_ended())
+        update.assert_not_called()
+
+class TestUpsertSignals:
+
+    def _row(self, external_id, **fields):
+        return dict(
+            external_id=external_id,
+            name='Fluffy event',
+            start_time=datetime(2025, 1, 1, 20, tzinfo=timezone.utc),
+            tags='public,resonite',
+            **fields,
+        )
+
+    def test_only_new_and_changed_signals_written(self):
+        collector = JSONEventsCollector(config=None, services=None, scheduler=None)
+        stored = [
+            {'external_id': 'unchanged', 'content_hash': content_hash(self._row('unchanged'))},
+            {'external_id': 'changed', 'content_hash': content_hash(self._row('changed'))},
+            {'external_id': 'not_hashed', 'content_hash': None},
+        ]
+        rows = [
+            self._row('unchanged'),
+            self._row('changed', description='Fluffy description'),
+            self._row('not_hashed'),
+            self._row('new'),
+        ]
+        with patch.object(Event, 'find', AsyncMock(return_value=stored)) as find, \
+                patch.object(Event, 'bulk_upsert', AsyncMock()) as bulk_upsert:
+            counts = asyncio.run(collector.upsert_signals(rows))
+
+        find.assert_awaited_once()
+        assert find.await_args.kwargs['external_id__in'] == ['unchanged', 'changed', 'not_hashed', 'new']
+        written = bulk_upsert.await_args.args[0]
+        assert [row['external_id'] for row in written] == ['changed', 'not_hashed', 'new']
+        assert all(row['content_hash'] == content_hash(row) for row in written)
+        assert counts == {'inserted': 1, 'changed': 2, 'unchanged': 1}
+        assert collector.upsert_counts == counts
+
+    def test_counts_of_the_collect(self):
+        collector = JSONEventsCollector(config=None, services=None, scheduler=None)
+        stored = [{'external_id': '1', 'content_hash': content_hash(self._row('1'))}]
+        with patch.object(Event, 'find', AsyncMock(return_value=stored)), \
+                patch.object(Event, 'bulk_upsert', AsyncMock()):
+            asyncio.run(collector.upsert_signals([self._row('1')]))
+            asyncio.run(collector.upsert_signals([self._row('2')]))
+        assert collector.upsert_counts == {'inserted': 1, 'changed': 0, 'unchanged': 1}
+
+class TestContentHash:
+
+    def test_normalized(self):
+        row = dict(name='Fluffy event', start_time=datetime(2025, 1, 1, 20, tzinfo=timezone.utc), tags='b,a')
+        same = dict(
+            tags='a,b',
+            start_time=datetime(2025, 1, 1, 21, tzinfo=timezone(timedelta(hours=1))),
+            name='Fluffy event',
+            updated_at=datetime.now(timezone.utc),
+        )
+        assert content_hash(row) == content_hash(same)
+
+    def test_changed(self):
+        row = dict(name='Fluffy event', status=EventStatus.READY)
+        assert content_hash(row) != content_hash({**row, 'name': 'Fluffy party'})
+        assert content_hash(row) != content_hash({**row, 'status': EventStatus.CANCELED})
+
+class TestInitScheduler:
+
+    def test_expire_job(self):
+        scheduler = MagicMock()
+        collector = JSONEventsCollector(config=MagicMock(REFRESH_INTERVAL=5), services=None, scheduler=scheduler)
+        with patch.object(collector, 'collect', AsyncMock()):
+            asyncio.run(collector.init_scheduler())
+        assert [call.kwargs['id'] for call in scheduler.add_job.call_args_list] == [
+            'JSONEventsCollector_collect',
+            'JSONEventsCollector_expire',
+        ]
+
+class TestCollectCommunities:
+
+    def _collector(self, concurrency=2, timeout=1):
+        config = MagicMock(COLLECTOR_CONCURRENCY=str(concurrency), COLLECTOR_TIMEOUT=str(timeout))
+        return JSONEventsCollector(config=config, services=None, scheduler=None)
+
+    def _collect(self, collector, collect_community, communities):
+        sessions = []
+
+        @asynccontextmanager
+        async def request_session():
+            sessions.append(asyncio.current_task())
+            yield
+
+        with patch.object(collector_module, 'async_request_session', request_session):
+            results = asyncio.run(collector.collect_communities(collect_community, communities))
+        return results, sessions
+
+    def test_concurrency_is_bounded(self):
+        running = []
+        max_running = []
+
+        async def collect_community(community):
+            running.append(community)
+            max_running.append(len(running))
+            await asyncio.sleep(0.01)
+            running.remove(community)
+            return community.name
+
+        communities = [Community(id=uuid4(), name=f'fluffy {index}') for index in range(5)]
+        results, sessions = self._collect(self._collector(concurrency=2), collect_community, communities)
+
+        assert max(max_running) == 2
+        assert results == {community.id: community.name for community in communities}
+        # One session by community, each in its own task
+        assert len(set(sessions)) == 5
+
+    def test_failures_and_timeouts_are_isolated(self):
+        async def collect_community(community):
+            if community.name == 'failing':
+                raise ValueError('fluffy error')
+            if community.name == 'slow':
+                await asyncio.sleep(5)
+            return None
+
+        communities = [
+            Community(id=uuid4(), name='failing'),
+            Community(id=uuid4(), name='slow'),
+            Community(id=uuid4(), name='fluffy'),
+        ]
+        results, _ = self._collect(self._collector(timeout=0.1), collect_community, communities)
+
+        assert results == {communities[2].id: None}
+
+class TestTwitchCollect:
+
+    def test_communities_written_separately(self):
+        config = MagicMock(COLLECTOR_CONCURRENCY='2', COLLECTOR_TIMEOUT='1')
+        services = MagicMock()
+        collector = TwitchStreamsCollector(config=config, services=services, scheduler=None)
+        communities = [
+            Community(id=uuid4(), name=name, external_id=name, platform=CommunityPlatform.TWITCH, tags='public')
+            for name in ('failing', 'unreachable', 'fluffy')
+        ]
+        collector.communities = communities
+        collector.update_community_map()
+        collector.broadcasters = [
+            {'config': community, 'twitch': {'id': community.name}} for community in communities
+        ]
+        stream = {'id': '1', 'title': 'Fluffy stream', 'start_time': '2025-01-01T20:00:00Z',
+                  'end_time': '2025-01-01T22:00:00Z'}
+        services.twitch.get_schedules = AsyncMock(return_value={
+            'failing': [{**stream, 'id': 'failing'}],
+            'unreachable': ValueError('fluffy error'),
+            'fluffy': [stream],
+        })
+
+        async def upsert_signals(rows):
+            if rows[0]['external_id'] == 'failing':
+                raise ValueError('fluffy constraint')
+
+        @asynccontextmanager
+        async def request_session():
+            yield
+
+        with patch.object(collector, 'update_communities', AsyncMock()), \
+                patch.object(collector, 'upsert_signals', AsyncMock(side_effect=upsert_signals)) as upsert, \
+                patch.object(collector_module, 'async_request_session', request_session):
+            asyncio.run(collector.collect())
+
+        written = [call.args[0] for call in upsert.await_args_list]
+        assert [[row['external_id'] for row in rows] for rows in written] == [['failing'], ['1']]
+        assert written[1][0]['community_id'] == communities[2].id
+        # The status of the existing streams is left as is, READY is only set on insert
+        assert 'status' not in written[1][0]
+
+class TestJSONCollectCommunity:
+
+    def test_status_not_collected(self):
+        community = Community(
+            id=uuid4(), name='fluffy', external_id='fluffy', platform=CommunityPlatform.JSON, tags='public',
+            config=EasyDict(events_url='https://fluffy.example/events'),
+        )
+        collector = JSONEventsCollector(config=None, services=None, scheduler=None)
+        event = {
+            'event_id': '1', 'name': 'Fluffy event', 'description': 'Fluffy gathering', 'location': None,
+            'session_url': None, 'start_time': '2025-01-01T20:00:00Z', 'end_time': '2025-01-01T22:00:00Z',
+        }
+        response = httpx.Response(200, json=[event])
+        with patch.object(json_module.http_client, 'get_if_modified', AsyncMock(return_value=response)), \
+                patch.object(collector, 'upsert_signals', AsyncMock()) as upsert:
+            asyncio.run(collector.collect_community(community))
+
+        [row] = upsert.await_args.args[0]
+        assert row['external_id'] == '1'
+        assert row['community_id'] == community.id
+        assert 'status' not in row
@@ -0,0 +1,73 @@
+import gzip
+from unittest.mock import patch
+
+import pytest
+
+from resonite_communities.clients.api.utils import compression
+from resonite_communities.clients.api.utils.compression import (
+    IDENTITY,
+    MIN_COMPRESS_SIZE,
+    compress,
+    encoded_etag,
+    negotiate_encoding,
+    parse_accept_encoding,
+)
+
+PAYLOAD = b'[{"name":"My fluffy event"}' + b',{"name":"My fluffy event"}' * 100 + b"]"
+
+class TestCompress:
+
+    def test_variants(self):
+        variants = compress(PAYLOAD)
+        assert variants[IDENTITY] is PAYLOAD
+        assert gzip.decompress(variants["gzip"]) == PAYLOAD
+        assert len(variants["gzip"]) < len(PAYLOAD)
+
+    def test_brotli_variant(self):
+        if compression.brotli is None:
+            pytest.skip("brotli is not installed")
+        assert compression.brotli.decompress(compress(PAYLOAD)["br"]) == PAYLOAD
+
+    def test_without_brotli(self):
+        with patch.object(compression, "brotli", None):
+            assert set(compress(PAYLOAD)) == {IDENTITY, "gzip"}
+
+    def test_small_payload_is_not_compressed(self):
+        assert compress(b"x" * (MIN_COMPRESS_SIZE - 1)) == {IDENTITY: b"x" * (MIN_COMPRESS_SIZE - 1)}
+
+    def test_gzip_variant_is_deterministic(self):
+        assert compress(PAYLOAD)["gzip"] == compress(PAYLOAD)["gzip"]
+
+class TestNegotiateEncoding:
+
+    AVAILABLE = {IDENTITY: b"", "gzip": b"", "br": b""}
+
+    def test_parse_accept_encoding(self):
+        assert parse_accept_encoding("gzip;q=0.5, BR , identity;q=invalid") == {"gzip": 0.5, "br": 1.0, "identity": 0.0}
+
+    @pytest.mark.parametrize("accept_encoding, expected", [
+        (None, IDENTITY),
+        ("", IDENTITY),
+        ("gzip", "gzip"),
+        ("gzip, deflate, br", "br"),
+        ("br;q=0.5, gzip", "gzip"),
+        ("*", "br"),
+        ("gzip;q=0, br;q=0", IDENTITY),
+        ("*;q=0, gzip", "gzip"),
+        ("gzip;q=0.5, identity", IDENTITY),
+        ("deflate", IDENTITY),
+    ])
+    def test_negotiate(self, accept_encoding, expected):
+        assert negotiate_encoding(accept_encoding, self.AVAILABLE) == expected
+
+    def test_only_available_encodings(self):
+        assert negotiate_encoding("br, gzip", {IDENTITY: b"", "gzip": b""}) == "gzip"
+        assert negotiate_encoding("br, gzip", {IDENTITY: b""}) == IDENTITY
+
+class TestEncodedEtag:
+
+    def test_identity(self):
+        assert encoded_etag('"fluffy-json"', IDENTITY) == '"fluffy-json"'
+
+    def test_encoding(self):
+        assert encoded_etag('"fluffy-json"', "gzip") == '"fluffy-json-gzip"'
@@ -1,11 +1,13 @@
 import sys
 from datetime import datetime, timezone
-from unittest.mock import MagicMock
+import asyncio
+from unittest.mock import AsyncMock, MagicMock, patch
 from uuid import uuid4
 
 from easydict import EasyDict
-from freezegun import freeze_time
 from disnake import GuildScheduledEvent
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql
 
 sys.modules['resonite_communities.utils.config'] = MagicMock()
 sys.modules['resonite_communities.utils.db'] = MagicMock()
@@ -18,8 +20,9 @@ class _DiscordState:
     def get_user(self, user_id):
         return None
 
-def create_event(channel_id=None):
+def create_event(channel_id=None, **data):
     return GuildScheduledEvent(state=_DiscordState(), data={
+        **data,
         'id': '1',
         'guild_id': '1',
         'channel_id': str(channel_id) if channel_id is not None else None,
@@ -156,59 +159,81 @@ class TestDiscordEventTagging:
         event_visibility = DiscordEventsCollector(config=None, services=None, scheduler=None).determine_event_visibility(event, community)
         assert event_visibility == 'private'
 
-@freeze_time("2023-10-6T18:00:00+00:00")
-class TestDiscordIsCancel:
-
-    def test_event_with_end_time_in_the_past(self):
-        local_event = Event(
-            created_at=datetime(2023, 10, 6, 18, 0, 0, tzinfo=timezone.utc),
-            external_id='resonite',
-            name='Fluffy opening!',
-            start_time=datetime(2023, 10, 6, 19, 0, 0, tzinfo=timezone.utc),
-            end_time=datetime(2023, 10, 6, 18, 0, 0, tzinfo=timezone.utc),
-            community_id=uuid4(),
-            scheduler_type='DISCORD',
-            status=EventStatus.READY,
-        )
-        is_cancel = DiscordEventsCollector.is_cancel(None, local_event)
-        assert is_cancel == None
-
-    def test_event_with_end_time_in_the_future(self):
-        local_event = Event(
-            created_at=datetime(2023, 10, 6, 18, 0, 0, tzinfo=timezone.utc),
-            external_id='resonite',
-            name='Fluffy opening!',
-            start_time=datetime(2023, 10, 6, 19, 0, 0, tzinfo=timezone.utc),
-            end_time=datetime(2023, 10, 6, 20, 0, 0, tzinfo=timezone.utc),
-            community_id=uuid4(),
-            scheduler_type='DISCORD',
-            status=EventStatus.READY,
-        )
-        is_cancel = DiscordEventsCollector.is_cancel(None, local_event)
-        assert is_cancel == None
-
-    def test_event_without_end_time_start_time_in_the_past(self):
-        local_event = Event(
-            created_at=datetime(2023, 10, 6, 18, 0, 0, tzinfo=timezone.utc),
-            external_id='resonite',
-            name='Fluffy opening!',
-            start_time=datetime(2023, 10, 6, 17, 0, 0, tzinfo=timezone.utc),
-            community_id=uuid4(),
-            scheduler_type='DISCORD',
-            status=EventStatus.READY,
-        )
-        is_cancel = DiscordEventsCollector.is_cancel(None, local_event)
-        assert is_cancel == True
-
-    def test_event_without_end_time_start_time_in_the_future(self):
-        local_event = Event(
-            created_at=datetime(2023, 10, 6, 18, 0, 0, tzinfo=timezone.utc),
-            external_id='resonite',
-            name='Fluffy opening!',
-            start_time=datetime(2023, 10, 6, 20, 0, 0, tzinfo=timezone.utc),
-            community_id=uuid4(),
-            scheduler_type='DISCORD',
-            status=EventStatus.READY,
-        )
-        is_cancel = DiscordEventsCollector.is_cancel(None, local_event)
-        assert is_cancel == None
+class TestUpsertEvents:
+
+    def test_community_id_of_the_collected_community(self):
+        community = create_community(tags='public')
+        community.id = uuid4()
+        collector = DiscordEventsCollector(config=None, services=None, scheduler=None)
+
+        event = create_event(channel_id='123', description='+language:fr\nFluffy gathering')
+        with patch.object(Community, 'find', AsyncMock()) as find, \
+                patch.object(Event, 'find', AsyncMock(return_value=[])), \
+                patch.object(Event, 'bulk_upsert', AsyncMock()) as bulk_upsert:
+            asyncio.run(collector.upsert_events([event], community))
+
+        find.assert_not_called()
+        [row], = bulk_upsert.await_args.args[:1]
+        assert row['community_id'] == community.id
+        assert row['external_id'] == '1'
+        assert row['description'] == 'Fluffy gathering'
+        assert set(row['tags'].split(',')) == {'resonite', 'public', 'lang:fr'}
+        assert bulk_upsert.await_args.kwargs == {'conflict_cols': 'external_id'}
+
+class TestDetectAndHandleDuplicates:
+
+    def test_single_statement_across_communities(self):
+        collector = DiscordEventsCollector(config=None, services=None, scheduler=None)
+        communities = [create_community(tags='public'), create_community(tags='public')]
+        for community in communities:
+            community.id = uuid4()
+        with patch.object(Event, 'update', AsyncMock(return_value=2)) as update:
+            asyncio.run(collector.detect_and_handle_duplicates(communities))
+
+        update.assert_awaited_once()
+        kwargs = update.await_args.kwargs
+        assert kwargs['_returning'] is False
+        compiled = select(Event.id).where(kwargs['filters']).compile(dialect=postgresql.dialect())
+        query = str(compiled)
+        assert (
+            "row_number() OVER (PARTITION BY event.community_id, event.name, event.start_time, event.end_time, "
+            "md5(event.description) ORDER BY event.created_at, event.id) AS position"
+        ) in query
+        # Only the events of the collector's communities, and never the ones without end time or description
+        assert "event.community_id IN (__[POSTCOMPILE_community_id_1])" in query
+        assert compiled.params['community_id_1'] == [community.id for community in communities]
+        assert "event.end_time IS NOT NULL AND event.description IS NOT NULL" in query
+        assert set(kwargs) == {'filters', '_returning', 'status', 'session_image'}
+
+    def test_no_communities(self):
+        collector = DiscordEventsCollector(config=None, services=None, scheduler=None)
+        with patch.object(Event, 'update', AsyncMock()) as update:
+            asyncio.run(collector.detect_and_handle_duplicates([]))
+        update.assert_not_called()
+
+class TestDetectAndHandlePassedEvents:
+
+    def test_single_statement_across_communities(self):
+        collector = DiscordEventsCollector(config=None, services=None, scheduler=None)
+        community_ids = [uuid4(), uuid4()]
+        with patch.object(Event, 'update', AsyncMock(return_value=3)) as update:
+            asyncio.run(collector.detect_and_handle_passed_events({
+                community_ids[0]: ['1', '2'],
+                community_ids[1]: [],
+            }))
+
+        update.assert_awaited_once()
+        kwargs = update.await_args.kwargs
+        assert kwargs['status'] == EventStatus.COMPLETED
+        compiled = select(Event.id).where(kwargs['filters']).compile(dialect=postgresql.dialect())
+        query = str(compiled)
+        assert "coalesce(event.end_time, event.start_time) < " in query
+        assert "event.external_id != ALL (%(seen_events_ids)s::VARCHAR[])" in query
+        assert compiled.params['seen_events_ids'] == ['1', '2']
+        assert compiled.params['scheduler_type_1'] == 'DISCORD'
+
+    def test_no_community_collected(self):
+        collector = DiscordEventsCollector(config=None, services=None, scheduler=None)
+        with patch.object(Event, 'update', AsyncMock()) as update:
+            asyncio.run(collector.detect_and_handle_passed_events({}))
+        update.assert_not_called()
@@ -0,0 +1,136 @@
+import asyncio
+import importlib.util
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+from uuid import UUID
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy.dialects import postgresql
+
+sys.modules['resonite_communities.utils.config'] = MagicMock()
+sys.modules['resonite_communities.utils.db'] = MagicMock()
+
+from resonite_communities.clients.api.utils import formatter
+from resonite_communities.clients.api.utils.pagination import decode_cursor, encode_cursor
+
+def make_signal(id, updated_at):
+    return SimpleNamespace(
+        id=UUID(int=id),
+        external_id=str(id),
+        name="My fluffy event",
+        description="Welcome to all our fluffy beans!",
+        session_image=None,
+        location="Fluffy world",
+        location_web_session_url=None,
+        location_session_url=None,
+        start_time=datetime(2025, 1, 2, 18, 0),
+        end_time=None,
+        community=SimpleNamespace(name="Fluffy community", url="https://fluffy.example"),
+        tags="resonite,public",
+        status="READY",
+        updated_at=updated_at,
+    )
+
+def changes(rows, **kwargs):
+    """Get the changes with `Event.find` returning `rows`, and the mock of `Event.find`."""
+    find = AsyncMock(return_value=rows)
+    with patch.object(formatter.Event, 'find', find), \
+            patch.object(formatter, 'get_visibility', return_value=(True, None)), \
+            patch.object(formatter.config_manager.infrastructure_config, 'CHANGES_SETTLE_DELAY', 5):
+        return asyncio.run(formatter.get_events_changes("fluffy.example", **kwargs)), find
+
+def compile_filter(find):
+    query = find.await_args.kwargs['__custom_filter'].compile(dialect=postgresql.dialect())
+    return str(query), query.params
+
+class TestEventsChanges:
+
+    updated_at = datetime(2025, 1, 1, 12, 0)
+
+    def test_without_token_returns_the_end_of_the_feed(self):
+        id = UUID(int=42)
+        result, find = changes([{'updated_at': self.updated_at, 'id': id}])
+        assert result == {"events": [], "token": encode_cursor(self.updated_at, id), "has_more": False}
+        assert find.await_args.kwargs['__order_by'] == ["-updated_at", "-id"]
+        assert find.await_args.kwargs['__limit'] == 1
+
+    def test_without_token_and_events(self):
+        result, _ = changes([])
+        updated_at, id = decode_cursor(result["token"])
+        assert id == str(UUID(int=0))
+        assert datetime.utcnow() - timedelta(seconds=10) < updated_at < datetime.utcnow()
+
+    def test_changes_after_the_token(self):
+        since = encode_cursor(self.updated_at, UUID(int=1))
+        signals = [make_signal(2, self.updated_at), make_signal(3, self.updated_at + timedelta(seconds=1))]
+        result, find = changes(signals, since=since)
+
+        assert [event["id"] for event in result["events"]] == [str(UUID(int=2)), str(UUID(int=3))]
+        assert result["token"] == encode_cursor(self.updated_at + timedelta(seconds=1), UUID(int=3))
+        assert not result["has_more"]
+
+        assert find.await_args.kwargs['__order_by'] == ["updated_at", "id"]
+        query, params = compile_filter(find)
+        assert "event.updated_at <= clock_timestamp() - " in query
+        assert "(event.updated_at, event.id) > (" in query
+        assert self.updated_at in params.values()
+        assert UUID(int=1) in params.values()
+        assert timedelta(seconds=5) in params.values()
+
+    def test_has_more(self):
+        since = encode_cursor(self.updated_at, UUID(int=1))
+        signals = [make_signal(id, self.updated_at) for id in range(2, 5)]
+        result, find = changes(signals, since=since, limit=2)
+        assert find.await_args.kwargs['__limit'] == 3
+        assert len(result["events"]) == 2
+        assert result["token"] == encode_cursor(self.updated_at, UUID(int=3))
+        assert result["has_more"]
+
+    def test_no_changes_keeps_the_token(self):
+        since = encode_cursor(self.updated_at, UUID(int=1))
+        result, _ = changes([], since=since)
+        assert result == {"events": [], "token": since, "has_more": False}
+
+    @pytest.mark.parametrize("since", ["not a token", encode_cursor(datetime(2025, 1, 1), "fluffy")])
+    def test_invalid_token(self, since):
+        with pytest.raises(HTTPException) as exc_info:
+            changes([], since=since)
+        assert exc_info.value.status_code == 400
+
+class TestUpdatedAtMigration:
+
+    @pytest.fixture
+    def migration(self):
+        pytest.importorskip("alembic")
+        path = Path(__file__).parent.parent / "migrations" / "versions" / "e5f6a7b8c9d0_maintain_event_updated_at.py"
+        spec = importlib.util.spec_from_file_location("maintain_event_updated_at", path)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        with patch.object(module, 'op') as op:
+            yield module, op
+
+    def test_upgrade(self, migration):
+        module, op = migration
+        module.upgrade()
+        statements = [" ".join(call.args[0].split()) for call in op.execute.call_args_list]
+
+        function = next(statement for statement in statements if statement.startswith("CREATE FUNCTION"))
+        # Only the writes really changing the event move it in the feed, at the time of the write
+        assert "(to_jsonb(NEW) - 'updated_at' - 'tag_list') IS DISTINCT FROM" in function
+        assert "NEW.updated_at = clock_timestamp();" in function
+        assert "NEW.updated_at = OLD.updated_at;" in function
+
+        assert ("CREATE TRIGGER event_set_updated_at BEFORE INSERT OR UPDATE ON event "
+                "FOR EACH ROW EXECUTE FUNCTION event_set_updated_at()") in statements
+        op.create_index.assert_called_once_with('ix_event_updated_at_id', 'event', ['updated_at', 'id'])
+
+    def test_downgrade(self, migration):
+        module, op = migration
+        module.downgrade()
+        statements = [call.args[0] for call in op.execute.call_args_list]
+        assert statements == ["DROP TRIGGER event_set_updated_at ON event", "DROP FUNCTION event_set_updated_at()"]
+        op.drop_index.assert_called_once_with('ix_event_updated_at_id', table_name='event')
@@ -0,0 +1,159 @@
+import asyncio
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+@pytest.fixture(scope='module', autouse=True)
+def _patch_modules():
+    with patch.dict('sys.modules', {
+        'resonite_communities.utils.db': MagicMock(),
+        'resonite_communities.models.signal': MagicMock(),
+        'resonite_communities.models.community': MagicMock(),
+    }):
+        yield
+
+@pytest.fixture(scope='module')
+def events_index(_patch_modules):
+    from resonite_communities.clients.api.utils import events_index
+    return events_index
+
+NOW = datetime(2025, 1, 1, 12)
+
+def make_event(id, community, hours, tags=None, is_private=False, end_hours=None):
+    return SimpleNamespace(
+        id=id,
+        community_id=f"id-{community}",
+        community=SimpleNamespace(name=community),
+        start_time=NOW + timedelta(hours=hours),
+        end_time=NOW + timedelta(hours=end_hours) if end_hours is not None else None,
+        tags=tags,
+        is_private=is_private,
+    )
+
+@pytest.fixture
+def postings(events_index):
+    return events_index.EventsPostings.build(
+        [
+            make_event("late", "fluffy", 5, tags="lang:en,music"),
+            make_event("early", "fluffy", 1, tags="lang:fr"),
+            make_event("private", "owo", 2, tags="lang:en", is_private=True),
+            make_event("ongoing", "owo", -1, end_hours=1),
+            make_event("ended", "owo", -2, end_hours=-1),
+        ],
+        communities=[("id-fluffy", "fluffy"), ("id-owo", "owo"), ("id-empty", "empty")],
+    )
+
+def ids(events):
+    return [event.id for event in events]
+
+class TestEventsPostings:
+
+    def test_public_upcoming_events_sorted_by_start_time(self, postings):
+        assert ids(postings.query(now=NOW)) == ["ongoing", "early", "late"]
+
+    def test_all_visible(self, postings):
+        assert ids(postings.query(all_visible=True, now=NOW)) == ["ongoing", "early", "private", "late"]
+
+    def test_private_events_of_user_communities(self, postings):
+        assert ids(postings.query(private_communities=["id-owo"], now=NOW)) == ["ongoing", "early", "private", "late"]
+        assert ids(postings.query(private_communities=["id-fluffy"], now=NOW)) == ["ongoing", "early", "late"]
+
+    def test_filter_communities(self, postings):
+        assert ids(postings.query(communities=["owo"], all_visible=True, now=NOW)) == ["ongoing", "private"]
+        assert ids(postings.query(communities=["missing"], now=NOW)) == []
+
+    def test_filter_languages(self, postings):
+        assert ids(postings.query(languages=["EN"], all_visible=True, now=NOW)) == ["private", "late"]
+        assert ids(postings.query(languages=["en", "fr"], now=NOW)) == ["early", "late"]
+
+    def test_filter_tags(self, postings):
+        assert ids(postings.query(tags=["music"], now=NOW)) == ["late"]
+        assert ids(postings.query(tags=["music", "lang:en"], now=NOW)) == ["late"]
+        assert ids(postings.query(tags=["music", "lang:fr"], now=NOW)) == []
+
+    def test_combined_filters(self, postings):
+        assert ids(postings.query(communities=["fluffy"], languages=["en"], now=NOW)) == ["late"]
+
+    def test_window(self, postings):
+        assert ids(postings.query(start_to=NOW + timedelta(hours=5), now=NOW)) == ["ongoing", "early"]
+        assert ids(postings.query(start_from=NOW + timedelta(hours=2), now=NOW)) == ["late"]
+
+    def test_pages(self, postings):
+        first_page = postings.query(limit=2, now=NOW)
+        assert ids(first_page) == ["ongoing", "early"]
+        after = (first_page[-1].start_time, first_page[-1].id)
+        assert ids(postings.query(after=after, limit=2, now=NOW)) == ["late"]
+
+    def test_community_ids(self, postings):
+        assert postings.community_ids(["fluffy", "empty", "missing"]) == {"id-fluffy", "id-empty"}
+
+class TestEventsIndex:
+
+    def test_reload_events_replace_and_remove_changed_events(self, events_index):
+        index = events_index.EventsIndex()
+        fetched = [[make_event("first", "fluffy", 1), make_event("second", "fluffy", 2)], []]
+        async def fetch(*filters):
+            return fetched.pop(0)
+        async def fetch_communities():
+            return [("id-fluffy", "fluffy")]
+        async def fetch_version():
+            return (NOW, 2, NOW, 1)
+        index._fetch = fetch
+        index._fetch_communities = fetch_communities
+        index._fetch_version = fetch_version
+        async def run():
+            await index.get_postings()
+            await index.apply_change({"table": "event", "ids": ["second"], "community_ids": ["id-fluffy"]})
+            return await index.get_postings()
+        assert ids(asyncio.run(run()).query(now=NOW)) == ["first"]
+        assert index.loads == 2
+
+    def _index(self, events_index, versions):
+        index = events_index.EventsIndex()
+        async def fetch(*filters):
+            return [make_event("first", "fluffy", 1)]
+        async def fetch_communities():
+            return [("id-fluffy", "fluffy")]
+        async def fetch_version():
+            return versions[0]
+        index._fetch = fetch
+        index._fetch_communities = fetch_communities
+        index._fetch_version = fetch_version
+        return index
+
+    def test_missed_changes_make_the_index_stale(self, events_index):
+        versions = [(NOW, 1, NOW, 1)]
+        index = self._index(events_index, versions)
+        async def run():
+            await index.get_postings()
+            stale = [await index.is_stale()]
+            versions[0] = (NOW + timedelta(seconds=1), 1, NOW, 1)
+            stale.append(await index.is_stale())
+            return stale
+        assert asyncio.run(run()) == [False, True]
+
+    def test_notified_changes_are_not_missed(self, events_index):
+        versions = [(NOW, 1, NOW, 1)]
+        index = self._index(events_index, versions)
+        async def run():
+            await index.get_postings()
+            versions[0] = (NOW + timedelta(seconds=1), 1, NOW, 1)
+            await index.apply_change({"table": "event", "ids": ["first"], "community_ids": ["id-fluffy"]})
+            return await index.is_stale()
+        assert not asyncio.run(run())
+
+    def test_polling_calls_on_stale(self, events_index):
+        versions = [(NOW, 1, NOW, 1)]
+        index = self._index(events_index, versions)
+        stale = asyncio.Event()
+        async def on_stale():
+            stale.set()
+        async def run():
+            await index.get_postings()
+            versions[0] = (NOW, 0, NOW, 1)
+            index.start_polling(0, on_stale)
+            await asyncio.wait_for(stale.wait(), 1)
+            await index.stop_polling()
+        asyncio.run(run())
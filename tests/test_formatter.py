@@ -1,8 +1,10 @@
+import gzip
 import json
+from types import SimpleNamespace
 from unittest.mock import MagicMock, patch
 
 import pytest
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
 
 @pytest.fixture(scope='module', autouse=True)
 def _patch_modules():
@@ -13,6 +15,7 @@ def _patch_modules():
         'resonite_communities.utils.tools': MagicMock(),
         'resonite_communities.clients.utils.auth': MagicMock(),
         'resonite_communities.clients.api.utils.cache': MagicMock(),
+        'resonite_communities.clients.api.utils.events_index': MagicMock(),
         'resonite_communities.models.signal': MagicMock(),
         'resonite_communities.models.community': MagicMock(),
     }):
@@ -207,3 +210,345 @@ class TestJSONEncoder:
     def test_non_serializable_raises_type_error(self, JSONEncoder):
         with pytest.raises(TypeError, match="Object of type object is not JSON serializable"):
             json.dumps({'value': object()}, cls=JSONEncoder)
+
+@pytest.fixture
+def EventsSnapshot(_patch_modules):
+    from resonite_communities.clients.api.utils.formatter import EventsSnapshot
+    return EventsSnapshot
+
+class TestEventsSnapshot:
+
+    def _make_event(self, **kwargs):
+        base = {
+            "name": "My fluffy event",
+            "description": "Welcome to all our fluffy beans!\nowo",
+            "start_time": "2023/10/06 18:02:14+00:00",
+        }
+        base.update(kwargs)
+        return base
+
+    def test_text_payload_matches_text_dumps(self, EventsSnapshot, FormatType, text_dumps):
+        events = [self._make_event(), self._make_event(name="My VERY fluffy event!")]
+        snapshot = EventsSnapshot(events, "v1")
+        assert isinstance(snapshot.payload(FormatType.TEXT), bytes)
+        assert snapshot.payload(FormatType.TEXT) == text_dumps(events, "v1").encode()
+
+    def test_json_payload_matches_json_encoder(self, EventsSnapshot, FormatType, JSONEncoder):
+        events = [self._make_event(start_time=datetime(2023, 10, 6, 18, 2, 14, tzinfo=timezone.utc))]
+        snapshot = EventsSnapshot(events, "v2")
+        assert isinstance(snapshot.payload(FormatType.JSON), bytes)
+        assert json.loads(snapshot.payload(FormatType.JSON)) == json.loads(json.dumps(events, cls=JSONEncoder))
+
+    def test_payload_is_built_once(self, EventsSnapshot, FormatType):
+        snapshot = EventsSnapshot([self._make_event()], "v2")
+        assert snapshot.payload(FormatType.JSON) is snapshot.payload(FormatType.JSON)
+
+    def test_cache_size_of_the_payloads(self, EventsSnapshot, FormatType):
+        snapshot = EventsSnapshot(None, "v2", rows={FormatType.TEXT: [b"fluffy"], FormatType.JSON: [b'"fluffy"']})
+        assert snapshot.cache_size == len(b"fluffy") + len(b'["fluffy"]')
+
+    def test_empty_events(self, EventsSnapshot, FormatType):
+        snapshot = EventsSnapshot([], "v1")
+        assert snapshot.payload(FormatType.TEXT) == b""
+        assert snapshot.payload(FormatType.JSON) == b"[]"
+
+    def test_etag_depends_on_format(self, EventsSnapshot, FormatType):
+        snapshot = EventsSnapshot([self._make_event()], "v2")
+        assert snapshot.etag(FormatType.TEXT) != snapshot.etag(FormatType.JSON)
+
+    def test_etag_depends_on_content(self, EventsSnapshot, FormatType):
+        snapshot = EventsSnapshot([self._make_event()], "v2")
+        assert snapshot.etag(FormatType.JSON) == EventsSnapshot([self._make_event()], "v2").etag(FormatType.JSON)
+        other_snapshot = EventsSnapshot([self._make_event(community_name="Fluffier community")], "v2")
+        assert snapshot.etag(FormatType.JSON) != other_snapshot.etag(FormatType.JSON)
+
+    def test_etag_ignores_last_modified(self, EventsSnapshot, FormatType):
+        snapshot = EventsSnapshot([self._make_event()], "v2", last_modified=datetime(2023, 10, 6, tzinfo=timezone.utc))
+        updated_snapshot = EventsSnapshot([self._make_event()], "v2", last_modified=datetime(2023, 10, 7, tzinfo=timezone.utc))
+        assert snapshot.etag(FormatType.JSON) == updated_snapshot.etag(FormatType.JSON)
+
+    def test_etag_changes_with_next_cursor(self, EventsSnapshot, FormatType):
+        snapshot = EventsSnapshot([self._make_event()], "v2")
+        next_page_snapshot = EventsSnapshot([self._make_event()], "v2", next_cursor="fluffy")
+        assert snapshot.etag(FormatType.JSON) != next_page_snapshot.etag(FormatType.JSON)
+
+@pytest.fixture
+def is_not_modified(_patch_modules):
+    from resonite_communities.clients.api.utils.formatter import is_not_modified
+    return is_not_modified
+
+def make_request(headers):
+    from starlette.requests import Request
+    return Request({
+        "type": "http",
+        "method": "GET",
+        "path": "/v2/events",
+        "headers": [(key.lower().encode(), value.encode()) for key, value in headers.items()],
+    })
+
+class TestIsNotModified:
+
+    last_modified = datetime(2023, 10, 6, 18, 2, 14, tzinfo=timezone.utc)
+
+    def test_no_conditional_headers(self, is_not_modified):
+        assert not is_not_modified(make_request({}), '"fluffy"', self.last_modified)
+
+    def test_matching_etag(self, is_not_modified):
+        assert is_not_modified(make_request({"If-None-Match": '"fluffy"'}), '"fluffy"', self.last_modified)
+
+    def test_matching_etag_in_list(self, is_not_modified):
+        assert is_not_modified(make_request({"If-None-Match": '"owo", W/"fluffy"'}), '"fluffy"', self.last_modified)
+
+    def test_wildcard_etag(self, is_not_modified):
+        assert is_not_modified(make_request({"If-None-Match": '*'}), '"fluffy"', self.last_modified)
+
+    def test_non_matching_etag_ignores_if_modified_since(self, is_not_modified):
+        request = make_request({
+            "If-None-Match": '"owo"',
+            "If-Modified-Since": "Sat, 07 Oct 2023 00:00:00 GMT",
+        })
+        assert not is_not_modified(request, '"fluffy"', self.last_modified)
+
+    def test_not_modified_since(self, is_not_modified):
+        request = make_request({"If-Modified-Since": "Fri, 06 Oct 2023 18:02:14 GMT"})
+        assert is_not_modified(request, '"fluffy"', self.last_modified)
+
+    def test_modified_since(self, is_not_modified):
+        request = make_request({"If-Modified-Since": "Fri, 06 Oct 2023 18:00:00 GMT"})
+        assert not is_not_modified(request, '"fluffy"', self.last_modified)
+
+    def test_invalid_if_modified_since(self, is_not_modified):
+        request = make_request({"If-Modified-Since": "fluffy"})
+        assert not is_not_modified(request, '"fluffy"', self.last_modified)
+
+@pytest.fixture
+def FragmentCache(_patch_modules):
+    from resonite_communities.clients.api.utils.formatter import FragmentCache
+    return FragmentCache
+
+@pytest.fixture
+def format_event(_patch_modules):
+    from resonite_communities.clients.api.utils.formatter import format_event
+    return format_event
+
+def make_signal(
+    id="1",
+    name="My fluffy event",
+    updated_at=datetime(2023, 10, 6, tzinfo=timezone.utc),
+    community_name="Fluffy community",
+    community_updated_at=None,
+):
+    community = SimpleNamespace(
+        name=community_name,
+        url="https://fluffy.example",
+        created_at=datetime(2023, 1, 1, tzinfo=timezone.utc),
+        updated_at=community_updated_at,
+    )
+    return SimpleNamespace(
+        id=id,
+        external_id="42",
+        name=name,
+        description="Welcome to all our fluffy beans!\nowo",
+        session_image=None,
+        location="Fluffy world",
+        location_web_session_url=None,
+        location_session_url=None,
+        start_time=datetime(2023, 10, 6, 18, 2, 14),
+        end_time=None,
+        community=community,
+        tags="resonite,public",
+        status="READY",
+        created_at=datetime(2023, 10, 1, tzinfo=timezone.utc),
+        updated_at=updated_at,
+    )
+
+class TestFragmentCache:
+
+    @pytest.mark.parametrize("version", ["v1", "v2"])
+    def test_payloads_match_formatted_events(self, FragmentCache, EventsSnapshot, FormatType, format_event, version):
+        signals = [make_signal(), make_signal(id="2", name="My VERY fluffy event!")]
+        snapshot = EventsSnapshot(None, version, rows=FragmentCache().rows(signals, version))
+        expected = EventsSnapshot([format_event(signal, version) for signal in signals], version)
+        assert snapshot.payloads == expected.payloads
+        assert snapshot.events == json.loads(expected.payload(FormatType.JSON))
+
+    def test_rows_are_serialized_once(self, FragmentCache):
+        cache = FragmentCache()
+        signals = [make_signal(), make_signal(id="2")]
+        first = cache.rows(signals, "v2")
+        assert cache.misses == 2
+        second = cache.rows(signals, "v2")
+        assert cache.hits == 2
+        assert all(a is b for format_type in first for a, b in zip(first[format_type], second[format_type]))
+
+    def test_modified_event_is_serialized_again(self, FragmentCache, FormatType):
+        cache = FragmentCache()
+        cache.rows([make_signal()], "v2")
+        rows = cache.rows([make_signal(name="Renamed", updated_at=datetime(2023, 10, 7, tzinfo=timezone.utc))], "v2")
+        assert json.loads(rows[FormatType.JSON][0])["name"] == "Renamed"
+
+    def test_renamed_community_is_serialized_again(self, FragmentCache, FormatType):
+        cache = FragmentCache()
+        cache.rows([make_signal()], "v2")
+        rows = cache.rows([make_signal(community_name="Fluffier community")], "v2")
+        assert cache.hits == 0
+        assert json.loads(rows[FormatType.JSON][0])["community_name"] == "Fluffier community"
+
+    def test_community_written_without_rendered_changes(self, FragmentCache):
+        cache = FragmentCache()
+        cache.rows([make_signal()], "v2")
+        cache.rows([make_signal(community_updated_at=datetime(2023, 10, 7, tzinfo=timezone.utc))], "v2")
+        assert cache.hits == 1
+
+    def test_versions_are_cached_separately(self, FragmentCache, FormatType):
+        cache = FragmentCache()
+        v1 = cache.rows([make_signal()], "v1")
+        v2 = cache.rows([make_signal()], "v2")
+        assert cache.hits == 0
+        assert v1[FormatType.TEXT] != v2[FormatType.TEXT]
+
+    def test_least_recently_used_rows_are_evicted(self, FragmentCache):
+        cache = FragmentCache(max_entries=4)
+        cache.rows([make_signal(id="1"), make_signal(id="2")], "v2")
+        cache.rows([make_signal(id="1")], "v2")
+        cache.rows([make_signal(id="3")], "v2")
+        assert len(cache) == 4
+        hits = cache.hits
+        cache.rows([make_signal(id="1")], "v2")
+        assert cache.hits == hits + 1
+        cache.rows([make_signal(id="2")], "v2")
+        assert cache.hits == hits + 1
+
+@pytest.fixture
+def send_payload(_patch_modules):
+    from resonite_communities.clients.api.utils.formatter import send_payload
+    return send_payload
+
+@pytest.fixture
+def JSONSnapshot(_patch_modules):
+    from resonite_communities.clients.api.utils.formatter import JSONSnapshot
+    return JSONSnapshot
+
+class TestSendPayload:
+
+    variants = {"identity": b"fluffy", "gzip": b"gzipped fluffy"}
+    last_modified = datetime(2023, 10, 6, 18, 2, 14, tzinfo=timezone.utc)
+
+    def test_identity(self, send_payload):
+        response = send_payload(make_request({}), self.variants, "application/json", '"fluffy"')
+        assert response.body == b"fluffy"
+        assert response.headers["ETag"] == '"fluffy"'
+        assert response.headers["Vary"] == "Accept-Encoding"
+        assert "Content-Encoding" not in response.headers
+
+    def test_compressed_variant(self, send_payload):
+        request = make_request({"Accept-Encoding": "gzip, br"})
+        response = send_payload(request, self.variants, "application/json", '"fluffy"', headers={"X-Next-Cursor": "owo"})
+        assert response.body == b"gzipped fluffy"
+        assert response.headers["Content-Encoding"] == "gzip"
+        assert response.headers["ETag"] == '"fluffy-gzip"'
+        assert response.headers["X-Next-Cursor"] == "owo"
+
+    def test_not_modified_for_the_etag_of_the_encoding(self, send_payload):
+        request = make_request({"Accept-Encoding": "gzip", "If-None-Match": '"fluffy-gzip"'})
+        response = send_payload(request, self.variants, "application/json", '"fluffy"', last_modified=self.last_modified)
+        assert response.status_code == 304
+        assert response.headers["Last-Modified"] == "Fri, 06 Oct 2023 18:02:14 GMT"
+
+    def test_etag_of_other_encoding_is_modified(self, send_payload):
+        request = make_request({"If-None-Match": '"fluffy-gzip"'})
+        response = send_payload(request, self.variants, "application/json", '"fluffy"')
+        assert response.status_code == 200
+
+class TestJSONSnapshot:
+
+    def test_response(self, JSONSnapshot):
+        snapshot = JSONSnapshot([{"name": "My fluffy event"}] * 100, headers={"X-Next-Cursor": "owo"})
+        response = snapshot.response(make_request({"Accept-Encoding": "gzip"}))
+        assert response.headers["Content-Encoding"] == "gzip"
+        assert response.headers["X-Next-Cursor"] == "owo"
+        assert json.loads(gzip.decompress(response.body)) == [{"name": "My fluffy event"}] * 100
+
+    def test_etag_depends_on_content(self, JSONSnapshot):
+        assert JSONSnapshot([1]).etag() == JSONSnapshot([1]).etag()
+        assert JSONSnapshot([1]).etag() != JSONSnapshot([2]).etag()
+
+class TestEventsSnapshotCompression:
+
+    def test_variants_are_built_with_the_snapshot(self, EventsSnapshot, FormatType):
+        events = [{"name": "My fluffy event", "description": "Welcome to all our fluffy beans!"}] * 100
+        snapshot = EventsSnapshot(events, "v2")
+        for format_type in FormatType:
+            assert gzip.decompress(snapshot.payload(format_type, "gzip")) == snapshot.payload(format_type)
+
+@pytest.fixture
+def format_signal(_patch_modules):
+    from resonite_communities.clients.api.utils.formatter import format_signal
+    return format_signal
+
+class TestFormatSignal:
+
+    def _make_row(self, **kwargs):
+        row = {
+            "type": "stream",
+            "id": "1",
+            "external_id": 42,
+            "name": "My fluffy stream",
+            "description": None,
+            "session_image": None,
+            "location_str": None,
+            "location_web_session_url": None,
+            "location_session_url": None,
+            "start_time": datetime(2023, 10, 6, 18, 2, 14, tzinfo=timezone.utc),
+            "end_time": datetime(2023, 10, 6, 20, 2, 14, tzinfo=timezone.utc),
+            "community_name": "fluffy",
+            "community_url": "https://twitch.tv/fluffy",
+            "community_logo": "https://fluffy.example/logo.png",
+            "tags": "resonite",
+            "status": "READY",
+        }
+        row.update(kwargs)
+        return SimpleNamespace(**row)
+
+    def test_stream(self, format_signal):
+        signal = format_signal(self._make_row())
+        assert signal["type"] == "stream"
+        assert signal["external_id"] == "42"
+        assert signal["start_time"] == "2023-10-06T18:02:14Z"
+        assert signal["end_time"] == "2023-10-06T20:02:14Z"
+        assert signal["description"] is None
+
+    def test_event_without_end_time(self, format_signal):
+        signal = format_signal(self._make_row(type="event", end_time=None, description="owo"))
+        assert signal["type"] == "event"
+        assert signal["end_time"] is None
+        assert signal["description"] == "owo"
+
+    def test_same_fields_for_every_type(self, format_signal):
+        assert format_signal(self._make_row()).keys() == format_signal(self._make_row(type="event")).keys()
+
+@pytest.fixture
+def expire_until_end(_patch_modules):
+    from resonite_communities.clients.api.utils import formatter
+    with patch.object(formatter.config_manager.infrastructure_config, 'CACHE_TTL', 86400):
+        yield formatter.expire_until_end
+
+class TestExpireUntilEnd:
+
+    now = datetime(2023, 10, 6, 12, 0, 0)
+
+    def test_aware_end_time(self, expire_until_end):
+        end_time = datetime(2023, 10, 6, 14, 0, 0, tzinfo=timezone(timedelta(hours=1)))
+        signal = SimpleNamespace(start_time=end_time - timedelta(hours=1), end_time=end_time)
+        assert expire_until_end([signal], self.now) == 3601
+
+    def test_naive_start_time(self, expire_until_end):
+        signal = SimpleNamespace(start_time=datetime(2023, 10, 6, 12, 30, 0), end_time=None)
+        assert expire_until_end([signal], self.now) == 1801
+
+    def test_ended_signal(self, expire_until_end):
+        signal = SimpleNamespace(start_time=datetime(2023, 10, 6, 10, 0, 0, tzinfo=timezone.utc), end_time=None)
+        assert expire_until_end([signal], self.now) == 1
+
+    def test_no_signals(self, expire_until_end):
+        assert expire_until_end([], self.now) == 86400
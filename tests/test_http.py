@@ -0,0 +1,146 @@
+import asyncio
+from unittest.mock import AsyncMock, patch
+
+import httpx
+import pytest
+
+from resonite_communities.utils import http
+from resonite_communities.utils.http import HTTPClient
+
+def make_client(handler, **kwargs):
+    kwargs.setdefault('retry_backoff', 0)
+    return HTTPClient(transport=httpx.MockTransport(handler), **kwargs)
+
+def run(client, coroutine):
+    async def run_and_close():
+        try:
+            return await coroutine
+        finally:
+            await client.close()
+    return asyncio.run(run_and_close())
+
+class TestRequest:
+
+    def test_retry_transient_status(self):
+        statuses = [503, 502, 200]
+        requests = []
+
+        def handler(request):
+            requests.append(request)
+            return httpx.Response(statuses[len(requests) - 1], json={'fluffy': True})
+
+        client = make_client(handler)
+        response = run(client, client.get('https://fluffy.example/events'))
+        assert response.status_code == 200
+        assert len(requests) == 3
+
+    def test_last_response_returned_after_retries(self):
+        client = make_client(lambda request: httpx.Response(503), retries=2)
+        response = run(client, client.get('https://fluffy.example/events'))
+        assert response.status_code == 503
+
+    def test_no_retry_on_client_error(self):
+        requests = []
+
+        def handler(request):
+            requests.append(request)
+            return httpx.Response(404)
+
+        client = make_client(handler)
+        assert run(client, client.get('https://fluffy.example/events')).status_code == 404
+        assert len(requests) == 1
+
+    def test_retry_after(self):
+        responses = [httpx.Response(429, headers={'Retry-After': '2'}), httpx.Response(200)]
+        client = make_client(lambda request: responses.pop(0))
+        with patch.object(http.asyncio, 'sleep', AsyncMock()) as sleep:
+            assert run(client, client.get('https://fluffy.example/events')).status_code == 200
+        sleep.assert_awaited_once_with(2.0)
+
+    def test_retry_after_too_long(self):
+        client = make_client(lambda request: httpx.Response(429, headers={'Retry-After': '3600'}))
+        assert run(client, client.get('https://fluffy.example/events')).status_code == 429
+
+    def test_transport_error(self):
+        requests = []
+
+        def handler(request):
+            requests.append(request)
+            raise httpx.ConnectTimeout('fluffy timeout', request=request)
+
+        client = make_client(handler, retries=2)
+        with pytest.raises(httpx.ConnectTimeout):
+            run(client, client.get('https://fluffy.example/events'))
+        assert len(requests) == 3
+
+    def test_requests_by_host_are_limited(self):
+        running = {'fluffy.example': 0, 'other.example': 0}
+        max_running = {'fluffy.example': 0, 'other.example': 0}
+
+        async def handler(request):
+            host = request.url.host
+            running[host] += 1
+            max_running[host] = max(max_running[host], running[host])
+            await asyncio.sleep(0.01)
+            running[host] -= 1
+            return httpx.Response(200)
+
+        client = make_client(handler, max_connections_per_host=2)
+        urls = [f'https://{host}/events/{index}' for host in running for index in range(5)]
+
+        async def fetch():
+            await asyncio.gather(*(client.get(url) for url in urls))
+
+        run(client, fetch())
+        assert max_running == {'fluffy.example': 2, 'other.example': 2}
+
+class TestGetIfModified:
+
+    def _handler(self, requests):
+        def handler(request):
+            requests.append(request)
+            if request.headers.get('If-None-Match') == '"fluffy"':
+                return httpx.Response(304)
+            return httpx.Response(
+                200,
+                json=[{'name': 'Fluffy event'}],
+                headers={'ETag': '"fluffy"', 'Last-Modified': 'Wed, 01 Jan 2025 00:00:00 GMT'},
+            )
+        return handler
+
+    def test_not_modified_once_processed(self):
+        requests = []
+        client = make_client(self._handler(requests))
+
+        async def fetch():
+            response = await client.get_if_modified('https://fluffy.example/events', key='fluffy')
+            assert response.json() == [{'name': 'Fluffy event'}]
+            client.store_validators('fluffy', response)
+            return await client.get_if_modified('https://fluffy.example/events', key='fluffy')
+
+        assert run(client, fetch()) is None
+        assert 'If-None-Match' not in requests[0].headers
+        assert requests[1].headers['If-None-Match'] == '"fluffy"'
+        assert requests[1].headers['If-Modified-Since'] == 'Wed, 01 Jan 2025 00:00:00 GMT'
+
+    def test_fetched_again_when_not_processed(self):
+        requests = []
+        client = make_client(self._handler(requests))
+
+        async def fetch():
+            await client.get_if_modified('https://fluffy.example/events')
+            return await client.get_if_modified('https://fluffy.example/events')
+
+        assert run(client, fetch()).status_code == 200
+        assert 'If-None-Match' not in requests[1].headers
+
+    def test_validators_by_key(self):
+        requests = []
+        client = make_client(self._handler(requests))
+
+        async def fetch():
+            response = await client.get_if_modified('https://fluffy.example/events', key='first')
+            client.store_validators('first', response)
+            return await client.get_if_modified('https://fluffy.example/events', key='second')
+
+        assert run(client, fetch()).status_code == 200
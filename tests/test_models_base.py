@@ -0,0 +1,246 @@
+import asyncio
+import sys
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+sys.modules['resonite_communities.utils.config'] = MagicMock()
+sys.modules['resonite_communities.utils.db'] = MagicMock()
+
+from resonite_communities.models import base
+from resonite_communities.models.community import Community
+from resonite_communities.models.signal import Event
+
+def compile(query):
+    return str(query.compile(dialect=postgresql.dialect()))
+
+def make_session(result):
+    """Session returning `result` for every statement."""
+    session = MagicMock()
+    session.execute = AsyncMock(return_value=result)
+    session.commit = AsyncMock()
+    return session
+
+def run(session, coroutine, notify=None):
+    """Run a database method with `session` as the current session, the change notifications going to `notify`."""
+    with patch.object(base, 'get_current_async_session', AsyncMock(return_value=session)), \
+            patch.object(base, 'notify_changes', notify or AsyncMock()):
+        return asyncio.run(coroutine)
+
+class TestFindQuery:
+
+    def test_relationships_not_loaded_by_default(self):
+        query = Community._find_query({})
+        assert query._with_options == ()
+        assert compile(query).startswith("SELECT community.id,")
+
+    def test_load_relationship(self):
+        query = Event._find_query({'__load': ['community']})
+        assert len(query._with_options) == 1
+
+    def test_columns(self):
+        query = Community._find_query({'__columns': ['external_id', 'id'], 'name': 'fluffy'})
+        assert compile(query).startswith("SELECT community.external_id, community.id \nFROM community")
+
+    @pytest.mark.parametrize("filters, message", [
+        ({'__columns': ['fluffiness']}, "Invalid column 'fluffiness'"),
+        ({'__load': ['fluffiness']}, "Invalid relationship 'fluffiness'"),
+        ({'__columns': ['id'], '__load': ['community']}, "can't be loaded with a columns selection"),
+    ])
+    def test_invalid(self, filters, message):
+        with pytest.raises(ValueError, match=message):
+            Event._find_query(filters)
+
+class TestFind:
+
+    def test_columns_return_mappings(self):
+        result = MagicMock()
+        result.mappings.return_value.all.return_value = [{'id': 1, 'name': 'fluffy'}]
+        rows = run(make_session(result), Community.find(__columns=['id', 'name']))
+        assert rows == [{'id': 1, 'name': 'fluffy'}]
+
+    def test_instances(self):
+        community = Community(name='fluffy')
+        result = MagicMock()
+        result.unique.return_value.all.return_value = [(community,)]
+        assert run(make_session(result), Community.find(name='fluffy')) == [community]
+
+class TestBulkUpsert:
+
+    def _session(self):
+        result = MagicMock(rowcount=2)
+        result.all.return_value = []
+        return make_session(result)
+
+    def _upsert(self, session, model, *args, **kwargs):
+        return run(session, model.bulk_upsert(*args, **kwargs))
+
+    def test_empty(self):
+        session = self._session()
+        assert self._upsert(session, Event, [], 'external_id') == 0
+        session.execute.assert_not_called()
+
+    def test_chunks_and_single_commit(self):
+        session = self._session()
+        rows = [{'external_id': str(index), 'name': 'fluffy'} for index in range(5)]
+        with patch.object(Community, 'notify_changes', False):
+            assert self._upsert(session, Community, rows, 'external_id', chunk_size=2) == 6
+        assert session.execute.await_count == 3
+        session.commit.assert_awaited_once()
+
+        query = compile(session.execute.await_args_list[0].args[0])
+        assert query.startswith("INSERT INTO community (")
+        assert "ON CONFLICT (external_id) DO UPDATE SET " in query
+        assert query.split("DO UPDATE SET ")[1].split(", ") == ["updated_at = %(param_1)s", "name = excluded.name"]
+        assert "created_at = excluded" not in query
+        assert "RETURNING" not in query
+
+    def test_insert_fields_not_updated(self):
+        session = self._session()
+        self._upsert(session, Event, [{'external_id': '1', 'name': 'fluffy'}], 'external_id')
+        query = compile(session.execute.await_args.args[0])
+        assert "status" in query.split(" ON CONFLICT ")[0]
+        assert query.split("DO UPDATE SET ")[1].split(" RETURNING")[0].split(", ") == [
+            "updated_at = %(param_1)s", "name = excluded.name",
+        ]
+
+    def test_changes_are_notified(self):
+        session = self._session()
+        session.execute.return_value.all.return_value = [MagicMock(id=1, community_id=2)]
+        notify = AsyncMock()
+        assert run(session, Event.bulk_upsert([{'external_id': '1', 'name': 'fluffy'}], 'external_id'), notify) == 1
+        notify.assert_awaited_once_with(session, 'event', ids=[1], community_ids=[2])
+
+    def test_duplicates_keep_last_row(self):
+        session = self._session()
+        rows = [{'external_id': '1', 'name': 'fluffy'}, {'external_id': '1', 'name': 'fluffier'}]
+        self._upsert(session, Community, rows, 'external_id')
+        params = session.execute.await_args.args[0].compile(dialect=postgresql.dialect()).params
+        assert params['name_m0'] == 'fluffier'
+        assert 'name_m1' not in params
+
+    def test_return_ids(self):
+        session = self._session()
+        session.execute.return_value.all.return_value = [MagicMock(id=1), MagicMock(id=2)]
+        ids = self._upsert(session, Event, [{'external_id': '1', 'name': 'fluffy'}], 'external_id', return_ids=True)
+        assert ids == [1, 2]
+        assert "RETURNING event.id, event.community_id" in compile(session.execute.await_args.args[0])
+
+    @pytest.mark.parametrize("rows, message", [
+        ([{'external_id': '1', 'name': 'a'}, {'external_id': '2'}], "same fields"),
+        ([{'name': 'a'}], "Missing conflict fields"),
+        ([{'external_id': '1', 'fluffiness': 1}], "Invalid filter field 'fluffiness'"),
+    ])
+    def test_invalid(self, rows, message):
+        with pytest.raises(ValueError, match=message):
+            self._upsert(self._session(), Community, rows, 'external_id')
+
+class TestUpdate:
+
+    def _update(self, session, model, *args, **kwargs):
+        return run(session, model.update(*args, **kwargs))
+
+    def test_returning_instances(self):
+        event = Event(name='fluffy')
+        result = MagicMock()
+        result.scalars.return_value.all.return_value = [event]
+        session = make_session(result)
+        assert self._update(session, Event, Event.name == 'fluffy', name='fluffier') == [event]
+        assert session.execute.await_count == 1
+        session.commit.assert_awaited_once()
+
+        query = compile(session.execute.await_args.args[0])
+        assert query.startswith("UPDATE event SET updated_at=%(updated_at)s, name=%(name)s WHERE event.name = ")
+        assert "RETURNING event.id, " in query
+
+    def test_without_returning(self):
+        session = make_session(MagicMock(rowcount=3))
+        with patch.object(Community, 'notify_changes', False):
+            assert self._update(session, Community, Community.name == 'fluffy', _returning=False, name='a') == 3
+        assert "RETURNING" not in compile(session.execute.await_args.args[0])
+        session.commit.assert_awaited_once()
+
+    def test_without_returning_reads_ids_to_notify(self):
+        result = MagicMock()
+        result.all.return_value = [MagicMock(id=1, community_id=2)]
+        session = make_session(result)
+        assert self._update(session, Event, Event.name == 'fluffy', _returning=False, name='a') == 1
+        assert compile(session.execute.await_args.args[0]).endswith("RETURNING event.id, event.community_id")
+
+    def test_only_changed(self):
+        session = make_session(MagicMock(rowcount=0))
+        with patch.object(Community, 'notify_changes', False):
+            assert self._update(session, Community, Community.id == 1, _returning=False, _only_changed=True,
+                                name='fluffy', logo=None) == 0
+        query = compile(session.execute.await_args.args[0])
+        assert query.split(" WHERE ")[1].startswith(
+            "community.id = %(id_1)s AND (community.name IS DISTINCT FROM %(name_1)s "
+            "OR community.logo IS DISTINCT FROM NULL)"
+        )
+        session.commit.assert_not_called()
+
+    def test_nothing_updated(self):
+        result = MagicMock()
+        result.scalars.return_value.all.return_value = []
+        session = make_session(result)
+        assert self._update(session, Event, Event.name == 'fluffy', name='a') == []
+        session.commit.assert_not_called()
+
+class TestUpsert:
+
+    def test_only_changed(self):
+        result = MagicMock()
+        result.first.return_value = None
+        session = make_session(result)
+        notify = AsyncMock()
+        instance = run(session, Community.upsert(
+            ['external_id', 'platform'], ['1', 'TWITCH'], _only_changed=True, external_id='1', name='fluffy',
+        ), notify)
+        assert instance is None
+        notify.assert_not_called()
+        session.commit.assert_not_called()
+
+        query = compile(session.execute.await_args.args[0])
+        conflict = query.split("ON CONFLICT (external_id, platform) DO UPDATE SET ")[1]
+        assert " WHERE community.external_id IS DISTINCT FROM excluded.external_id " \
+            "OR community.name IS DISTINCT FROM excluded.name RETURNING " in conflict
+        assert "updated_at IS DISTINCT FROM" not in conflict
+
+class TestDelete:
+
+    def _delete(self, session, model, **filters):
+        return run(session, model.delete(**filters))
+
+    def _session(self):
+        result = MagicMock()
+        result.all.return_value = [MagicMock(id=1, community_id=2)]
+        return make_session(result)
+
+    def test_single_statement(self):
+        session = self._session()
+        assert self._delete(session, Event, name='fluffy') == 1
+        assert session.execute.await_count == 1
+        query = compile(session.execute.await_args.args[0])
+        assert query.startswith("DELETE FROM event WHERE event.name = %(name_1)s")
+        session.commit.assert_awaited_once()
+
+    def test_returning_ids(self):
+        session = self._session()
+        assert self._delete(session, Event, _returning=True, name='fluffy') == [1]
+
+    def test_cascade(self):
+        session = self._session()
+        self._delete(session, Community, id__eq=1)
+        queries = [compile(call.args[0]) for call in session.execute.await_args_list]
+        assert len(queries) == 3
+        assert queries[0].startswith("DELETE FROM event WHERE event.community_id IN (SELECT community.id")
+        assert queries[1].startswith("DELETE FROM stream WHERE stream.community_id IN (SELECT community.id")
+        assert queries[2].startswith("DELETE FROM community WHERE community.id = ")
+
+    def test_limit(self):
+        session = self._session()
+        self._delete(session, Event, __order_by=['start_time'], __limit=10)
+        query = compile(session.execute.await_args.args[0])
+        assert query.startswith("DELETE FROM event WHERE event.id IN (SELECT event.id")
+        assert "LIMIT" in query
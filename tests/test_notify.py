@@ -0,0 +1,33 @@
+import json
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+@pytest.fixture(scope='module', autouse=True)
+def _patch_modules():
+    with patch.dict('sys.modules', {
+        'resonite_communities.utils.logger': MagicMock(),
+    }):
+        yield
+
+@pytest.fixture(scope='module')
+def notify(_patch_modules):
+    from resonite_communities.utils import notify
+    return notify
+
+class TestBuildChangesPayload:
+
+    def test_payload(self, notify):
+        payload = json.loads(notify.build_changes_payload("event", [2, 1, 1], ["fluffy", None]))
+        assert payload == {"table": "event", "ids": ["1", "2"], "community_ids": ["fluffy"]}
+
+    def test_too_many_ids_are_dropped(self, notify):
+        payload = notify.build_changes_payload("event", [f"{index:036}" for index in range(500)], ["fluffy"])
+        assert len(payload) <= notify.MAX_PAYLOAD_SIZE
+        assert json.loads(payload) == {"table": "event", "ids": None, "community_ids": ["fluffy"]}
+
+    def test_too_many_communities_are_dropped(self, notify):
+        ids = [f"{index:036}" for index in range(500)]
+        payload = notify.build_changes_payload("event", ids, ids)
+        assert len(payload) <= notify.MAX_PAYLOAD_SIZE
+        assert json.loads(payload) == {"table": "event", "ids": None, "community_ids": None}
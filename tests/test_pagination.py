@@ -0,0 +1,41 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from fastapi import HTTPException
+
+from resonite_communities.clients.api.utils.pagination import Window, decode_cursor, encode_cursor, to_utc_naive
+
+class TestCursor:
+
+    def test_round_trip(self):
+        start_time = datetime(2025, 1, 1, 12, 30)
+        cursor = encode_cursor(start_time, "fluffy")
+        assert decode_cursor(cursor) == (start_time, "fluffy")
+
+    def test_aware_start_time_is_stored_as_utc(self):
+        start_time = datetime(2025, 1, 1, 14, 30, tzinfo=timezone(timedelta(hours=2)))
+        assert decode_cursor(encode_cursor(start_time, "fluffy")) == (datetime(2025, 1, 1, 12, 30), "fluffy")
+
+    @pytest.mark.parametrize("cursor", ["not a cursor", "bm90IGpzb24", "WzFd"])
+    def test_invalid_cursor(self, cursor):
+        with pytest.raises(HTTPException) as exc_info:
+            decode_cursor(cursor)
+        assert exc_info.value.status_code == 400
+
+class TestWindow:
+
+    def test_empty_window(self):
+        assert not Window()
+
+    def test_cache_key_depends_on_all_the_parameters(self):
+        start_time = datetime(2025, 1, 1)
+        windows = [
+            Window(start_from=start_time),
+            Window(start_to=start_time),
+            Window(after=(start_time, "fluffy")),
+            Window(limit=20),
+        ]
+        assert len({window.cache_key() for window in windows}) == len(windows)
+
+    def test_to_utc_naive(self):
+        assert to_utc_naive(datetime(2025, 1, 1, 2, tzinfo=timezone(timedelta(hours=2)))) == datetime(2025, 1, 1)
@@ -0,0 +1,97 @@
+import asyncio
+import json
+from datetime import datetime, timezone
+from enum import Enum
+from unittest.mock import patch
+from uuid import UUID
+
+import pytest
+
+from resonite_communities.clients.api.utils import serializer
+from resonite_communities.clients.api.utils.serializer import (
+    SerializedJSONResponse,
+    dumps,
+    stream_json_array,
+)
+
+class Status(str, Enum):
+    READY = "READY"
+
+class Platform(Enum):
+    DISCORD = "Discord"
+
+VALUE = {
+    "id": UUID("12345678-1234-5678-1234-567812345678"),
+    "start_time": datetime(2025, 1, 1, 12, 30, tzinfo=timezone.utc),
+    "naive_time": datetime(2025, 1, 1, 12, 30),
+    "status": Status.READY,
+    "platform": Platform.DISCORD,
+    "name": "Fluffy événement",
+    "tags": ["a", "b"],
+}
+
+EXPECTED = {
+    "id": "12345678-1234-5678-1234-567812345678",
+    "start_time": "2025-01-01T12:30:00+00:00",
+    "naive_time": "2025-01-01T12:30:00",
+    "status": "READY",
+    "platform": "Discord",
+    "name": "Fluffy événement",
+    "tags": ["a", "b"],
+}
+
+@pytest.fixture(params=["orjson", "stdlib"])
+def encoder(request):
+    if request.param == "orjson":
+        if serializer.orjson is None:
+            pytest.skip("orjson is not installed")
+        yield
+    else:
+        with patch.object(serializer, "orjson", None):
+            yield
+
+async def _rows(rows):
+    for row in rows:
+        yield row
+
+def _collect(chunks):
+    async def collect():
+        return [chunk async for chunk in chunks]
+    return asyncio.run(collect())
+
+class TestDumps:
+
+    def test_native_types(self, encoder):
+        assert json.loads(dumps(VALUE)) == EXPECTED
+
+    def test_returns_compact_utf8_bytes(self, encoder):
+        payload = dumps({"name": "é", "tags": [1, 2]})
+        assert payload == '{"name":"é","tags":[1,2]}'.encode()
+
+    def test_unsupported_type(self, encoder):
+        with pytest.raises(TypeError):
+            dumps({"value": object()})
+
+class TestStreamJsonArray:
+
+    def test_empty(self, encoder):
+        assert b"".join(_collect(stream_json_array(_rows([])))) == b"[]"
+
+    def test_rows_are_formatted(self, encoder):
+        chunks = _collect(stream_json_array(_rows([1, 2, 3]), lambda row: {"row": row}))
+        assert json.loads(b"".join(chunks)) == [{"row": 1}, {"row": 2}, {"row": 3}]
+
+    def test_large_array_is_sent_in_chunks(self, encoder):
+        rows = [VALUE] * 2000
+        chunks = _collect(stream_json_array(_rows(rows)))
+        assert len(chunks) > 1
+        assert all(len(chunk) < serializer.STREAM_CHUNK_SIZE * 2 for chunk in chunks)
+        assert json.loads(b"".join(chunks)) == [EXPECTED] * 2000
+
+class TestSerializedJSONResponse:
+
+    def test_body(self, encoder):
+        response = SerializedJSONResponse([VALUE], headers={"X-Next-Cursor": "fluffy"})
+        assert response.media_type == "application/json"
+        assert response.headers["X-Next-Cursor"] == "fluffy"
+        assert json.loads(response.body) == [EXPECTED]
@@ -0,0 +1,27 @@
+import sys
+from datetime import datetime, timedelta
+from unittest.mock import MagicMock
+
+from sqlalchemy.dialects import postgresql
+
+sys.modules['resonite_communities.utils.config'] = MagicMock()
+sys.modules['resonite_communities.utils.db'] = MagicMock()
+
+from resonite_communities.clients.api.utils.formatter import signals_query
+from resonite_communities.clients.api.utils.pagination import Window
+
+class TestSignalsQuery:
+
+    now = datetime(2025, 1, 1, 12, 0)
+
+    def _params(self, window):
+        return signals_query(self.now, window).compile(dialect=postgresql.dialect()).params
+
+    def test_from_in_the_past_starts_now(self):
+        params = self._params(Window(start_from=self.now - timedelta(days=1)))
+        assert self.now in params.values()
+        assert self.now - timedelta(days=1) not in params.values()
+
+    def test_from_in_the_future(self):
+        params = self._params(Window(start_from=self.now + timedelta(days=1)))
+        assert self.now + timedelta(days=1) in params.values()
@@ -0,0 +1,234 @@
+import asyncio
+import sys
+import time
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import httpx
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+sys.modules['resonite_communities.utils.config'] = MagicMock()
+
+from resonite_communities.utils import tools
+from resonite_communities.utils.http import HTTPClient
+from resonite_communities.utils.tools import TwitchClient
+
+GAME_ID = '1234'
+
+class FakeHelix:
+    """Local Helix server with the endpoints used by TwitchClient."""
+
+    def __init__(self, users, segments=None, expires_in=3600, ratelimit=800):
+        self.users = {login: {'id': str(index), 'login': login} for index, login in enumerate(users)}
+        self.segments = segments or {}
+        self.expires_in = expires_in
+        self.ratelimit = ratelimit
+        self.tokens = []
+        self.revoked = set()
+        self.requests = []
+        self.app = FastAPI()
+        self.app.post('/oauth2/token')(self.token)
+        self.app.get('/helix/users')(self.get_users)
+        self.app.get('/helix/channels/followers')(self.get_followers)
+        self.app.get('/helix/schedule')(self.get_schedule)
+
+    def client(self, **kwargs):
+        http = HTTPClient(transport=httpx.ASGITransport(app=self.app), retry_backoff=0)
+        return TwitchClient(
+            client_id='fluffy', secret='secret', game_id=GAME_ID, account_name='fluffy_account', http=http,
+            api_url='http://helix.test/helix', auth_url='http://helix.test/oauth2/token', **kwargs,
+        )
+
+    async def token(self):
+        self.tokens.append(f'token-{len(self.tokens)}')
+        return {'access_token': self.tokens[-1], 'expires_in': self.expires_in, 'token_type': 'bearer'}
+
+    def _response(self, request: Request, content):
+        self.requests.append(request)
+        if request.headers['Authorization'].removeprefix('Bearer ') not in set(self.tokens) - self.revoked:
+            return JSONResponse({'error': 'Unauthorized', 'status': 401, 'message': 'Invalid token'}, status_code=401)
+        self.ratelimit -= 1
+        headers = {
+            'Ratelimit-Limit': '800',
+            'Ratelimit-Remaining': str(max(self.ratelimit, 0)),
+            'Ratelimit-Reset': str(int(time.time())),
+        }
+        if self.ratelimit < 0:
+            # Reset right away
+            self.ratelimit = 800
+            return JSONResponse({'error': 'Too Many Requests'}, status_code=429, headers=headers)
+        return JSONResponse(content, headers=headers)
+
+    async def get_users(self, request: Request):
+        logins = request.query_params.getlist('login')
+        return self._response(request, {'data': [self.users[login] for login in logins if login in self.users]})
+
+    async def get_followers(self, request: Request):
+        return self._response(request, {'total': 42, 'data': []})
+
+    async def get_schedule(self, request: Request):
+        segments = self.segments.get(request.query_params['broadcaster_id'])
+        if segments is None:
+            return JSONResponse({'error': 'Not Found', 'status': 404}, status_code=404)
+        first = int(request.query_params['first'])
+        start = int(request.query_params.get('after', 0))
+        page = segments[start:start + first]
+        cursor = str(start + first) if start + first < len(segments) else None
+        return self._response(request, {
+            'data': {'segments': page, 'broadcaster_name': 'Fluffy'},
+            'pagination': {'cursor': cursor} if cursor else {},
+        })
+
+def segment(index, game_id=GAME_ID):
+    return {'id': f'segment-{index}', 'title': f'Fluffy stream {index}', 'category': {'id': game_id}}
+
+def run(client, coroutine):
+    async def run_and_close():
+        try:
+            await client.auth()
+            return await coroutine()
+        finally:
+            await client.http.close()
+    return asyncio.run(run_and_close())
+
+class TestGetUsers:
+
+    def test_logins_batched(self):
+        logins = [f'streamer_{index}' for index in range(150)]
+        helix = FakeHelix(logins)
+        client = helix.client()
+        users = run(client, lambda: client.get_users(logins + ['Streamer_0', 'unknown']))
+
+        assert set(users) == set(logins)
+        batches = [request.query_params.getlist('login') for request in helix.requests]
+        assert sorted(len(batch) for batch in batches) == [51, 100]
+
+    def test_broadcasters_info(self):
+        helix = FakeHelix(['fluffy'])
+        client = helix.client()
+        streamers = [MagicMock(external_id='Fluffy'), MagicMock(external_id='unknown')]
+        info = run(client, lambda: client.get_broadcasters_info(streamers))
+
+        assert list(info) == ['Fluffy']
+        assert info['Fluffy']['followers']['total'] == 42
+
+class TestGetSchedule:
+
+    def test_pages_followed(self):
+        helix = FakeHelix(['fluffy'], segments={'0': [segment(index) for index in range(60)]})
+        client = helix.client()
+        events = run(client, lambda: client.get_schedule({'id': '0', 'login': 'fluffy'}))
+
+        assert [event['id'] for event in events] == [f'segment-{index}' for index in range(60)]
+        assert [request.query_params.get('after') for request in helix.requests] == [None, '25', '50']
+
+    def test_repeated_cursor_stops(self):
+        class LoopingHelix(FakeHelix):
+            async def get_schedule(self, request: Request):
+                # Always point back to the second page
+                return self._response(request, {
+                    'data': {'segments': [segment(request.query_params.get('after', 0))]},
+                    'pagination': {'cursor': '25'},
+                })
+
+        helix = LoopingHelix(['fluffy'])
+        client = helix.client()
+        events = run(client, lambda: client.get_schedule({'id': '0', 'login': 'fluffy'}))
+
+        assert [event['id'] for event in events] == ['segment-0', 'segment-25']
+        assert [request.query_params.get('after') for request in helix.requests] == [None, '25']
+
+    def test_pages_capped(self):
+        segments = [segment(index) for index in range(tools.HELIX_SCHEDULE_MAX_PAGES * 30)]
+        helix = FakeHelix(['fluffy'], segments={'0': segments})
+        client = helix.client()
+        events = run(client, lambda: client.get_schedule({'id': '0', 'login': 'fluffy'}))
+
+        assert len(helix.requests) == tools.HELIX_SCHEDULE_MAX_PAGES
+        assert events == segments[:tools.HELIX_SCHEDULE_MAX_PAGES * tools.HELIX_SCHEDULE_PAGE_SIZE]
+
+    def test_other_games_filtered(self):
+        helix = FakeHelix(['fluffy'], segments={'0': [segment(0), segment(1, game_id='other')]})
+        client = helix.client()
+        events = run(client, lambda: client.get_schedule({'id': '0', 'login': 'fluffy'}))
+        assert [event['id'] for event in events] == ['segment-0']
+
+    def test_schedules_fetched_concurrently(self):
+        helix = FakeHelix([], segments={str(index): [segment(index)] for index in range(10)})
+        client = helix.client(concurrency=3)
+        running = 0
+        max_running = 0
+        get = client.http.get
+
+        async def counted_get(*args, **kwargs):
+            nonlocal running, max_running
+            running += 1
+            max_running = max(max_running, running)
+            await asyncio.sleep(0.01)
+            try:
+                return await get(*args, **kwargs)
+            finally:
+                running -= 1
+
+        client.http.get = counted_get
+        broadcasters = [{'id': str(index), 'login': f'streamer_{index}'} for index in range(10)] + [
+            {'id': 'no_schedule', 'login': 'no_schedule'},
+        ]
+        schedules = run(client, lambda: client.get_schedules(broadcasters))
+
+        assert schedules['no_schedule'] == []
+        assert [event['id'] for event in schedules['9']] == ['segment-9']
+        assert max_running == 3
+
+class TestToken:
+
+    def test_refreshed_before_expiring(self):
+        helix = FakeHelix(['fluffy'], expires_in=60)
+        client = helix.client()
+
+        async def get_users():
+            await client.get_users(['fluffy'])
+            with patch.object(tools.time, 'monotonic', return_value=time.monotonic() + 31):
+                await client.get_users(['fluffy'])
+
+        run(client, get_users)
+        assert helix.tokens == ['token-0', 'token-1']
+        assert [request.headers['Authorization'] for request in helix.requests] == [
+            'Bearer token-0', 'Bearer token-1',
+        ]
+
+    def test_refreshed_once_refused(self):
+        helix = FakeHelix(['fluffy'])
+        client = helix.client()
+
+        async def get_users():
+            helix.revoked.add('token-0')
+            return await asyncio.gather(client.get_users(['fluffy']), client.get_users(['fluffy']))
+
+        assert run(client, get_users) == [{'fluffy': helix.users['fluffy']}] * 2
+        assert helix.tokens == ['token-0', 'token-1']
+
+class TestRateLimit:
+
+    def test_wait_for_reset(self):
+        helix = FakeHelix(['fluffy'], ratelimit=1)
+        client = helix.client()
+        with patch.object(tools.asyncio, 'sleep', AsyncMock()) as sleep:
+            async def get_users():
+                await client.get_users(['fluffy'])
+                client._ratelimit_reset = time.time() + 10
+                helix.ratelimit = 800
+                return await client.get_users(['fluffy'])
+
+            assert run(client, get_users) == {'fluffy': helix.users['fluffy']}
+        sleep.assert_awaited_once()
+        assert 9 < sleep.await_args.args[0] <= 10
+
+    def test_retried_after_reset_once_exceeded(self):
+        helix = FakeHelix(['fluffy'], ratelimit=0)
+        client = helix.client()
+        client.http.retries = 0
+        users = run(client, lambda: client.get_users(['fluffy']))
+
+        assert users == {'fluffy': helix.users['fluffy']}
+        assert len(helix.requests) == 2